@@ -9,6 +9,15 @@ Usage
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Choose the simulation engine: logsim.py -e <engine> [-c] <file path>
+Choose the trace store: logsim.py -t <store> [-c] <file path>
+Keep only the last cycles of the traces: logsim.py -w <cycles> [-c] <file path>
+Spill the traces to files in a directory: logsim.py -s <directory> [-c] <file path>
+Stream the traces to a VCD file: logsim.py -v <VCD file path> -c <file path>
+
+Networks built from definition files are cached in the directory set by
+LOGSIM_CACHE, if it is set. The least recently used are removed once the
+cache takes more than 256 MB.
 """
 import getopt
 import os
@@ -20,7 +29,13 @@ from logsim.base_app import App
 from logsim.names import Names
 from logsim.devices import Devices
 from logsim.network import Network
+from logsim.compiled_network import CompiledNetwork
+from logsim.event_network import EventDrivenNetwork
+from logsim.vectorized_network import VectorizedNetwork
 from logsim.monitors import Monitors
+from logsim.traces import ArrayTrace, ChangeTrace
+from logsim.vcd import VcdWriter
+from logsim.netlist_cache import NetlistCache
 from logsim.scanner import Scanner
 from logsim.parse import Parser
 from logsim.userint import UserInterface
@@ -40,6 +55,17 @@ def scanner_init_error_handler(path: str) -> None:
         sys.exit()
 
 
+# Simulation engines which can be selected with the -e option
+engines = {"default": None,
+           "compiled": CompiledNetwork,
+           "event": EventDrivenNetwork,
+           "vectorized": VectorizedNetwork}
+
+# Monitor trace stores which can be selected with the -t option
+trace_stores = {"array": ArrayTrace,
+                "changes": ChangeTrace}
+
+
 def main(arg_list: List[str]) -> None:
     """Parse the command line options and arguments specified in arg_list.
 
@@ -49,10 +75,17 @@ def main(arg_list: List[str]) -> None:
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path>")
+                     "Graphical user interface: logsim.py <file path>\n"
+                     "Choose the simulation engine: logsim.py -e <engine> [-c] <file path>\n"
+                     "Choose the trace store: logsim.py -t <store> [-c] <file path>\n"
+                     "Keep only the last cycles of the traces: logsim.py -w <cycles> [-c] <file path>\n"
+                     "Spill the traces to files in a directory: logsim.py -s <directory> [-c] <file path>\n"
+                     "Stream the traces to a VCD file: logsim.py -v <VCD file path> -c <file path>\n"
+                     f"Engines: {', '.join(engines)}\n"
+                     f"Trace stores: {', '.join(trace_stores)}")
     parsing_message = "Assembling logic circuit..."
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list, "hc:e:t:w:s:v:")
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
@@ -64,6 +97,44 @@ def main(arg_list: List[str]) -> None:
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
 
+    # Cache the networks built from definition files, if enabled
+    cache_directory = NetlistCache.get_default_directory()
+    cache = None if cache_directory is None else NetlistCache(cache_directory)
+
+    vcd_path = None
+    for option, value in options:
+        if option == "-e":  # choose the simulation engine
+            if value not in engines:
+                print(f"Error: unknown engine '{value}'\n")
+                print(usage_message)
+                sys.exit()
+            if engines[value] is not None:
+                try:
+                    network.set_engine(engines[value](names, devices, network))
+                except ImportError as error:
+                    print(f"Error: {error}")
+                    sys.exit()
+        elif option == "-t":  # choose the monitor trace store
+            if value not in trace_stores:
+                print(f"Error: unknown trace store '{value}'\n")
+                print(usage_message)
+                sys.exit()
+            monitors.set_trace_class(trace_stores[value])
+        elif option == "-w":  # keep a window of the last cycles of the traces
+            if not value.isdigit() or int(value) < 1:
+                print(f"Error: invalid history window '{value}'\n")
+                print(usage_message)
+                sys.exit()
+            monitors.set_history_window(int(value))
+        elif option == "-s":  # spill the traces to memory-mapped files
+            try:
+                monitors.set_spill(value)
+            except OSError as error:
+                print(f"Error: {error}")
+                sys.exit()
+        elif option == "-v":  # stream the traces to a VCD file
+            vcd_path = value
+
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
@@ -71,28 +142,47 @@ def main(arg_list: List[str]) -> None:
         elif option == "-c":  # use the command line user interface
             with scanner_init_error_handler(path):
                 scanner = Scanner(path, names)
-            parser = Parser(names, devices, network, monitors, scanner)
+            parser = Parser(names, devices, network, monitors, scanner, cache)
             print(parsing_message)
             if parser.parse_network():
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                if vcd_path is None:
+                    userint.command_interface()
+                else:
+                    try:
+                        writer = VcdWriter(monitors, vcd_path)
+                    except OSError as error:
+                        print(f"Error: {error}")
+                        sys.exit()
+                    writer.write_header()
+                    monitors.writers.append(writer)
+                    try:
+                        userint.command_interface()
+                    finally:
+                        monitors.flush_signals()
+                        writer.close()
             else:
                 print(f"\u001b[31m\nError in the specification file\n{path}.\u001b[0m")
                 for error in parser.fetch_error_output():
                     print(error)
 
-    if not options:  # no option given, use the graphical user interface
+    # No user interface option given, use the graphical user interface
+    if all(option in ("-e", "-t", "-w", "-s", "-v") for option, value in options):
 
         if len(arguments) != 1:  # wrong number of arguments
             print("Error: one file path required\n")
             print(usage_message)
             sys.exit()
+        if vcd_path is not None:  # the GUI exports VCD files from its menu
+            print("Error: -v requires the command line user interface (-c)\n")
+            print(usage_message)
+            sys.exit()
 
         [path] = arguments
         with scanner_init_error_handler(path):
             scanner = Scanner(path, names)
-        parser = Parser(names, devices, network, monitors, scanner)
+        parser = Parser(names, devices, network, monitors, scanner, cache)
 
         # It is possible to provide a file that is wrong initially
         # An error will be given in the GUI terminal
@@ -0,0 +1,292 @@
+"""Simulate many switch configurations at once, one per bit of each signal.
+
+Used in the Logic Simulator project to run the same network under a large
+number of switch settings, for example for regression testing.
+
+Classes
+-------
+BitParallelNetwork - simulates one switch configuration per signal bit.
+"""
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.compiled_network import CompiledNetwork
+
+
+class BitParallelNetwork:
+
+    """Simulate one switch configuration (pattern) per signal bit.
+
+    Each signal is split into two bit-planes, stored as Python integers with
+    one bit per pattern: the value plane holds the level the signal is at or
+    moving to, and the edge plane is set while the signal is RISING or
+    FALLING.
+
+    signal  | value | edge
+    LOW     |   0   |   0
+    HIGH    |   1   |   0
+    RISING  |   1   |   1
+    FALLING |   0   |   1
+
+    Updating a signal towards a target level then sets the value plane to the
+    target and the edge plane to the old value XOR the target, so every device
+    is executed for all the patterns with a few bitwise operations. Devices
+    are executed in the same order as in Network.execute_network(), so every
+    pattern gives the same results as a separate simulation.
+
+    All patterns start from the current state of the Device objects, which
+    are not changed. Clocks and RCs do not depend on the switches, so their
+    counters are shared by all the patterns.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    load_patterns(self, switch_ids, stimuli): Loads the network state from the
+                                              Device objects, with one switch
+                                              configuration per pattern.
+
+    update_signal(self, slot, target): Updates a signal towards the target
+                                       level in every pattern.
+
+    evaluate_device(self, index): Executes the device with the given index
+                                  once for every pattern.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle, for every pattern.
+
+    get_pattern_signal(self, slot, pattern): Returns the signal in the slot
+                                             for the specified pattern.
+
+    run_patterns(self, switch_ids, stimuli, cycles): Runs the network for
+                                                     every pattern and returns
+                                                     the monitor traces.
+    """
+
+    def __init__(self, names: Names, devices: Devices, network: Network,
+                 monitors: Monitors):
+        """Initialise the bit-planes as empty."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.compiled = CompiledNetwork(names, devices, network)
+
+        self.pattern_count = 0
+        self.mask = 0  # one bit set for each pattern
+
+        self.value = []  # {slot: value plane}
+        self.edge = []  # {slot: edge plane}
+        self.switch_words = []  # {device index: switch state plane}
+        self.dtype_memory = []  # {device index: memory plane}
+        self.clock_counter = []  # {device index: counter}, shared
+        self.rc_counter = []  # {device index: counter}, shared
+
+        self.active = 0  # patterns which have not oscillated
+
+    def load_patterns(self, switch_ids: Sequence[int],
+                      stimuli: Sequence[Sequence[int]]) -> bool:
+        """Load the network state from the Device objects, for every pattern.
+
+        stimuli has one row per pattern, holding the state of each of the
+        switches in switch_ids. Switches not in switch_ids keep their state.
+
+        Return True if successful, or False if an input is unconnected.
+        """
+        compiled = self.compiled
+        if compiled.is_stale():
+            compiled.compile()
+        if not compiled.valid:
+            return False
+        compiled.load_state()
+
+        self.pattern_count = len(stimuli)
+        self.mask = mask = (1 << self.pattern_count) - 1
+        self.active = mask
+
+        self.value = [mask if signal in (self.devices.HIGH, self.devices.RISING) else 0
+                      for signal in compiled.signals]
+        self.edge = [mask if signal in (self.devices.RISING, self.devices.FALLING) else 0
+                     for signal in compiled.signals]
+        self.switch_words = [mask if state else 0 for state in compiled.switch_state]
+        self.dtype_memory = [mask if memory else 0 for memory in compiled.dtype_memory]
+        self.clock_counter = [device.clock_counter for device in compiled.device_objects]
+        self.rc_counter = [device.rc_counter for device in compiled.device_objects]
+
+        device_index = {device_id: index for index, device_id
+                        in enumerate(compiled.device_ids)}
+        for column, switch_id in enumerate(switch_ids):
+            word = 0
+            for pattern, row in enumerate(stimuli):
+                if row[column]:
+                    word |= 1 << pattern
+            self.switch_words[device_index[switch_id]] = word
+        return True
+
+    def update_signal(self, slot: int, target: int) -> int:
+        """Update the signal in the slot towards the target plane.
+
+        Return the patterns in which the signal changed.
+        """
+        old_value = self.value[slot]
+        old_edge = self.edge[slot]
+        new_edge = old_value ^ target
+        self.value[slot] = target
+        self.edge[slot] = new_edge
+        return (old_value ^ target) | (old_edge ^ new_edge)
+
+    def evaluate_device(self, index: int) -> int:
+        """Execute the device with the given index once, for every pattern.
+
+        Return the patterns in which any of its output signals changed.
+        """
+        compiled = self.compiled
+        value = self.value
+        edge = self.edge
+        fanin = compiled.fanin
+        mask = self.mask
+        kind = compiled.kinds[index]
+        slot = compiled.output_start[index]
+        start = compiled.fanin_start[index]
+
+        if kind == compiled.SWITCH:
+            target = self.switch_words[index]
+
+        elif kind == compiled.D_TYPE:
+            clock_slot, set_slot, clear_slot, data_slot = fanin[start:start + 4]
+            rising = value[clock_slot] & edge[clock_slot]
+            # Data is read at the level it is moving from
+            data_level = value[data_slot] ^ edge[data_slot]
+            memory = (self.dtype_memory[index] & ~rising) | (data_level & rising)
+            memory |= value[set_slot] & ~edge[set_slot]  # SET is HIGH
+            memory &= ~(value[clear_slot] & ~edge[clear_slot])  # CLEAR is HIGH
+            memory &= mask
+            self.dtype_memory[index] = memory
+
+            # QBAR is stored in the slot after Q
+            return (self.update_signal(slot, memory)
+                    | self.update_signal(slot + 1, mask ^ memory))
+
+        elif kind == compiled.CLOCK or kind == compiled.RC:
+            target = value[slot]  # RISING to HIGH, FALLING to LOW
+
+        elif kind == compiled.XOR:
+            target = value[fanin[start]] ^ value[fanin[start + 1]]
+
+        else:  # AND, OR, NAND, NOR
+            end = compiled.fanin_start[index + 1]
+            if kind == compiled.AND or kind == compiled.NAND:
+                target = mask
+                for position in range(start, end):
+                    target &= value[fanin[position]]
+            else:
+                target = 0
+                for position in range(start, end):
+                    target |= value[fanin[position]]
+            if kind == compiled.NAND or kind == compiled.NOR:
+                target ^= mask
+
+        return self.update_signal(slot, target)
+
+    def update_sources(self) -> None:
+        """Set clock signals to RISING or FALLING and trigger RCs, if due."""
+        compiled = self.compiled
+        for index in compiled.clock_indices:
+            if self.clock_counter[index] == compiled.clock_half_period[index]:
+                self.clock_counter[index] = 0
+                slot = compiled.output_start[index]
+                if not self.edge[slot]:  # HIGH to FALLING, LOW to RISING
+                    self.value[slot] ^= self.mask
+                    self.edge[slot] = self.mask
+            self.clock_counter[index] += 1
+
+        for index in compiled.rc_indices:
+            if self.rc_counter[index] == compiled.trigger_cycle[index]:
+                slot = compiled.output_start[index]
+                self.value[slot] = 0
+                self.edge[slot] = self.mask
+            self.rc_counter[index] += 1
+
+    def execute_network(self) -> int:
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return the active patterns which reached a steady state. Patterns
+        which oscillate are no longer active.
+        """
+        self.update_sources()
+
+        evaluate_device = self.evaluate_device
+        device_indices = range(len(self.compiled.kinds))
+        # If the whole state repeats, every pattern still changing oscillates
+        seen_states = set()
+        changed = 0
+        iterations = 0
+        while iterations < self.network.iteration_limit:
+            iterations += 1
+            changed = 0
+            for index in device_indices:
+                changed |= evaluate_device(index)
+            if not changed & self.active:
+                break
+            state = (tuple(self.value), tuple(self.edge), tuple(self.dtype_memory))
+            if state in seen_states:
+                break
+            seen_states.add(state)
+
+        self.active &= ~changed
+        return self.active
+
+    def get_pattern_signal(self, slot: int, pattern: int) -> int:
+        """Return the signal in the slot for the specified pattern."""
+        level = (self.value[slot] >> pattern) & 1
+        if (self.edge[slot] >> pattern) & 1:
+            return self.devices.RISING if level else self.devices.FALLING
+        return self.devices.HIGH if level else self.devices.LOW
+
+    def run_patterns(self, switch_ids: Sequence[int],
+                     stimuli: Sequence[Sequence[int]],
+                     cycles: int) -> Dict[Tuple[int, Optional[int]], List[array]]:
+        """Run the network for the specified number of cycles, for every pattern.
+
+        stimuli has one row per pattern, holding the state of each of the
+        switches in switch_ids.
+
+        Return {(device_id, port_id): [signal_list]}, with one signal list per
+        pattern for every monitored port, stored as an array("b") as in
+        Monitors. As in UserInterface.run_network(), the signal list of a
+        pattern ends at the cycle in which it oscillates.
+        """
+        monitored_ports = list(self.monitors.signals_dictionary)
+        traces = {port: [array("b") for _ in stimuli] for port in monitored_ports}
+        if not self.load_patterns(switch_ids, stimuli):
+            return traces
+
+        # Record the bit-planes of every cycle, and decode them at the end
+        slots = [self.compiled.get_slot(device_id, port_id)
+                 for device_id, port_id in monitored_ports]
+        recorded = []
+        for _ in range(cycles):
+            if not self.execute_network():
+                break
+            recorded.append((self.active, [(self.value[slot], self.edge[slot])
+                                           for slot in slots]))
+
+        decode = {(0, 0): self.devices.LOW, (1, 0): self.devices.HIGH,
+                  (1, 1): self.devices.RISING, (0, 1): self.devices.FALLING}
+        for pattern in range(self.pattern_count):
+            for active, planes in recorded:
+                if not (active >> pattern) & 1:
+                    break
+                for port, (value, edge) in zip(monitored_ports, planes):
+                    traces[port][pattern].append(
+                        decode[((value >> pattern) & 1, (edge >> pattern) & 1)])
+        return traces
@@ -0,0 +1,213 @@
+"""Simulate many seeded cold start-ups of the network on a pool of processes.
+
+Used in the Logic Simulator project to check whether the monitored signals of
+a network depend on the random state of its D-types and clocks at start-up.
+
+Classes
+-------
+ColdStartSweep - runs seeded cold start-ups in parallel and compares them.
+"""
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.traces import Trace
+
+# worker_state stores the netlist and engine of a worker process, which are
+# sent to it once, when the process starts
+worker_state = {}
+
+
+def serialize_network(names: Names, devices: Devices, network: Network,
+                      monitors: Monitors) -> tuple:
+    """Return a compact, picklable description of the network.
+
+    The description holds the name strings in ID order, so that the rebuilt
+    network uses the same name IDs, followed by the devices, connections and
+    monitors.
+    """
+    name_strings = [names.id_to_name[name_id] for name_id in range(names.id_count)]
+
+    device_list = []
+    connection_list = []
+    for device in devices.devices_list:
+        kind = device.device_kind
+        if kind == devices.SWITCH:
+            device_property = device.switch_state
+        elif kind == devices.CLOCK:
+            device_property = device.clock_half_period
+        elif kind == devices.RC:
+            device_property = device.trigger_cycle
+        elif kind in devices.gate_types and kind != devices.XOR:
+            device_property = len(device.inputs)
+        else:
+            device_property = None
+        device_list.append((device.device_id, kind, device_property))
+
+        for input_id, connected_output in device.inputs.items():
+            if connected_output is not None:
+                connection_list.append((*connected_output, device.device_id,
+                                        input_id))
+
+    monitor_list = [(device_id, port_id, identifier) for identifier,
+                    (device_id, port_id) in monitors.identifier_to_port.items()]
+    return name_strings, device_list, connection_list, monitor_list
+
+
+def build_network(netlist: tuple) -> Tuple[Names, Devices, Network, Monitors]:
+    """Build the network described by serialize_network()."""
+    name_strings, device_list, connection_list, monitor_list = netlist
+    names = Names()
+    names.lookup(name_strings)
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    for device_id, kind, device_property in device_list:
+        devices.make_device(device_id, kind, device_property)
+    for output_device_id, output_id, input_device_id, input_id in connection_list:
+        network.make_connection(output_device_id, output_id, input_device_id,
+                                input_id)
+    for device_id, port_id, identifier in monitor_list:
+        monitors.make_monitor(device_id, port_id, identifier)
+    return names, devices, network, monitors
+
+
+def init_worker(netlist: tuple, engine_class: Optional[type]) -> None:
+    """Store the netlist and engine of the worker process."""
+    worker_state["netlist"] = netlist
+    worker_state["engine_class"] = engine_class
+
+
+def run_cold_start(seed: int, cycles: int) -> Tuple[int, Dict[Tuple[int, Optional[int]], Trace]]:
+    """Run one cold start-up of the worker's network, seeded with seed.
+
+    Return the number of cycles completed before the network oscillated (or
+    cycles if it did not), and the monitor traces.
+    """
+    names, devices, network, monitors = build_network(worker_state["netlist"])
+    engine_class = worker_state["engine_class"]
+    if engine_class is not None:
+        network.set_engine(engine_class(names, devices, network))
+
+    random.seed(seed)
+    devices.cold_startup()
+    cycles_completed = 0
+    while cycles_completed < cycles and network.execute_network():
+        monitors.record_signals()
+        cycles_completed += 1
+    return cycles_completed, monitors.signals_dictionary
+
+
+class ColdStartSweep:
+
+    """Run seeded cold start-ups in parallel and compare their traces.
+
+    The network is serialized once and sent to each worker process when it
+    starts. Each worker then rebuilds the network for every seed it is given,
+    seeds the random module, performs a cold start-up and runs the network,
+    so the results only depend on the seed, and not on which worker ran it.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    run_sweep(self, seeds, cycles, max_workers=None): Runs a cold start-up for
+                                                      each seed and returns the
+                                                      first cycle at which
+                                                      each monitor diverges.
+
+    get_report(self): Returns the lines of a text report of the last sweep.
+    """
+
+    def __init__(self, names: Names, devices: Devices, network: Network,
+                 monitors: Monitors):
+        """Initialise the results of the sweep as empty."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.seeds = []
+        self.cycles = 0
+        self.cycles_completed = {}  # {seed: cycles completed}
+
+        # traces stores {seed: {(device_id, port_id): Trace}}
+        self.traces = {}
+
+        # divergence stores {(device_id, port_id): first differing cycle}
+        self.divergence = {}
+
+    def run_sweep(self, seeds: Sequence[int], cycles: int,
+                  max_workers: Optional[int] = None) -> Dict[Tuple[int, Optional[int]], int]:
+        """Run a cold start-up for each seed, for the specified number of cycles.
+
+        Return {(device_id, port_id): cycle} for every monitor whose trace
+        differs between seeds, where cycle is the first cycle at which any
+        two traces differ.
+        """
+        netlist = serialize_network(self.names, self.devices, self.network,
+                                    self.monitors)
+        engine = self.network.engine
+        engine_class = None if engine is None else type(engine)
+
+        self.seeds = list(seeds)
+        self.cycles = cycles
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        # A few chunks per worker keeps the workers busy with little overhead
+        chunk_size = max(1, len(self.seeds) // (4 * max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                 initargs=(netlist, engine_class)) as executor:
+            results = list(executor.map(run_cold_start, self.seeds,
+                                        [cycles] * len(self.seeds),
+                                        chunksize=chunk_size))
+
+        self.cycles_completed = {}
+        self.traces = {}
+        for seed, (cycles_completed, traces) in zip(self.seeds, results):
+            self.cycles_completed[seed] = cycles_completed
+            self.traces[seed] = traces
+
+        self.divergence = {}
+        for port in self.monitors.signals_dictionary:
+            signal_lists = [self.traces[seed][port].get_signals()
+                            for seed in self.seeds]
+            first_cycle = None
+            for signal_list in signal_lists[1:]:
+                cycle = 0
+                while (cycle < len(signal_list) and cycle < len(signal_lists[0])
+                       and signal_list[cycle] == signal_lists[0][cycle]):
+                    cycle += 1
+                if cycle < max(len(signal_list), len(signal_lists[0])):
+                    if first_cycle is None or cycle < first_cycle:
+                        first_cycle = cycle
+            if first_cycle is not None:
+                self.divergence[port] = first_cycle
+        return self.divergence
+
+    def get_report(self) -> List[str]:
+        """Return the lines of a text report of the last sweep."""
+        report = [f"Cold start-up sweep: {len(self.seeds)} seeds, "
+                  f"{self.cycles} cycles"]
+        oscillating = [seed for seed in self.seeds
+                       if self.cycles_completed[seed] < self.cycles]
+        if oscillating:
+            report.append("Network oscillating for seeds: "
+                          + ", ".join(str(seed) for seed in oscillating))
+        if not self.divergence:
+            report.append("All monitors are independent of the start-up state.")
+        for (device_id, port_id), cycle in self.divergence.items():
+            signal_name = self.devices.get_signal_name(device_id, port_id)
+            report.append(f"{signal_name} differs from cycle {cycle}")
+        return report
@@ -0,0 +1,394 @@
+"""Compile the network into flat integer arrays and execute it.
+
+Used in the Logic Simulator project to simulate a finished network without
+any dictionary look-ups or get_device() calls in the per-cycle hot path.
+
+Classes
+-------
+CompiledNetwork - compiles the network into flat arrays and executes it.
+"""
+from array import array
+from typing import List, Optional
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+
+
+class CompiledNetwork:
+
+    """Compile the network into flat integer arrays and execute it.
+
+    Every output port in the network is given a signal slot in a single
+    signal table. Each device is given an index, ordered in the same way that
+    Network.execute_network() executes devices (switches, D-types, clocks,
+    levelized gates, gates in feedback loops, then RCs), and stores a kind
+    code, the slots of the outputs connected to its inputs (fan-in) and its
+    sequential state.
+
+    The Device objects remain the authoritative record of the network state:
+    the state is loaded from them when it is changed through the Devices class
+    (for example by set_switch or cold_startup), and written back to them
+    after every cycle. Clocks and RCs are toggled and triggered by the timing
+    wheels of the devices, as in Network.execute_network(), so their counters
+    are never copied. The compiled arrays are rebuilt automatically when a
+    device or connection is added to the network.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    is_stale(self): Returns True if the network has changed since it was
+                    compiled.
+
+    compile(self): Compiles the network into flat arrays.
+
+    load_state(self): Loads the network state from the Device objects.
+
+    store_state(self): Writes the network state back to the Device objects.
+
+    get_slot(self, device_id, port_id): Returns the signal slot of an output,
+                                        or of the output driving an input.
+
+    update_sources(self): Sets clock signals to RISING or FALLING and
+                          triggers RCs, where necessary.
+
+    evaluate_device(self, index): Executes the device with the given index
+                                  once.
+
+    prepare(self): Compiles the network and loads its state, if out of date.
+
+    get_packed_state(self): Returns all the signals and D-type memories,
+                            packed into bytes.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+    """
+
+    kind_code_list = [SWITCH, D_TYPE, CLOCK, AND, OR, NAND, NOR, XOR,
+                      RC] = range(9)
+
+    def __init__(self, names: Names, devices: Devices, network: Network):
+        """Initialise the compiled arrays as empty and out of date."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        self.LOW = devices.LOW
+        self.HIGH = devices.HIGH
+        self.RISING = devices.RISING
+        self.FALLING = devices.FALLING
+
+        # transitions[signal][target] is the signal updated in the direction
+        # of target, as in Network.update_signal()
+        self.transitions = ((self.LOW, self.RISING),
+                            (self.FALLING, self.HIGH),
+                            (self.FALLING, self.HIGH),
+                            (self.LOW, self.RISING))
+
+        # levels[signal] is the level the signal is at or moving to, as in
+        # Network.signal_level()
+        self.levels = (self.LOW, self.HIGH, self.HIGH, self.LOW)
+
+        # gate_rules[kind_code] is the (x, y) pair of Network.execute_gate()
+        # for AND, OR, NAND and NOR gates
+        self.gate_rules = [None] * len(self.kind_code_list)
+        self.gate_rules[self.AND] = (self.HIGH, self.HIGH)
+        self.gate_rules[self.OR] = (self.LOW, self.LOW)
+        self.gate_rules[self.NAND] = (self.HIGH, self.LOW)
+        self.gate_rules[self.NOR] = (self.LOW, self.HIGH)
+
+        self.compiled_version = None  # versions the arrays were built from
+        self.loaded_version = None  # state version the arrays were loaded at
+        self.valid = False  # False if the network could not be compiled
+
+        self.device_ids = []  # {device index: device_id}
+        self.device_objects = []  # {device index: Device}
+        self.device_indices = {}  # {device_id: device index}
+        self.kinds = array("b")
+        self.output_start = array("l")  # outputs of device i are in slots
+        # output_start[i] to output_start[i + 1] - 1
+        self.fanin_start = array("l")  # fan-in of device i is
+        self.fanin = array("l")  # fanin[fanin_start[i]:fanin_start[i + 1]]
+
+        self.signals = array("b")  # {slot: signal}
+        self.slot_ports = []  # {slot: (device_id, port_id)}
+        self.slot_devices = []  # {slot: Device}
+        self.slots = {}  # {(device_id, port_id): slot}, for outputs only
+
+        self.switch_state = array("b")
+        self.dtype_memory = array("b")
+        self.clock_half_period = array("l")
+        self.trigger_cycle = array("l")
+
+        self.clock_indices = []
+        self.rc_indices = []
+
+    def is_stale(self) -> bool:
+        """Return True if the network has changed since it was compiled."""
+        return self.compiled_version != (self.devices.structure_version,
+                                         self.network.structure_version)
+
+    def compile(self) -> bool:
+        """Compile the network into flat arrays.
+
+        Return True if successful, or False if an input is unconnected.
+        """
+        devices = self.devices
+        kind_codes = {devices.SWITCH: self.SWITCH, devices.D_TYPE: self.D_TYPE,
+                      devices.CLOCK: self.CLOCK, devices.AND: self.AND,
+                      devices.OR: self.OR, devices.NAND: self.NAND,
+                      devices.NOR: self.NOR, devices.XOR: self.XOR,
+                      devices.RC: self.RC}
+
+        gate_levels, feedback_gates = self.network.get_gate_levels()
+        execution_order = (devices.find_devices(devices.SWITCH)
+                           + devices.find_devices(devices.D_TYPE)
+                           + devices.find_devices(devices.CLOCK))
+        for level in gate_levels:
+            execution_order.extend(level)
+        execution_order.extend(feedback_gates)
+        execution_order.extend(devices.find_devices(devices.RC))
+
+        self.device_ids = []
+        self.device_objects = []
+        self.kinds = array("b")
+        self.output_start = array("l")
+        self.slot_ports = []
+        self.slot_devices = []
+        self.slots = {}
+        for device_id in execution_order:
+            device = devices.get_device(device_id)
+            self.device_ids.append(device_id)
+            self.device_objects.append(device)
+            self.kinds.append(kind_codes[device.device_kind])
+            self.output_start.append(len(self.slot_ports))
+            if device.device_kind == devices.D_TYPE:
+                output_ids = devices.dtype_output_ids
+            else:
+                output_ids = [None]
+            for output_id in output_ids:
+                self.slots[(device_id, output_id)] = len(self.slot_ports)
+                self.slot_ports.append((device_id, output_id))
+                self.slot_devices.append(device)
+
+        self.output_start.append(len(self.slot_ports))  # end sentinel
+
+        self.fanin_start = array("l", [0])
+        self.fanin = array("l")
+        self.valid = True
+        for device in self.device_objects:
+            if device.device_kind == devices.D_TYPE:
+                input_ids = devices.dtype_input_ids  # CLK, SET, CLEAR, DATA
+            else:
+                input_ids = device.inputs
+            for input_id in input_ids:
+                connected_output = device.inputs.get(input_id)
+                if connected_output not in self.slots:
+                    self.valid = False  # unconnected input
+                    self.fanin.append(-1)
+                else:
+                    self.fanin.append(self.slots[connected_output])
+            self.fanin_start.append(len(self.fanin))
+
+        self.clock_indices = [index for index, kind in enumerate(self.kinds)
+                              if kind == self.CLOCK]
+        self.rc_indices = [index for index, kind in enumerate(self.kinds)
+                           if kind == self.RC]
+        self.device_indices = {device_id: index for index, device_id
+                               in enumerate(self.device_ids)}
+
+        self.compiled_version = (devices.structure_version,
+                                 self.network.structure_version)
+        self.loaded_version = None
+        return self.valid
+
+    def load_state(self) -> None:
+        """Load the network state from the Device objects."""
+        self.signals = array("b", [0]) * len(self.slot_ports)
+        for slot, (device_id, port_id) in enumerate(self.slot_ports):
+            self.signals[slot] = self.slot_devices[slot].outputs[port_id]
+        device_count = len(self.device_objects)
+        self.switch_state = array("b", [0]) * device_count
+        self.dtype_memory = array("b", [0]) * device_count
+        self.clock_half_period = array("l", [0]) * device_count
+        self.trigger_cycle = array("l", [0]) * device_count
+        for index, device in enumerate(self.device_objects):
+            kind = self.kinds[index]
+            if kind == self.SWITCH:
+                self.switch_state[index] = device.switch_state
+            elif kind == self.D_TYPE:
+                self.dtype_memory[index] = device.dtype_memory
+            elif kind == self.CLOCK:
+                self.clock_half_period[index] = device.clock_half_period
+            elif kind == self.RC:
+                self.trigger_cycle[index] = device.trigger_cycle
+        self.loaded_version = self.devices.state_version
+
+    def store_state(self) -> None:
+        """Write the network state back to the Device objects."""
+        signals = self.signals
+        for index, device in enumerate(self.device_objects):
+            kind = self.kinds[index]
+            slot = self.output_start[index]
+            if kind == self.D_TYPE:
+                device.outputs[self.devices.Q_ID] = signals[slot]
+                device.outputs[self.devices.QBAR_ID] = signals[slot + 1]
+                device.dtype_memory = self.dtype_memory[index]
+            else:
+                device.outputs[None] = signals[slot]
+
+    def get_slot(self, device_id: int, port_id: Optional[int]) -> Optional[int]:
+        """Return the signal slot of the specified port.
+
+        If the port is an input, return the slot of the output connected to
+        it. Return None if the port does not exist or is unconnected.
+        """
+        if (device_id, port_id) in self.slots:
+            return self.slots[(device_id, port_id)]
+        connected_output = self.network.get_connected_output(device_id,
+                                                             port_id)
+        return self.slots.get(connected_output)
+
+    def update_sources(self) -> List[int]:
+        """Set clock signals to RISING or FALLING and trigger RCs, if due.
+
+        Only the clocks and RCs due in this cycle are visited, by advancing
+        the timing wheels of the devices. Return the indices of the devices
+        whose output was changed.
+        """
+        signals = self.signals
+        output_start = self.output_start
+        device_indices = self.device_indices
+        changed_devices = []
+        for device in self.network.update_clocks() + self.network.update_rc():
+            index = device_indices[device.device_id]
+            signals[output_start[index]] = device.outputs[None]
+            changed_devices.append(index)
+        return changed_devices
+
+    def evaluate_device(self, index: int) -> bool:
+        """Execute the device with the given index once.
+
+        Return True if any of its output signals changed.
+        """
+        signals = self.signals
+        transitions = self.transitions
+        fanin = self.fanin
+        kind = self.kinds[index]
+        slot = self.output_start[index]
+        signal = signals[slot]
+        start = self.fanin_start[index]
+        changed = False
+
+        if kind == self.SWITCH:
+            new_signal = transitions[signal][self.switch_state[index]]
+
+        elif kind == self.D_TYPE:
+            HIGH = self.HIGH
+            LOW = self.LOW
+            memory = self.dtype_memory[index]
+            data_signal = signals[fanin[start + 3]]
+            if signals[fanin[start]] == self.RISING:  # CLK
+                if data_signal == HIGH or data_signal == self.FALLING:
+                    memory = HIGH
+                elif data_signal == LOW or data_signal == self.RISING:
+                    memory = LOW
+            if signals[fanin[start + 1]] == HIGH:  # SET
+                memory = HIGH
+            if signals[fanin[start + 2]] == HIGH:  # CLEAR
+                memory = LOW
+            self.dtype_memory[index] = memory
+
+            new_signal = transitions[signal][memory]
+            # QBAR is stored in the slot after Q
+            bar_signal = signals[slot + 1]
+            new_bar_signal = transitions[bar_signal][1 - memory]
+            if new_bar_signal != bar_signal:
+                signals[slot + 1] = new_bar_signal
+                changed = True
+
+        elif kind == self.CLOCK or kind == self.RC:
+            if signal == self.RISING:
+                new_signal = self.HIGH
+            elif signal == self.FALLING:
+                new_signal = self.LOW
+            else:
+                new_signal = signal
+
+        elif kind == self.XOR:
+            levels = self.levels
+            if levels[signals[fanin[start]]] == levels[signals[fanin[start + 1]]]:
+                new_signal = transitions[signal][self.LOW]
+            else:
+                new_signal = transitions[signal][self.HIGH]
+
+        else:  # AND, OR, NAND, NOR
+            levels = self.levels
+            x, y = self.gate_rules[kind]
+            target = y
+            for position in range(start, self.fanin_start[index + 1]):
+                if levels[signals[fanin[position]]] != x:
+                    target = 1 - y
+                    break
+            new_signal = transitions[signal][target]
+
+        if new_signal != signal:
+            signals[slot] = new_signal
+            changed = True
+        return changed
+
+    def prepare(self) -> bool:
+        """Compile the network and load its state, if out of date.
+
+        Return True if the network is ready to be executed.
+        """
+        if self.is_stale():
+            self.compile()
+        if not self.valid:
+            return False
+        if self.loaded_version != self.devices.state_version:
+            self.load_state()
+        return True
+
+    def get_packed_state(self) -> bytes:
+        """Return all the signals and D-type memories, packed into bytes."""
+        return bytes(self.signals) + bytes(self.dtype_memory)
+
+    def execute_network(self) -> bool:
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if not self.prepare():
+            return False
+
+        self.update_sources()
+
+        evaluate_device = self.evaluate_device
+        device_indices = range(len(self.kinds))
+        seen_states = {}  # {packed state: iteration}, as in Network
+        self.network.oscillation_period = None
+        steady_state = False
+        iterations = 0
+        while iterations < self.network.iteration_limit:
+            iterations += 1
+            steady_state = True
+            for index in device_indices:
+                if evaluate_device(index):
+                    steady_state = False
+            if steady_state:
+                break
+            state = self.get_packed_state()
+            if state in seen_states:
+                self.network.oscillation_period = iterations - seen_states[state]
+                break
+            seen_states[state] = iterations
+
+        self.network.steady_state = steady_state
+        self.store_state()
+        return steady_state
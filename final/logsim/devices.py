@@ -5,32 +5,116 @@ properties.
 
 Classes
 -------
+TimingWheel - schedules the cycles at which clocks toggle or RCs trigger.
 Device - stores device properties.
+Snapshot - stores the state of all the devices at one simulation cycle.
 Devices - makes and stores all the devices in the logic network.
 """
+import collections
 import random
+from array import array
 
 from typing import List, Optional
 from logsim.names import Names
 
 
+class TimingWheel:
+
+    """Schedule the cycles at which clocks toggle or RCs trigger.
+
+    The wheel counts the cycles it has been advanced by, and stores the
+    devices due at each future cycle, so that advancing it only visits the
+    devices which are due. Each counter is stored as its origin, the wheel
+    cycle at which it was 0, so counters advance without being updated.
+
+    Devices whose counter is set directly are marked as changed, and must be
+    scheduled again by the owner of the wheel. Scheduled entries which are no
+    longer valid are left in the wheel, and must be ignored when popped.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    schedule(self, device, due_cycle): Schedules the device at the due cycle.
+
+    mark_changed(self, device): Records that the counter of the device was
+                                set directly.
+
+    take_changed(self): Returns and clears the devices whose counter was set
+                        directly.
+
+    pop_due(self): Returns the devices scheduled at the current cycle, and
+                   advances the wheel by one cycle.
+    """
+
+    def __init__(self):
+        """Initialise the wheel at cycle 0, with no devices scheduled."""
+        self.cycle = 0
+
+        # buckets stores {due_cycle: [Device]}
+        self.buckets = {}
+
+        # changed stores {device_id: Device}
+        self.changed = {}
+
+    def schedule(self, device, due_cycle: int) -> None:
+        """Schedule the device at the due cycle."""
+        if due_cycle in self.buckets:
+            self.buckets[due_cycle].append(device)
+        else:
+            self.buckets[due_cycle] = [device]
+
+    def mark_changed(self, device) -> None:
+        """Record that the counter of the device was set directly."""
+        self.changed[device.device_id] = device
+
+    def take_changed(self) -> list:
+        """Return and clear the devices whose counter was set directly."""
+        changed = list(self.changed.values())
+        self.changed = {}
+        return changed
+
+    def pop_due(self) -> list:
+        """Return the devices due at the current cycle and advance the wheel."""
+        due_devices = self.buckets.pop(self.cycle, [])
+        self.cycle += 1
+        return due_devices
+
+
 class Device:
 
     """Store device properties.
 
+    Clock and RC counters are stored relative to the cycle of a timing wheel,
+    so that they advance with the wheel without being updated every cycle.
+    Reading or setting clock_counter or rc_counter works as for any other
+    attribute. Devices made by the Devices class share its wheels; a device
+    made without one gets its own wheel when its counter is first set.
+
     Parameters
     ----------
     device_id: device ID.
+    clock_wheel: the TimingWheel of the clocks (optional).
+    rc_wheel: the TimingWheel of the RCs (optional).
 
     Public methods
     --------------
     No public methods.
     """
 
-    def __init__(self, device_id: int):
+    def __init__(self, device_id: int, clock_wheel: TimingWheel = None,
+                 rc_wheel: TimingWheel = None):
         """Initialise device properties."""
 
         self.device_id = device_id
+        self.clock_wheel = clock_wheel
+        self.rc_wheel = rc_wheel
+
+        # Wheel cycles at which the clock and RC counters were 0
+        self.clock_origin = None
+        self.rc_origin = None
 
         # inputs dictionary stores
         # {input_id: (connected_output_device_id, connected_output_port_id)}
@@ -47,13 +131,90 @@ class Device:
         self.trigger_cycle = None
         self.rc_counter = None
 
+    @property
+    def clock_counter(self) -> Optional[int]:
+        """Return the number of cycles since the clock last toggled."""
+        if self.clock_origin is None:
+            return None
+        return self.clock_wheel.cycle - self.clock_origin
+
+    @clock_counter.setter
+    def clock_counter(self, counter: Optional[int]) -> None:
+        """Set the clock counter, and mark the clock for rescheduling."""
+        if counter is None:
+            self.clock_origin = None
+        else:
+            if self.clock_wheel is None:
+                self.clock_wheel = TimingWheel()
+            self.clock_origin = self.clock_wheel.cycle - counter
+            self.clock_wheel.mark_changed(self)
+
+    @property
+    def rc_counter(self) -> Optional[int]:
+        """Return the number of cycles since the RC was started up."""
+        if self.rc_origin is None:
+            return None
+        return self.rc_wheel.cycle - self.rc_origin
+
+    @rc_counter.setter
+    def rc_counter(self, counter: Optional[int]) -> None:
+        """Set the RC counter, and mark the RC for rescheduling."""
+        if counter is None:
+            self.rc_origin = None
+        else:
+            if self.rc_wheel is None:
+                self.rc_wheel = TimingWheel()
+            self.rc_origin = self.rc_wheel.cycle - counter
+            self.rc_wheel.mark_changed(self)
+
+
+class Snapshot:
+
+    """Store the state of all the devices at one simulation cycle.
+
+    The state is packed into flat arrays, in the order of the devices in
+    Devices.devices_list, so a snapshot takes little more memory than the
+    signals it stores, and never holds references to Device objects.
+    A snapshot is only valid for the network it was taken from, as
+    recorded by structure_version.
+
+    Parameters
+    ----------
+    cycle: the number of simulation cycles completed.
+    structure_version: Devices.structure_version when the snapshot was taken.
+    outputs: every output signal, device by device.
+    switch_states: the state of every switch.
+    dtype_memory: the memory of every D-type.
+    clock_counters: the counter of every clock.
+    rc_counters: the counter of every RC.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, cycle: int, structure_version: int, outputs: array,
+                 switch_states: array, dtype_memory: array,
+                 clock_counters: array, rc_counters: array):
+        """Initialise the snapshot."""
+        self.cycle = cycle
+        self.structure_version = structure_version
+        self.outputs = outputs
+        self.switch_states = switch_states
+        self.dtype_memory = dtype_memory
+        self.clock_counters = clock_counters
+        self.rc_counters = rc_counters
+
 
 class Devices:
 
     """Make and store devices.
 
     This class contains many functions for making devices and ports.
-    It stores all the devices in a list.
+    It stores all the devices in a list, and indexes them by device ID and by
+    device kind so that look-ups do not need to scan the list. The inputs
+    connected to each device's outputs are indexed too, so that removing a
+    device only visits its own connections.
 
     Parameters
     ----------
@@ -70,9 +231,16 @@ class Devices:
     add_device(self, device_id, device_kind): Adds the specified device to the
                                               network.
 
+    remove_device(self, device_id): Removes the specified device from the
+                                    network.
+
     add_input(self, device_id, input_id): Adds the specified input to the
                                           specified device.
 
+    set_input(self, device_id, input_id, connected_output): Connects the
+                       specified input to an output, or disconnects it if
+                       connected_output is None.
+
     add_output(self, device_id, output_id, signal=0): Adds the specified output
                                                       to the specified device.
 
@@ -98,8 +266,26 @@ class Devices:
 
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    cold_startup_device(self, device): Simulates cold start-up of a single
+                                       device.
+
+    take_snapshot(self, cycle=0): Returns a Snapshot of the state of all the
+                                  devices.
+
+    restore_snapshot(self, snapshot): Restores the state of all the devices
+                                      from a Snapshot.
+
+    mark_state_changed(self): Records that the state of the devices was
+                              changed directly.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
+
+    export_devices(self): Returns the devices and their connections as rows
+                          of plain values.
+
+    import_devices(self, rows): Adds the devices of rows returned by
+                                export_devices().
     """
 
     def __init__(self, names: Names):
@@ -109,6 +295,28 @@ class Devices:
 
         self.devices_list = []
 
+        # structure_version changes whenever a device or port is added or
+        # removed, state_version whenever switch or start-up state is changed
+        # through this class. Compiled forms of the network use them to
+        # detect when they are out of date.
+        self.structure_version = 0
+        self.state_version = 0
+
+        # devices_dictionary stores {device_id: Device}
+        self.devices_dictionary = {}
+
+        # kind_to_devices stores {device_kind: {device_id: None}}, in the
+        # order in which the devices were added
+        self.kind_to_devices = collections.defaultdict(dict)
+
+        # consumers stores {device_id: {(input_device_id, input_id)}}, the
+        # inputs connected to the outputs of each device
+        self.consumers = collections.defaultdict(set)
+
+        # Timing wheels scheduling the clock toggles and RC triggers
+        self.clock_wheel = TimingWheel()
+        self.rc_wheel = TimingWheel()
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC"]
         dtype_inputs = ["CLK", "SET", "CLEAR", "DATA"]
@@ -133,10 +341,7 @@ class Devices:
 
     def get_device(self, device_id: int) -> Device or None:
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.devices_dictionary.get(device_id)
 
     def find_devices(self, device_kind: int = None) -> List[int]:
         """Return a list of device IDs of the specified device_kind.
@@ -144,19 +349,46 @@ class Devices:
         Return a list of all device IDs in the network if no device_kind is
         specified.
         """
-        device_id_list = []
-        for device in self.devices_list:
-            if device_kind is None:
-                device_id_list.append(device.device_id)
-            elif device.device_kind == device_kind:
-                device_id_list.append(device.device_id)
-        return device_id_list
+        if device_kind is None:
+            return list(self.devices_dictionary)
+        elif device_kind in self.kind_to_devices:
+            return list(self.kind_to_devices[device_kind])
+        else:
+            return []
 
     def add_device(self, device_id: int, device_kind: int) -> None:
         """Add the specified device to the network."""
-        new_device = Device(device_id)
+        new_device = Device(device_id, self.clock_wheel, self.rc_wheel)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.devices_dictionary[device_id] = new_device
+        self.kind_to_devices[device_kind][device_id] = None
+        self.structure_version += 1
+
+    def remove_device(self, device_id: int) -> bool:
+        """Remove the specified device from the network.
+
+        Any input connected to one of the device's outputs is disconnected,
+        found from the consumers index. devices_list keeps the order in which
+        the devices were added, so the device is removed from it by one list
+        deletion. Return True if successful.
+        """
+        device = self.get_device(device_id)
+        if device is None:
+            return False
+
+        self.devices_list.remove(device)
+        del self.devices_dictionary[device_id]
+        del self.kind_to_devices[device.device_kind][device_id]
+        if not self.kind_to_devices[device.device_kind]:
+            del self.kind_to_devices[device.device_kind]
+
+        for input_id in list(device.inputs):
+            self.set_input(device_id, input_id, None)
+        for input_device_id, input_id in self.consumers.pop(device_id, ()):
+            self.get_device(input_device_id).inputs[input_id] = None
+        self.structure_version += 1
+        return True
 
     def add_input(self, device_id: int, input_id: int) -> bool:
         """Add the specified input to the specified device.
@@ -166,10 +398,34 @@ class Devices:
         device = self.get_device(device_id)
         if device is not None:
             device.inputs.setdefault(input_id)
+            self.structure_version += 1
             return True
         else:
             return False
 
+    def set_input(self, device_id: int, input_id: int,
+                  connected_output: Optional[tuple]) -> bool:
+        """Connect the specified input to connected_output.
+
+        connected_output is (output_device_id, output_id), or None to
+        disconnect the input. The consumers index is kept in step. Return
+        True if successful.
+        """
+        device = self.get_device(device_id)
+        if device is None or input_id not in device.inputs:
+            return False
+        previous_output = device.inputs[input_id]
+        if previous_output is not None:
+            consumers = self.consumers.get(previous_output[0])
+            if consumers is not None:
+                consumers.discard((device_id, input_id))
+                if not consumers:
+                    del self.consumers[previous_output[0]]
+        device.inputs[input_id] = connected_output
+        if connected_output is not None:
+            self.consumers[connected_output[0]].add((device_id, input_id))
+        return True
+
     def add_output(self, device_id: int, output_id: int or None, signal: int = 0) -> bool:
         """Add the specified output to the specified device.
 
@@ -178,6 +434,7 @@ class Devices:
         device = self.get_device(device_id)
         if device is not None:
             device.outputs[output_id] = signal
+            self.structure_version += 1
             return True
         else:
             return False
@@ -227,6 +484,7 @@ class Devices:
             return False
         else:
             device.switch_state = signal
+            self.state_version += 1
             return True
 
     def make_switch(self, device_id: int, initial_state: int) -> None:
@@ -244,7 +502,8 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        # Clock initialised to a random point in its cycle
+        self.cold_startup_device(device)
 
     def make_gate(self, device_id: int, device_kind: int, no_of_inputs: int) -> None:
         """Make logic gates with the specified number of inputs."""
@@ -263,15 +522,17 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        # D-type initialised to a random state
+        self.cold_startup_device(self.get_device(device_id))
 
     def make_rc_device(self, device_id: int, trigger_cycle: int) -> None:
         """Make an RC device."""
         self.add_device(device_id, self.RC)
         self.add_output(device_id, output_id=None)
         device = self.get_device(device_id)
-        device.outputs[None] = self.HIGH
         device.trigger_cycle = trigger_cycle
+        # RC output starts HIGH with its counter reset
+        self.cold_startup_device(device)
 
     def cold_startup(self):
         """Simulate cold start-up of D-types, clocks and RCs.
@@ -282,19 +543,151 @@ class Devices:
         Set RCs to high again and reset rc_counters.
         """
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-            elif device.device_kind == self.RC:
-                device.outputs[None] = self.HIGH
-                device.rc_counter = 0
+            self.cold_startup_device(device)
+
+    def cold_startup_device(self, device: Device) -> None:
+        """Simulate cold start-up of a single D-type, clock or RC.
+
+        Other device kinds are left unchanged.
+        """
+        self.state_version += 1
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = random.choice([self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = random.choice([self.LOW, self.HIGH])
+            device.outputs[None] = clock_signal
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = \
+                random.randrange(device.clock_half_period)
+        elif device.device_kind == self.RC:
+            device.outputs[None] = self.HIGH
+            device.rc_counter = 0
+
+    def take_snapshot(self, cycle: int = 0) -> Snapshot:
+        """Return a Snapshot of the state of all the devices.
+
+        cycle is the number of simulation cycles completed, which is stored
+        with the snapshot.
+        """
+        outputs = array("b")
+        switch_states = array("b")
+        dtype_memory = array("b")
+        clock_counters = array("q")
+        rc_counters = array("q")
+        for device in self.devices_list:
+            outputs.extend(device.outputs.values())
+            kind = device.device_kind
+            if kind == self.SWITCH:
+                switch_states.append(device.switch_state)
+            elif kind == self.D_TYPE:
+                dtype_memory.append(device.dtype_memory)
+            elif kind == self.CLOCK:
+                clock_counters.append(device.clock_counter)
+            elif kind == self.RC:
+                rc_counters.append(device.rc_counter)
+        return Snapshot(cycle, self.structure_version, outputs, switch_states,
+                        dtype_memory, clock_counters, rc_counters)
+
+    def restore_snapshot(self, snapshot: Snapshot) -> bool:
+        """Restore the state of all the devices from the snapshot.
+
+        Return True if successful, or False if devices or ports have been
+        added or removed since the snapshot was taken.
+        """
+        if snapshot.structure_version != self.structure_version:
+            return False
+        outputs = iter(snapshot.outputs)
+        switch_states = iter(snapshot.switch_states)
+        dtype_memory = iter(snapshot.dtype_memory)
+        clock_counters = iter(snapshot.clock_counters)
+        rc_counters = iter(snapshot.rc_counters)
+        for device in self.devices_list:
+            for output_id in device.outputs:
+                device.outputs[output_id] = next(outputs)
+            kind = device.device_kind
+            if kind == self.SWITCH:
+                device.switch_state = next(switch_states)
+            elif kind == self.D_TYPE:
+                device.dtype_memory = next(dtype_memory)
+            elif kind == self.CLOCK:
+                device.clock_counter = next(clock_counters)
+            elif kind == self.RC:
+                device.rc_counter = next(rc_counters)
+        self.mark_state_changed()
+        return True
+
+    def mark_state_changed(self) -> None:
+        """Record that the state of the devices was changed directly.
+
+        Call this after changing outputs, memories or counters of the Device
+        objects outside this class, so that compiled engines reload them.
+        """
+        self.state_version += 1
+
+    def export_devices(self) -> list:
+        """Return the devices and their connections as rows of plain values.
+
+        Each row is [device_id, device_kind, device_property, input_ids,
+        connected_outputs, output_ids], in the order of devices_list. The
+        property is the switch state, clock half period or RC trigger cycle,
+        or None, and each connected output is [device_id, output_id], or
+        None if the input is unconnected.
+        """
+        rows = []
+        for device in self.devices_list:
+            kind = device.device_kind
+            if kind == self.SWITCH:
+                device_property = device.switch_state
+            elif kind == self.CLOCK:
+                device_property = device.clock_half_period
+            elif kind == self.RC:
+                device_property = device.trigger_cycle
+            else:
+                device_property = None
+            rows.append([device.device_id, kind, device_property, list(device.inputs),
+                         [None if output is None else list(output)
+                          for output in device.inputs.values()],
+                         list(device.outputs)])
+        return rows
+
+    def import_devices(self, rows: list) -> None:
+        """Add the devices of rows returned by export_devices().
+
+        The rows are not checked, and the Device objects are built directly,
+        in one pass, rather than through make_device(). The D-types, clocks
+        and RCs are cold started, as when they are made.
+        """
+        clock_wheel = self.clock_wheel
+        rc_wheel = self.rc_wheel
+        devices_list = self.devices_list
+        devices_dictionary = self.devices_dictionary
+        kind_to_devices = self.kind_to_devices
+        consumers = self.consumers
+        started_kinds = {self.D_TYPE, self.CLOCK, self.RC}
+        for device_id, kind, device_property, input_ids, connected_outputs, \
+                output_ids in rows:
+            device = Device(device_id, clock_wheel, rc_wheel)
+            device.device_kind = kind
+            device.inputs = inputs = dict.fromkeys(input_ids)
+            for input_id, output in zip(input_ids, connected_outputs):
+                if output is not None:
+                    inputs[input_id] = output = tuple(output)
+                    consumers[output[0]].add((device_id, input_id))
+            device.outputs = dict.fromkeys(output_ids, self.LOW)
+            devices_list.append(device)
+            devices_dictionary[device_id] = device
+            kind_to_devices[kind][device_id] = None
+            if kind == self.SWITCH:
+                device.switch_state = device_property
+            elif kind == self.CLOCK:
+                device.clock_half_period = device_property
+            elif kind == self.RC:
+                device.trigger_cycle = device_property
+            if kind in started_kinds:
+                self.cold_startup_device(device)
+        self.structure_version += 1
+        self.state_version += 1
 
     def make_device(self, device_id: int, device_kind: int, device_property: int = None) -> int:
         """Create the specified device.
@@ -302,7 +695,7 @@ class Devices:
         Return self.NO_ERROR if successful. Return corresponding error if not.
         """
         # Device has already been added to the devices_list
-        if self.get_device(device_id) is not None:
+        if device_id in self.devices_dictionary:
             error_type = self.DEVICE_PRESENT
 
         elif device_kind == self.SWITCH:
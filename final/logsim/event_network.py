@@ -0,0 +1,191 @@
+"""Execute the network with an event-driven simulation kernel.
+
+Used in the Logic Simulator project to simulate large networks in which only
+a small fraction of the devices change in each simulation cycle.
+
+Classes
+-------
+EventDrivenNetwork - executes only the devices whose inputs have changed.
+"""
+import heapq
+from array import array
+from typing import Set
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.compiled_network import CompiledNetwork
+
+
+class EventDrivenNetwork(CompiledNetwork):
+
+    """Execute only the devices whose inputs have changed.
+
+    The compiled network is extended with a fanout index, which lists the
+    devices consuming each output signal slot. Each settle iteration (delta
+    step) of a cycle only re-evaluates the devices that are dirty: those with
+    an input that changed in the previous delta step, and those whose own
+    output is still RISING or FALLING. The network is in a steady state when
+    no device is dirty.
+
+    Dirty devices are evaluated in the same order as in
+    Network.execute_network(), and a device reading an output that changed
+    earlier in the same delta step is evaluated in that step, so the results
+    are identical to those of the default engine.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile(self): Compiles the network into flat arrays, with fanout lists.
+
+    load_state(self): Loads the network state and marks every device dirty.
+
+    store_state(self): Writes the changed network state back to the Device
+                       objects.
+
+    execute_network(self): Executes the dirty devices in the network for one
+                           simulation cycle.
+    """
+
+    def __init__(self, names: Names, devices: Devices, network: Network):
+        """Initialise the fanout index and the dirty devices."""
+        super().__init__(names, devices, network)
+
+        self.fanout_start = array("l")  # consumers of slot s are
+        self.fanout = array("l")  # fanout[fanout_start[s]:fanout_start[s + 1]]
+
+        self.dirty = set()  # indices of the devices to evaluate next
+        self.changed_slots = set()  # slots changed since the last store
+        self.changed_memory = set()  # D-types evaluated since the last store
+
+    def compile(self) -> bool:
+        """Compile the network into flat arrays, with fanout lists.
+
+        Return True if successful, or False if an input is unconnected.
+        """
+        if not super().compile():
+            return False
+
+        consumers = [[] for _ in self.slot_ports]  # {slot: [device index]}
+        for index in range(len(self.kinds)):
+            for position in range(self.fanin_start[index],
+                                  self.fanin_start[index + 1]):
+                slot_consumers = consumers[self.fanin[position]]
+                if not slot_consumers or slot_consumers[-1] != index:
+                    slot_consumers.append(index)
+
+        self.fanout_start = array("l", [0])
+        self.fanout = array("l")
+        for slot_consumers in consumers:
+            self.fanout.extend(slot_consumers)
+            self.fanout_start.append(len(self.fanout))
+        return True
+
+    def load_state(self) -> None:
+        """Load the network state and mark every device dirty."""
+        super().load_state()
+        self.dirty = set(range(len(self.kinds)))
+        self.changed_slots = set()
+        self.changed_memory = set()
+
+    def store_state(self) -> None:
+        """Write the changed network state back to the Device objects."""
+        signals = self.signals
+        for slot in self.changed_slots:
+            port_id = self.slot_ports[slot][1]
+            self.slot_devices[slot].outputs[port_id] = signals[slot]
+        for index in self.changed_memory:
+            self.device_objects[index].dtype_memory = self.dtype_memory[index]
+        self.changed_slots = set()
+        self.changed_memory = set()
+
+    def schedule_consumers(self, index: int, current: list, in_current: bytearray,
+                           following: Set[int]) -> None:
+        """Mark the devices consuming the outputs of device index as dirty.
+
+        Consumers later in the execution order are evaluated in the current
+        delta step, the others in the following one. The device itself is
+        evaluated again in the following delta step if its output is still
+        RISING or FALLING.
+        """
+        signals = self.signals
+        fanout = self.fanout
+        fanout_start = self.fanout_start
+        for slot in range(self.output_start[index], self.output_start[index + 1]):
+            self.changed_slots.add(slot)
+            if signals[slot] == self.RISING or signals[slot] == self.FALLING:
+                following.add(index)
+            for position in range(fanout_start[slot], fanout_start[slot + 1]):
+                consumer = fanout[position]
+                if consumer > index:
+                    if not in_current[consumer]:
+                        in_current[consumer] = 1
+                        heapq.heappush(current, consumer)
+                else:
+                    following.add(consumer)
+
+    def execute_network(self) -> bool:
+        """Execute the dirty devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if not self.prepare():
+            return False
+
+        # Clocks and RCs changed by their counters are evaluated again, and
+        # so are the devices reading them
+        following = self.dirty
+        for index in self.update_sources():
+            following.add(index)
+            for slot in range(self.output_start[index],
+                              self.output_start[index + 1]):
+                self.changed_slots.add(slot)
+                for position in range(self.fanout_start[slot],
+                                      self.fanout_start[slot + 1]):
+                    following.add(self.fanout[position])
+
+        evaluate_device = self.evaluate_device
+        in_current = bytearray(len(self.kinds))
+        seen_states = {}  # {packed state: iteration}, as in Network
+        self.network.oscillation_period = None
+        steady_state = False
+        iterations = 0
+        while iterations < self.network.iteration_limit:
+            iterations += 1
+            if not following:  # an empty event queue is a steady state
+                steady_state = True
+                break
+
+            current = sorted(following)
+            for index in current:
+                in_current[index] = 1
+            following = set()
+
+            steady_state = True
+            while current:
+                index = heapq.heappop(current)
+                in_current[index] = 0
+                if self.kinds[index] == self.D_TYPE:
+                    self.changed_memory.add(index)
+                if evaluate_device(index):
+                    steady_state = False
+                    self.schedule_consumers(index, current, in_current,
+                                            following)
+            if steady_state:
+                break
+            state = self.get_packed_state()
+            if state in seen_states:
+                self.network.oscillation_period = iterations - seen_states[state]
+                break
+            seen_states[state] = iterations
+
+        # Devices left dirty by an unsettled cycle are evaluated next cycle
+        self.dirty = following
+        self.network.steady_state = steady_state
+        self.store_state()
+        return steady_state
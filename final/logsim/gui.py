@@ -21,6 +21,9 @@ from logsim.gui_widgets.monitor import MonitorsList
 
 from logsim.internationalization import _
 from logsim.parse import Parser
+from logsim.simulator import Simulator
+from logsim.trace_file import TraceFile
+from logsim.vcd import VcdWriter
 
 
 class Gui(wx.Frame):
@@ -39,6 +42,10 @@ class Gui(wx.Frame):
 
     check_errors(self, filename, parser): Handles the error checking when a file is uploaded.
 
+    report_loops(self, parser): Reports the feedback loops of a newly uploaded network.
+
+    report_oscillation(self): Reports the devices in the loops which keep toggling.
+
     update_parser(self, parser): Updates the parser object.
 
     on_upload_button(self, event): Event handler for when user clicks the upload button to upload
@@ -56,6 +63,14 @@ class Gui(wx.Frame):
 
     continue_simulation(self): Continues the simulation and plot the monitored traces.
 
+    jump_to_cycle(self): Asks for a cycle of the run and shows every output at that cycle.
+
+    export_vcd(self): Asks for a file path and saves the monitored traces to a VCD file.
+
+    save_traces(self): Asks for a file path and saves the monitored traces to a trace file.
+
+    open_traces(self): Asks for a trace file and shows its traces of the monitors.
+
     toggle_theme(self, event): Event handler for when the user changes the color theme.
     """
 
@@ -69,6 +84,8 @@ class Gui(wx.Frame):
         self.network = parser.network
         self.monitors = parser.monitors
         self.parser = parser
+        self.simulator = Simulator(self.names, self.devices, self.network,
+                                   self.monitors)
 
         self.num_cycles = 10
         self.total_cycles = self.num_cycles
@@ -76,7 +93,7 @@ class Gui(wx.Frame):
         self.mode = "3D"
 
         # A dictionary for the signals and simulated output
-        self.signals_dictionary = dict()   # {(device_id, port_id): [signal_list]}
+        self.signals_dictionary = dict()   # {(device_id, port_id): Trace}
         self.signals_plot_dictionary = dict()  # {device_string: [signal_list]}
 
         self.menu_bar = MenuBar(self)
@@ -138,6 +155,7 @@ class Gui(wx.Frame):
             self.terminal.append_text(Color.terminal_success_color,
                                       _(u"\nFile {filename} uploaded successfully.")
                                       .format(filename=filename))
+            self.report_loops(parser)
 
             # Enable add and remove button
             self.add_monitor_button.Enable()
@@ -168,6 +186,35 @@ class Gui(wx.Frame):
 
             return False
 
+    def report_loops(self, parser: Parser) -> None:
+        """Reports the feedback loops of a newly uploaded network in the terminal."""
+        combinational_loops, sequential_loops = parser.network.get_loops()
+        for loop in combinational_loops:
+            device_names = ", ".join(parser.names.get_name_string(device_id)
+                                     for device_id in loop)
+            self.terminal.append_text(Color.terminal_warning_color,
+                                      _(u"\nWarning: combinational loop: {devices}")
+                                      .format(devices=device_names))
+        for loop in sequential_loops:
+            device_names = ", ".join(parser.names.get_name_string(device_id)
+                                     for device_id in loop)
+            self.terminal.append_text(Color.terminal_text_color,
+                                      _(u"\nLoop broken by D-types: {devices}")
+                                      .format(devices=device_names))
+
+    def report_oscillation(self) -> None:
+        """Reports the devices in the loops which keep toggling in the terminal."""
+        if self.network.oscillation_period is not None:
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nOscillation period: {period} iterations")
+                                      .format(period=self.network.oscillation_period))
+        for loop in self.network.find_oscillating_devices():
+            device_names = ", ".join(self.names.get_name_string(device_id)
+                                     for device_id in loop)
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nOscillating loop: {devices}")
+                                      .format(devices=device_names))
+
     def update_parser(self, parser: Parser) -> None:
         """Updates the parser object."""
         self.names = parser.names
@@ -175,6 +222,8 @@ class Gui(wx.Frame):
         self.network = parser.network
         self.monitors = parser.monitors
         self.parser = parser
+        self.simulator = Simulator(self.names, self.devices, self.network,
+                                   self.monitors)
 
     def disable_monitor_buttons(self) -> None:
         """Disable buttons controlling monitor."""
@@ -203,15 +252,14 @@ class Gui(wx.Frame):
 
         # Running the simulation
         self.devices.cold_startup()
-        for __ in range(self.num_cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                self.terminal.append_text(Color.terminal_error_color,
-                                          _(u"\n\nError: network oscillating!!"))
+        self.simulator.start_run()
+        if not self.simulator.run_cycles(self.num_cycles):
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\n\nError: network oscillating!!"))
+            self.report_oscillation()
 
-                self.disable_simulation_buttons()
-                return False
+            self.disable_simulation_buttons()
+            return False
 
         self.signals_dictionary = self.monitors.get_all_monitor_signal()
         self.total_cycles = self.num_cycles
@@ -222,12 +270,13 @@ class Gui(wx.Frame):
     def continue_simulation(self) -> bool:
         """Continues the simulation and plot the monitored traces."""
         # Running the simulation
-        for _ in range(self.num_cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                self.disable_simulation_buttons()
-                return False
+        if not self.simulator.run_cycles(self.num_cycles):
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\n\nError: network oscillating!!"))
+            self.report_oscillation()
+
+            self.disable_simulation_buttons()
+            return False
 
         self.signals_dictionary = self.monitors.get_all_monitor_signal()
         self.total_cycles += self.num_cycles
@@ -235,6 +284,107 @@ class Gui(wx.Frame):
         self.canvas.render("", self.signals_dictionary)
         return True
 
+    def jump_to_cycle(self) -> None:
+        """Asks for a cycle of the run and shows every output at that cycle in the terminal."""
+        if not self.simulator.keyframes:
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nError: run the simulation first."))
+            return
+        cycle = wx.GetNumberFromUser(_(u"Show every output at cycle:"), "",
+                                     _(u"Jump to cycle"), self.simulator.cycle, 0,
+                                     self.simulator.cycle, self)
+        if cycle < 0:  # cancelled
+            return
+        outputs = self.simulator.get_outputs(cycle)
+        if outputs is None:
+            return
+        self.terminal.append_text(Color.terminal_text_color,
+                                  _(u"\n\nOutputs at cycle {cycle}:").format(cycle=cycle))
+        for (device_id, port_id), signal in outputs.items():
+            signal_name = self.devices.get_signal_name(device_id, port_id)
+            self.terminal.append_text(Color.terminal_text_color,
+                                      f"\n{signal_name} = {self.network.signal_level(signal)}")
+
+    def export_vcd(self) -> None:
+        """Asks for a file path and saves the monitored traces to a VCD file."""
+        if not self.simulator.keyframes:
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nError: run the simulation first."))
+            return
+        wildcard = "VCD files (*.vcd)|*.vcd"
+        with wx.FileDialog(self, _(u"Export VCD File"), wildcard=wildcard,
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as fileDialog:
+            if fileDialog.ShowModal() == wx.ID_CANCEL:
+                return
+            path = fileDialog.GetPath()
+        try:
+            writer = VcdWriter(self.monitors, path)
+        except OSError as error:
+            self.terminal.append_text(Color.terminal_error_color, f"\nError: {error}")
+            return
+        try:
+            writer.write_traces()
+        finally:
+            writer.close()
+        self.terminal.append_text(Color.terminal_text_color,
+                                  _(u"\n\nTraces saved to {path}").format(path=path))
+
+    def save_traces(self) -> None:
+        """Asks for a file path and saves the monitored traces to a trace file."""
+        if not self.simulator.keyframes:
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nError: run the simulation first."))
+            return
+        wildcard = "Trace files (*.ltr)|*.ltr"
+        with wx.FileDialog(self, _(u"Save Trace File"), wildcard=wildcard,
+                           style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT) as fileDialog:
+            if fileDialog.ShowModal() == wx.ID_CANCEL:
+                return
+            path = fileDialog.GetPath()
+        try:
+            TraceFile.write(self.monitors, path)
+        except OSError as error:
+            self.terminal.append_text(Color.terminal_error_color, f"\nError: {error}")
+            return
+        self.terminal.append_text(Color.terminal_text_color,
+                                  _(u"\n\nTraces saved to {path}").format(path=path))
+
+    def open_traces(self) -> None:
+        """Asks for a trace file and shows its traces of the monitors.
+
+        The simulation cannot be continued from the opened traces, only run again.
+        """
+        wildcard = "Trace files (*.ltr)|*.ltr"
+        with wx.FileDialog(self, _(u"Open Trace File"), wildcard=wildcard,
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST) as fileDialog:
+            if fileDialog.ShowModal() == wx.ID_CANCEL:
+                return
+            path = fileDialog.GetPath()
+        try:
+            trace_file = TraceFile(path)
+        except (OSError, ValueError) as error:
+            self.terminal.append_text(Color.terminal_error_color, f"\nError: {error}")
+            return
+        try:
+            loaded = trace_file.load_monitors(self.monitors)
+            cycles = trace_file.cycles
+        finally:
+            trace_file.close()
+        if not loaded:
+            self.terminal.append_text(Color.terminal_error_color,
+                                      _(u"\nError: no monitor of the file is set."))
+            return
+
+        self.continue_button.Disable()
+        self.continue_button.SetBackgroundColour(Color.color_disabled)
+        self.signals_dictionary = self.monitors.get_all_monitor_signal()
+        self.total_cycles = cycles
+        self.canvas.update_cycle(self.total_cycles)
+        self.canvas.render("", self.signals_dictionary)
+        self.terminal.append_text(Color.terminal_text_color,
+                                  _(u"\n\nTraces of {identifiers} opened from {path}").format(
+                                      identifiers=", ".join(loaded), path=path))
+
     def toggle_theme(self, event) -> None:
         """Handle the event when the user presses the toggle switch menu item to switch between colour themes."""
         if self.theme == "light":
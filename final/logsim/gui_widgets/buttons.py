@@ -137,8 +137,11 @@ class MonitorAddButton(wx.Button):
                 device_id = self.gui.names.query(device_name)
                 port_id = self.gui.names.query(device_port) if device_port != "output" else None
                 if identifier and isinstance(identifier, str) and identifier[0].isalpha():
-                    error_type = self.gui.monitors.make_monitor(device_id, port_id, identifier)
+                    error_type = self.gui.monitors.make_monitor(device_id, port_id, identifier,
+                                                                self.gui.simulator.cycle)
                     if error_type == self.gui.monitors.NO_ERROR:
+                        # Fill in the cycles already run from the recorded history
+                        self.gui.simulator.backfill_monitor(device_id, port_id)
                         self.gui.monitors_list.update_monitors_list()
                     elif error_type == self.gui.monitors.MONITOR_IDENTIFIER_PRESENT:
                         wx.MessageBox(_(u"Identifier already used, please think of a new one!"),
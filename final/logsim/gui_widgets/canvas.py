@@ -234,7 +234,10 @@ class Canvas(wxcanvas.GLCanvas):
         if self.signals:
             identifier_dict = self.gui.monitors.fetch_identifier_to_device_port_name()
             no_of_monitors = len(identifier_dict.keys())
-            self.no_cycles = len(list(self.signals.values())[0])
+            # Traces with a history window only keep their last cycles, so
+            # the plot starts from the first cycle kept by any trace
+            first_cycle = self.gui.monitors.get_first_cycle()
+            self.no_cycles = len(list(self.signals.values())[0]) - first_cycle
 
             if self.mode == "2D":
                 x_start = 60
@@ -244,17 +247,22 @@ class Canvas(wxcanvas.GLCanvas):
                 y_diff = 75  # distance between different plots 
 
                 # Plot x-axis, no of cycles
-                self.render_text("0", x_start, y_start - 20)
+                self.render_text(str(first_cycle), x_start, y_start - 20)
 
                 if self.grid_on:
-                    self.plot_grid(x_start, no_of_monitors, self.no_cycles)
+                    self.plot_grid(x_start, no_of_monitors, self.no_cycles, first_cycle)
                 else:
-                    self.render_text(str(self.no_cycles), x_start + width * self.no_cycles, y_start - 20)
+                    self.render_text(str(first_cycle + self.no_cycles),
+                                     x_start + width * self.no_cycles, y_start - 20)
 
                 for index, (identifier, (device_name, port_name)) in enumerate(identifier_dict.items()):
                     device_id = self.gui.names.query(device_name)
                     port_id = self.gui.names.query(port_name) if port_name else None
                     trace = self.signals[(device_id, port_id)]
+                    # Cycles before the first cycle kept are not drawn, and
+                    # the trace is iterated without copying its signals
+                    trace_first_cycle = trace.get_first_cycle()
+                    x_start += (trace_first_cycle - first_cycle) * width
 
                     # Update y
                     y = y_start + index * y_diff
@@ -302,18 +310,23 @@ class Canvas(wxcanvas.GLCanvas):
                 height_high = 25
                 z_spacing = 75  # spacing between different signal plots in depth
 
-                self.render_text_3d("0", x_start - 15, -8, z_start + 55)
+                self.render_text_3d(str(first_cycle), x_start - 15, -8, z_start + 55)
 
                 if self.grid_on:
-                    self.plot_grid_3d(x_start, z_start, no_of_monitors, self.no_cycles)
+                    self.plot_grid_3d(x_start, z_start, no_of_monitors, self.no_cycles,
+                                      first_cycle)
                 else:
-                    self.render_text_3d(str(self.no_cycles),
+                    self.render_text_3d(str(first_cycle + self.no_cycles),
                                         x_start + width * self.no_cycles - 15, -8, z_start + 55)
 
                 for index, (identifier, (device_name, port_name)) in enumerate(identifier_dict.items()):
                     device_id = self.gui.names.query(device_name)
                     port_id = self.gui.names.query(port_name) if port_name else None
                     trace = self.signals[(device_id, port_id)]
+                    # Cycles before the first cycle kept are not drawn, and
+                    # the trace is iterated without copying its signals
+                    trace_first_cycle = trace.get_first_cycle()
+                    x_start += (trace_first_cycle - first_cycle) * width
 
                     # Initialize z position for the current trace
                     z_pos = z_start - index * z_spacing
@@ -343,13 +356,16 @@ class Canvas(wxcanvas.GLCanvas):
                         # Move x position for the next cycle
                         x += width
 
+                    x_start = 60
+
         # We have been drawing to the back buffer, flush the graphics pipeline
         # and swap the back buffer to the front
         GL.glFlush()
         self.SwapBuffers()
 
-    def plot_grid(self, x_start: int, no_of_monitors: int, cycles: int) -> None:
-        """Adds grid lines to the plot in 2D."""
+    def plot_grid(self, x_start: int, no_of_monitors: int, cycles: int,
+                  first_cycle: int = 0) -> None:
+        """Adds grid lines to the plot in 2D, numbered from first_cycle."""
         width = 30
         x = x_start + width
         y_start = 40
@@ -357,8 +373,8 @@ class Canvas(wxcanvas.GLCanvas):
 
         for i in range(1, cycles + 1):
             # Thicker grid lines for multiples of 5 and annotate
-            if i % 5 == 0:
-                self.render_text(str(i), x, 30)
+            if (first_cycle + i) % 5 == 0:
+                self.render_text(str(first_cycle + i), x, 30)
 
                 GL.glColor3f(*self.color_grid_adaptive)
                 GL.glLineWidth(self.width_grid_adaptive)
@@ -400,8 +416,9 @@ class Canvas(wxcanvas.GLCanvas):
         GL.glMaterialfv(GL.GL_FRONT_AND_BACK, GL.GL_SPECULAR, specular)
         GL.glMaterialf(GL.GL_FRONT_AND_BACK, GL.GL_SHININESS, shininess)
 
-    def plot_grid_3d(self, x_start: int, z_start: int, no_of_monitors: int, cycles: int) -> None:
-        """Adds grid planes to the plot in 3D."""
+    def plot_grid_3d(self, x_start: int, z_start: int, no_of_monitors: int, cycles: int,
+                     first_cycle: int = 0) -> None:
+        """Adds grid planes to the plot in 3D, numbered from first_cycle."""
         self.setup_3d_grid_material()
 
         width = 30
@@ -415,12 +432,12 @@ class Canvas(wxcanvas.GLCanvas):
         z_end = z_start - z_depth - z_offset * 2
 
         for i in range(1, cycles + 1):
-            if i % 5 == 0:
+            if (first_cycle + i) % 5 == 0:
                 if self.theme == "light":
                     color = (*self.color_grid_adaptive, 0.5)
                 elif self.theme == "dark":
                     color = (0.7, 0.7, 0.2, 0.8)
-                self.render_text_3d(str(i), x, -8, z_start + 25)
+                self.render_text_3d(str(first_cycle + i), x, -8, z_start + 25)
             else:
                 if self.theme == "light":
                     color = (*self.color_grid, 0.2)
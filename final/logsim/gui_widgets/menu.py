@@ -41,18 +41,35 @@ class FileMenu(wx.Menu):
         super().__init__()
         file_icon = wx.ArtProvider.GetBitmap(wx.ART_FILE_OPEN, wx.ART_MENU, (16, 16))
         theme_icon = wx.ArtProvider.GetBitmap(wx.ART_TIP, wx.ART_MENU, (16, 16))
+        jump_icon = wx.ArtProvider.GetBitmap(wx.ART_GO_FORWARD, wx.ART_MENU, (16, 16))
+        export_icon = wx.ArtProvider.GetBitmap(wx.ART_FILE_SAVE_AS, wx.ART_MENU, (16, 16))
+        save_icon = wx.ArtProvider.GetBitmap(wx.ART_FILE_SAVE, wx.ART_MENU, (16, 16))
+        open_icon = wx.ArtProvider.GetBitmap(wx.ART_FOLDER_OPEN, wx.ART_MENU, (16, 16))
         about_icon = wx.ArtProvider.GetBitmap(wx.ART_INFORMATION, wx.ART_MENU, (16, 16))
         exit_icon = wx.ArtProvider.GetBitmap(wx.ART_QUIT, wx.ART_MENU, (16, 16))
         file_item = wx.MenuItem(self, wx.ID_FILE, _(u"Open file"))
+        jump_item = wx.MenuItem(self, wx.ID_JUMP_TO, _(u"Jump to cycle"))
+        export_item = wx.MenuItem(self, wx.ID_SAVEAS, _(u"Export VCD file"))
+        save_item = wx.MenuItem(self, wx.ID_SAVE, _(u"Save trace file"))
+        open_item = wx.MenuItem(self, wx.ID_OPEN, _(u"Open trace file"))
         toggle_theme_item = wx.MenuItem(self, wx.ID_PAGE_SETUP, _(u"Toggle theme"))
         about_item = wx.MenuItem(self, wx.ID_ABOUT, _(u"About"))
         exit_item = wx.MenuItem(self, wx.ID_EXIT, _(u"Exit"))
         file_item.SetBitmap(file_icon)
+        jump_item.SetBitmap(jump_icon)
+        export_item.SetBitmap(export_icon)
+        save_item.SetBitmap(save_icon)
+        open_item.SetBitmap(open_icon)
         toggle_theme_item.SetBitmap(theme_icon)
         about_item.SetBitmap(about_icon)
         exit_item.SetBitmap(exit_icon)
         self.Append(file_item)
         self.AppendSeparator()
+        self.Append(jump_item)
+        self.Append(export_item)
+        self.Append(save_item)
+        self.Append(open_item)
+        self.AppendSeparator()
         self.Append(toggle_theme_item)
         self.AppendSeparator()
         self.Append(about_item)
@@ -123,6 +140,14 @@ class MenuBar(wx.MenuBar):
             self.on_upload(wx.EVT_BUTTON)
         if Id == wx.ID_PAGE_SETUP:
             self.gui.toggle_theme(wx.EVT_BUTTON)
+        if Id == wx.ID_JUMP_TO:
+            self.gui.jump_to_cycle()
+        if Id == wx.ID_SAVEAS:
+            self.gui.export_vcd()
+        if Id == wx.ID_SAVE:
+            self.gui.save_traces()
+        if Id == wx.ID_OPEN:
+            self.gui.open_traces()
         if Id == wx.ID_HELP:
             wx.MessageBox(_(u"Controls\n"
                             "\nUpload: Choose the specification file.\n"
@@ -132,7 +157,11 @@ class MenuBar(wx.MenuBar):
                             "\nRemove: Delete monitor points.\n"
                             "\nSwitch: Toggle the button to turn the switch on and off.\n"
                             "\nRun: Runs the simulation.\n"
-                            "\nContinue: Continues the simulation with updated paramaters."),
+                            "\nContinue: Continues the simulation with updated paramaters.\n"
+                            "\nJump to cycle: Shows every output at a past cycle of the run.\n"
+                            "\nExport VCD file: Saves the monitored traces for waveform viewers.\n"
+                            "\nSave trace file: Saves the monitored traces in a compact binary file.\n"
+                            "\nOpen trace file: Shows the traces of a trace file for the monitors set."),
                           _(u"Controls"), wx.ICON_INFORMATION | wx.OK)
             
     def on_upload(self, event) -> None:
@@ -172,6 +201,17 @@ class MenuBar(wx.MenuBar):
                 network = Network(names, devices)
                 monitors = Monitors(names, devices, network)
 
+                # Keep simulating with the engine, trace store, history
+                # window, spill directory and netlist cache chosen on the
+                # command line
+                engine = self.gui.network.engine
+                if engine is not None:
+                    network.set_engine(type(engine)(names, devices, network))
+                monitors.set_trace_class(self.gui.monitors.trace_class)
+                monitors.set_history_window(self.gui.monitors.history_window)
+                monitors.set_spill(self.gui.monitors.spill_directory,
+                                   self.gui.monitors.spill_budget)
+
                 try:
                     scanner = Scanner(path, names)
                 except UnicodeDecodeError:
@@ -181,7 +221,8 @@ class MenuBar(wx.MenuBar):
                     self.gui.disable_monitor_buttons()
                     self.gui.disable_simulation_buttons()
                     return
-                parser = Parser(names, devices, network, monitors, scanner)
+                parser = Parser(names, devices, network, monitors, scanner,
+                                self.gui.parser.cache)
 
                 # Progress bar mock progress
                 for i in range(100):
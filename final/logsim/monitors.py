@@ -9,11 +9,14 @@ Monitors - records and displays specified output signals.
 
 """
 import collections
+import os
+from array import array
 
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Tuple, Union
 from logsim.names import Names
 from logsim.devices import Devices
 from logsim.network import Network
+from logsim.traces import Trace, ArrayTrace, RingTrace, MappedTrace
 
 
 class Monitors:
@@ -23,6 +26,30 @@ class Monitors:
     This class contains functions for recording and displaying the signal state
     of outputs specified by their device and port IDs.
 
+    Each trace is stored in a trace store from the traces module, of the
+    class trace_class: by default an ArrayTrace, one byte per cycle, or a
+    ChangeTrace, which only stores the cycles at which the signal changes.
+    Readers access the traces through the interface of traces.Trace.
+
+    Each monitored port is resolved once to the outputs dictionary of the
+    output driving it, so recording a cycle gathers the signals of all the
+    monitors into one row of a cycles x monitors buffer. The buffer is
+    flushed to the traces, one column per trace, every record_limit cycles
+    and whenever signals_dictionary is read. The flushed signals, and the
+    repeated periods, are also passed to the writers, which stream them out.
+
+    A history window can be set for all the monitors, or for the monitor of
+    a port. Those traces are then RingTraces, which only keep the signals of
+    the most recent cycles, so memory stays constant however long the
+    simulation runs. Cycles keep their absolute numbers, and traces are
+    aligned on them when displayed.
+
+    If a spill directory is set, the traces are moved to MappedTraces, one
+    memory-mapped file per monitored port in the directory, once they use
+    more than the spill budget of memory. Traces with a history window are
+    bounded, and stay in memory. The files can be loaded again to read or
+    continue the traces after the program has stopped.
+
     Parameters
     ----------
     names: instance of the names.Names() class.
@@ -43,8 +70,44 @@ class Monitors:
     get_monitor_signal(self, device_id, port_id): Returns the signal level of
                                                     the specified monitor.
 
+    set_trace_class(self, trace_class): Stores the traces of all monitors in
+                                        the specified trace store.
+
+    set_history_window(self, window, device_id=None, port_id=None): Keeps only
+                                  the signals of the last window cycles, for
+                                  all monitors or for the specified port.
+
+    get_history_window(self): Returns the most cycles kept by any trace.
+
+    make_trace(self, port, signals=(), start=0): Returns a new trace for the
+                                                 port.
+
+    set_spill(self, directory, budget): Moves the traces to files in the
+                                        directory once they use more than
+                                        budget bytes of memory.
+
+    get_trace_path(self, port): Returns the path of the file of the port's
+                                trace.
+
+    get_memory(self): Returns the bytes of memory used by all the traces.
+
+    spill_traces(self): Moves the traces to memory-mapped files.
+
+    load_traces(self, directory): Loads the traces of the monitored ports
+                                  from the files in the directory.
+
+    resolve_ports(self): Finds the output driving each monitored port.
+
     record_signals(self): Records the current signal level of all monitors.
 
+    flush_signals(self): Appends the buffered signals to the traces.
+
+    repeat_signals(self, period, repeats): Appends the last period signals of
+                                           every monitor repeats times.
+
+    truncate_signals(self, cycle): Discards the signals recorded after the
+                                   specified cycle.
+
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
 
@@ -52,6 +115,12 @@ class Monitors:
 
     get_margin(self): Returns the length of the longest monitor's name.
 
+    get_first_cycle(self): Returns the first cycle kept by any trace.
+
+    get_trace_signals(self, port, start, stop): Returns the signals of the
+                                  port's trace between two cycles, BLANK where
+                                  the trace does not keep them.
+
     display_signals(self): Displays signal trace(s) in the text console.
     """
 
@@ -61,9 +130,10 @@ class Monitors:
         self.network = network
         self.devices = devices
 
-        # signals_dictionary stores
-        # {(device_id, port_id): [signal_list]}
-        self.signals_dictionary = dict()
+        # trace_dictionary stores
+        # {(device_id, port_id): Trace}, without the buffered signals: read
+        # the traces through signals_dictionary
+        self.trace_dictionary = dict()
 
         # identifier_to_port stores
         # {(device_id, port_id): {identifier}}
@@ -73,6 +143,39 @@ class Monitors:
         # {identifier: (device_id, port_id)}
         self.identifier_to_port = collections.OrderedDict()
 
+        # Trace store for new traces, see set_trace_class()
+        self.trace_class = ArrayTrace
+
+        # Cycles kept by every trace, or by the trace of a port, see
+        # set_history_window(). None keeps every cycle.
+        self.history_window = None
+        self.port_windows = {}  # {(device_id, port_id): window}
+
+        # Traces are moved to files in spill_directory once they use more
+        # than spill_budget bytes, see set_spill()
+        self.spill_directory = None
+        self.spill_budget = None
+        self.spilled = False
+
+        # record_buffer stores one row per recorded cycle, of the signals of
+        # record_ports, until they are flushed to the traces. Each signal is
+        # read from the outputs dictionary of the output driving the port.
+        self.record_buffer = bytearray()
+        self.record_ports = []
+        self.record_outputs = []  # outputs dictionary of each port's driver
+        self.record_output_ids = []  # output ID of each port's driver
+        self.record_version = None  # versions of the network when resolved
+        self.record_limit = 1024  # cycles buffered before flushing
+
+        # writers stream the recorded signals as they are flushed, and are
+        # restarted when the monitors are reset, such as vcd.VcdWriter objects
+        self.writers = []
+
+        # display_table translates each signal to its character in a trace
+        self.display_table = bytes.maketrans(
+            bytes([self.devices.HIGH, self.devices.LOW, self.devices.RISING,
+                   self.devices.FALLING, self.devices.BLANK]), b"-_/\\ ")
+
         [self.NO_ERROR, self.MONITOR_IDENTIFIER_PRESENT, self.MONITOR_DEVICE_ABSENT, self.MONITOR_PORT_ABSENT] = (
             self.names.unique_error_codes(4))
 
@@ -91,12 +194,12 @@ class Monitors:
             return self.MONITOR_IDENTIFIER_PRESENT
         else:
             # If n simulation cycles have been completed before making this
-            # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
+            # monitor, then initialise the signal trace with n BLANK signals.
+            # Otherwise, initialise the trace as empty.
             if (device_id, port_id) not in self.signals_dictionary:
-                self.signals_dictionary[(device_id, port_id)] = [
-                    self.devices.BLANK] * cycles_completed
+                self.signals_dictionary[(device_id, port_id)] = self.make_trace(
+                    (device_id, port_id), start=cycles_completed)
+                self.record_version = None
 
             self.port_to_identifier[(device_id, port_id)].add(identifier)
             self.identifier_to_port[identifier] = (device_id, port_id)
@@ -113,6 +216,7 @@ class Monitors:
         else:
             del self.signals_dictionary[(device_id, port_id)]
             del self.port_to_identifier[(device_id, port_id)]
+            self.record_version = None
             for identifier, port in self.identifier_to_port.copy().items():
                 if port == (device_id, port_id):
                     del self.identifier_to_port[identifier]
@@ -133,6 +237,7 @@ class Monitors:
                     if len(identifier_set) == 1:  # only one identifier associated to the port
                         del self.signals_dictionary[port]
                         del self.port_to_identifier[port]
+                        self.record_version = None
                     else:
                         self.port_to_identifier[port].remove(identifier)
             return True
@@ -151,15 +256,224 @@ class Monitors:
         else:
             return None
 
+    def set_trace_class(self, trace_class: type) -> None:
+        """Store the traces of all monitors in the specified trace store.
+
+        trace_class is a subclass of traces.Trace. Existing traces are copied
+        to the new store.
+        """
+        self.trace_class = trace_class
+        for port, trace in self.signals_dictionary.items():
+            self.signals_dictionary[port] = self.make_trace(
+                port, trace.get_signals(), trace.get_first_cycle())
+
+    def set_history_window(self, window: Optional[int],
+                           device_id: Optional[int] = None,
+                           port_id: Optional[int] = None) -> None:
+        """Keep only the signals of the last window cycles.
+
+        If device_id is None, the window applies to every monitor without a
+        window of its own. Otherwise it applies to the monitor of the
+        specified port, made now or later. A window of None keeps every cycle.
+        Existing traces are copied to the new store.
+        """
+        if device_id is None:
+            self.history_window = window
+            ports = list(self.signals_dictionary)
+        else:
+            self.port_windows[(device_id, port_id)] = window
+            ports = [port for port in self.signals_dictionary
+                     if port == (device_id, port_id)]
+        for port in ports:
+            trace = self.signals_dictionary[port]
+            self.signals_dictionary[port] = self.make_trace(
+                port, trace.get_signals(), trace.get_first_cycle())
+
+    def get_history_window(self) -> Optional[int]:
+        """Return the most cycles kept by any trace, or None for every cycle."""
+        windows = [self.history_window, *self.port_windows.values()]
+        if None in windows:
+            return None
+        return max(windows)
+
+    def make_trace(self, port: Tuple[int, Optional[int]],
+                   signals: Iterable[int] = (), start: int = 0) -> Trace:
+        """Return a new trace for the port, holding signals from the start cycle.
+
+        The trace is a RingTrace if the port has a history window, or else of
+        the class trace_class, with BLANK signals before the start cycle.
+        """
+        window = self.port_windows.get(port, self.history_window)
+        if window is not None:
+            return RingTrace(signals, window, start)
+        signals = array("b", [self.devices.BLANK]) * start + array("b", signals)
+        if self.spilled:
+            previous = self.signals_dictionary.get(port)
+            if isinstance(previous, MappedTrace):
+                previous.close()  # before its file is overwritten
+            return MappedTrace(self.get_trace_path(port), signals)
+        return self.trace_class(signals)
+
+    def set_spill(self, directory: Optional[str], budget: int = 2 ** 28) -> None:
+        """Move the traces to files in the directory once they use more than
+        budget bytes of memory.
+
+        The directory is created if it does not exist. A directory of None
+        keeps the traces in memory.
+        """
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.spill_directory = directory
+        self.spill_budget = budget
+        self.check_spill()
+
+    def get_trace_path(self, port: Tuple[int, Optional[int]]) -> str:
+        """Return the path of the file of the port's trace in the spill directory."""
+        device_id, port_id = port
+        name = self.names.get_name_string(device_id)
+        if port_id is not None:
+            name += "." + self.names.get_name_string(port_id)
+        return os.path.join(self.spill_directory, name + ".trace")
+
+    def get_memory(self) -> int:
+        """Return the number of bytes of memory used by all the traces."""
+        return sum(trace.get_size() for trace in self.signals_dictionary.values())
+
+    def check_spill(self, extra: int = 0) -> None:
+        """Spill the traces if they would use more memory than the spill
+        budget, with extra more bytes.
+        """
+        if (self.spill_directory is not None and not self.spilled
+                and self.get_memory() + extra > self.spill_budget):
+            self.spill_traces()
+
+    def spill_traces(self) -> None:
+        """Move the traces without a history window to memory-mapped files.
+
+        Traces made from now on are also stored in files.
+        """
+        self.spilled = True
+        for port, trace in self.signals_dictionary.items():
+            if isinstance(trace, (RingTrace, MappedTrace)):
+                continue
+            mapped_trace = MappedTrace(self.get_trace_path(port))
+            for start in range(0, len(trace), MappedTrace.BLOCK_SIZE):
+                mapped_trace.extend(trace.get_signals(
+                    start, start + MappedTrace.BLOCK_SIZE))
+            self.signals_dictionary[port] = mapped_trace
+
+    def load_traces(self, directory: str) -> bool:
+        """Load the traces of the monitored ports from the files in the directory.
+
+        The directory becomes the spill directory, so the traces can be
+        read or continued. Return True if every monitored port had a trace
+        file, in which case they are all loaded.
+        """
+        spill_directory = self.spill_directory
+        self.spill_directory = directory
+        paths = {port: self.get_trace_path(port) for port in self.signals_dictionary}
+        if not all(os.path.isfile(path) for path in paths.values()):
+            self.spill_directory = spill_directory
+            return False
+        try:
+            traces = {port: MappedTrace.load(path) for port, path in paths.items()}
+        except ValueError:
+            self.spill_directory = spill_directory
+            return False
+        self.signals_dictionary.update(traces)
+        self.spilled = True
+        return True
+
+    @property
+    def signals_dictionary(self) -> dict:
+        """Return {(device_id, port_id): Trace}, with every recorded signal."""
+        if self.record_buffer:
+            self.flush_signals()
+        return self.trace_dictionary
+
+    def resolve_ports(self) -> None:
+        """Find the output driving each monitored port, and its outputs dictionary.
+
+        Unconnected inputs read a BLANK signal.
+        """
+        self.flush_signals()
+        self.record_ports = list(self.trace_dictionary)
+        self.record_outputs = []
+        self.record_output_ids = []
+        for device_id, port_id in self.record_ports:
+            device = self.devices.get_device(device_id)
+            if device is not None and port_id not in device.outputs:
+                connected_output = self.network.get_connected_output(device_id, port_id)
+                if connected_output is None:
+                    device = None
+                else:
+                    device_id, port_id = connected_output
+                    device = self.devices.get_device(device_id)
+            if device is None or port_id not in device.outputs:
+                self.record_outputs.append({None: self.devices.BLANK})
+                self.record_output_ids.append(None)
+            else:
+                self.record_outputs.append(device.outputs)
+                self.record_output_ids.append(port_id)
+        self.record_version = (self.devices.structure_version,
+                               self.network.structure_version)
+
     def record_signals(self) -> None:
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. The signals of all
+        the monitors are gathered into one row of the record buffer, which is
+        flushed to the traces every record_limit cycles, or when they are
+        read.
         """
-        for device_id, port_id in self.signals_dictionary:
-            signal_level = self.get_monitor_signal(device_id, port_id)
-            self.signals_dictionary[(device_id,
-                                     port_id)].append(signal_level)
+        if self.record_version != (self.devices.structure_version,
+                                   self.network.structure_version):
+            self.resolve_ports()
+        self.record_buffer += bytes(map(dict.__getitem__, self.record_outputs,
+                                        self.record_output_ids))
+        if len(self.record_buffer) >= self.record_limit * len(self.record_ports):
+            self.flush_signals()
+
+    def flush_signals(self) -> None:
+        """Append the buffered signals to the traces, one column per trace."""
+        record_buffer = self.record_buffer
+        self.record_buffer = bytearray()
+        row_size = len(self.record_ports)
+        if not record_buffer or not row_size:
+            return
+        for position, port in enumerate(self.record_ports):
+            self.trace_dictionary[port].extend(array("b", record_buffer[position::row_size]))
+        for writer in self.writers:
+            writer.write_rows(self.record_ports, bytes(record_buffer))
+        if self.spill_directory is not None:
+            self.check_spill()
+
+    def repeat_signals(self, period: int, repeats: int) -> None:
+        """Append the last period signals of every monitor, repeats times.
+
+        This is used to fill in the cycles of a periodic simulation without
+        simulating them.
+        """
+        if self.spill_directory is not None:  # spill before, not after
+            self.check_spill(period * repeats * len(self.signals_dictionary))
+        if self.writers:
+            ports = list(self.signals_dictionary)
+            rows = bytearray(period * len(ports))
+            for position, port in enumerate(ports):
+                trace = self.trace_dictionary[port]
+                rows[position::len(ports)] = trace.get_signals(len(trace) - period).tobytes()
+            for writer in self.writers:
+                writer.repeat_rows(ports, bytes(rows), repeats)
+        for trace in self.signals_dictionary.values():
+            trace.repeat(period, repeats)
+
+    def truncate_signals(self, cycle: int) -> None:
+        """Discard the signals recorded after the specified cycle.
+
+        This is used to go back to a snapshot taken at that cycle.
+        """
+        for trace in self.signals_dictionary.values():
+            trace.truncate(cycle)
 
     def get_signal_names(self) -> List[List[Optional[str]]]:
         """Return two signal name lists: monitored and not monitored."""
@@ -182,10 +496,13 @@ class Monitors:
     def reset_monitors(self) -> None:
         """Clear the memory of all the monitors.
 
-        The list of stored signal levels for each monitor is deleted.
+        The list of stored signal levels for each monitor is deleted, and the
+        writers are restarted, so that they only stream the new run.
         """
         for device_id, port_id in self.signals_dictionary:
-            self.signals_dictionary[(device_id, port_id)] = []
+            self.signals_dictionary[(device_id, port_id)] = self.make_trace((device_id, port_id))
+        for writer in self.writers:
+            writer.restart()
 
     def get_margin(self) -> Optional[int]:
         """Return the length of the longest monitor's name.
@@ -205,26 +522,46 @@ class Monitors:
         else:
             return None
 
+    def get_first_cycle(self) -> int:
+        """Return the first cycle kept by any trace.
+
+        This is 0 unless every trace has a history window.
+        """
+        return min((trace.get_first_cycle()
+                    for trace in self.signals_dictionary.values()), default=0)
+
+    def get_trace_signals(self, port: Tuple[int, Optional[int]],
+                          start: int, stop: int) -> array:
+        """Return the signals of the port's trace from the start to the stop cycle.
+
+        Cycles before the first cycle kept by the trace, or after its last
+        cycle, are BLANK, so the traces of all monitors line up.
+        """
+        trace = self.signals_dictionary[port]
+        blank = array("b", [self.devices.BLANK])
+        signals = blank * max(min(trace.get_first_cycle(), stop) - start, 0)
+        signals.frombytes(trace.get_signals(start, stop))
+        signals += blank * (stop - start - len(signals))
+        return signals
+
     def display_signals(self) -> None:
-        """Display the signal trace(s) in the text console."""
+        """Display the signal trace(s) in the text console.
+
+        If the first cycles have been discarded, the traces start from the
+        first cycle kept, which is displayed first.
+        """
         margin = self.get_margin()
+        first_cycle = self.get_first_cycle()
+        if first_cycle:
+            print(f"From cycle {first_cycle}:")
 
         for identifier, (device_id, port_id) in self.identifier_to_port.items():
             name_length = len(identifier)
-            signal_list = self.signals_dictionary[(device_id, port_id)]
             print(identifier + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            trace = self.signals_dictionary[(device_id, port_id)]
+            # Align the trace on the cycles of the others
+            print(" " * (trace.get_first_cycle() - first_cycle), end="")
+            print(trace.get_signals().tobytes().translate(self.display_table).decode())
 
     def fetch_identifier_to_device_port_name(self) -> dict:
         """Fetch device name and port name from a given identifier."""
@@ -237,7 +574,10 @@ class Monitors:
         return identifier_to_device_port_name
 
     def get_all_monitor_signal(self) -> dict:
-        """Fetch all the signal levels from all monitors."""
+        """Fetch all the signal levels from all monitors.
+
+        Return {(device_id, port_id): Trace}.
+        """
         return self.signals_dictionary
 
     def get_identifier(self, device_id: int, port_id: Union[int, None]) -> set:
@@ -0,0 +1,202 @@
+"""Cache the networks built from definition files.
+
+Used in the Logic Simulator project to load the network of a definition file
+which has not changed since it was last built, without scanning and parsing
+the file again.
+
+Classes
+-------
+NetlistCache - stores and loads the networks built from definition files.
+"""
+import gc
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+
+
+class NetlistCache:
+
+    """Store and load the networks built from definition files.
+
+    When a definition file is parsed without errors, the names, the devices
+    with their connections, and the monitors are stored in one file of the
+    cache directory. The file is named after the key of the definition file,
+    which is a hash of its text, of the logsim source files, and of the names
+    looked up before parsing. Loading an unchanged file restores the stored
+    network in place of parsing it again, and a changed file, or a changed
+    logsim, has another key.
+
+    Only the fields needed to build the network again are stored, as JSON,
+    so a cache file holds nothing but data: the name strings in ID order,
+    the rows of Devices.export_devices(), which hold the devices with their
+    connections, and the monitors. Loading adds the devices in one pass with
+    Devices.import_devices(), and makes the monitors again, so that their
+    traces follow the trace store and history window of the monitors. The
+    garbage collector is paused while loading, as it would otherwise scan
+    the new objects many times over.
+
+    Once the cache files take more than max_size bytes, the least recently
+    used are removed. Caching is off unless LOGSIM_CACHE names the cache
+    directory, see get_default_directory().
+
+    Parameters
+    ----------
+    directory: path of the cache directory, which is made when first needed.
+    max_size: most bytes of cache files kept (optional).
+
+    Public methods
+    --------------
+    get_default_directory(): Returns the cache directory set by the
+                             environment, or None if caching is off.
+
+    get_version(): Returns the hash of the logsim source files.
+
+    get_key(self, text, names): Returns the key of a definition file's text.
+
+    load(self, key, names, devices, network, monitors): Loads the stored
+                       network of the key, and returns True if there is one.
+
+    save(self, key, names, devices, network, monitors): Stores the network
+                       under the key.
+
+    evict(self): Removes the least recently used cache files beyond max_size.
+    """
+
+    version = None  # hash of the logsim source files, found when first needed
+
+    def __init__(self, directory: str, max_size: int = 2 ** 28):
+        """Initialise the cache directory and its size."""
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def get_default_directory() -> Optional[str]:
+        """Return the cache directory set by the environment.
+
+        Caching is opt-in: LOGSIM_CACHE is the cache directory, and caching
+        is off if it is unset or empty.
+        """
+        return os.environ.get("LOGSIM_CACHE") or None
+
+    @classmethod
+    def get_version(cls) -> str:
+        """Return the hash of the logsim source files.
+
+        logsim has no version number, so the networks built by different
+        source files are told apart by the hash of the files.
+        """
+        if cls.version is None:
+            package = os.path.dirname(os.path.abspath(__file__))
+            digest = hashlib.sha256()
+            for directory, subdirectories, files in os.walk(package):
+                subdirectories.sort()
+                for file_name in sorted(files):
+                    if file_name.endswith(".py"):
+                        with open(os.path.join(directory, file_name), "rb") as file:
+                            digest.update(file_name.encode())
+                            digest.update(file.read())
+            cls.version = digest.hexdigest()
+        return cls.version
+
+    def get_key(self, text: str, names: Names) -> str:
+        """Return the key of the text of a definition file.
+
+        The names looked up before parsing, such as the error codes, are
+        counted in the key, as the stored name IDs depend on them.
+        """
+        digest = hashlib.sha256(self.get_version().encode())
+        digest.update(f"{names.id_count},{names.error_code_count}\n".encode())
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        """Return the path of the cache file of the key."""
+        return os.path.join(self.directory, key + ".json")
+
+    def load(self, key: str, names: Names, devices: Devices, network: Network,
+             monitors: Monitors) -> bool:
+        """Load the stored network of the key.
+
+        The network is only loaded into empty devices and monitors. Return
+        True if it is loaded, or False if there is no stored network, or it
+        cannot be read.
+        """
+        if devices.devices_list or monitors.identifier_to_port:
+            return False
+        path = self.get_path(key)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            try:
+                with open(path, "rb") as file:
+                    name_strings, device_rows, monitor_list = json.load(file)
+                if name_strings[:names.id_count] != [
+                        names.id_to_name[name_id] for name_id in range(names.id_count)]:
+                    return False
+                os.utime(path)  # record the use, for evict()
+            except (OSError, KeyError, TypeError, ValueError):
+                return False
+
+            names.lookup(name_strings)
+            devices.import_devices(device_rows)
+            network.structure_version += 1
+            for device_id, port_id, identifier in monitor_list:
+                monitors.make_monitor(device_id, port_id, identifier)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return True
+
+    def save(self, key: str, names: Names, devices: Devices, network: Network,
+             monitors: Monitors) -> None:
+        """Store the network under the key.
+
+        The cache file is written to a temporary file which then replaces
+        it, so that a file being read is never partly written. The network
+        is not stored if the file cannot be written.
+        """
+        name_strings = [names.id_to_name[name_id] for name_id in range(names.id_count)]
+        monitor_list = [(device_id, port_id, identifier) for identifier,
+                        (device_id, port_id) in monitors.identifier_to_port.items()]
+        temporary_path = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", dir=self.directory, suffix=".tmp",
+                                             delete=False) as file:
+                temporary_path = file.name
+                json.dump([name_strings, devices.export_devices(), monitor_list],
+                          file, separators=(",", ":"))
+            os.replace(temporary_path, self.get_path(key))
+        except (OSError, TypeError, ValueError):
+            if temporary_path is not None and os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used cache files beyond max_size bytes.
+
+        Loading a file updates its modification time, which orders the uses.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.name.endswith(".json")]
+            files = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                            for entry in entries), reverse=True)
+        except OSError:
+            return
+        size = 0
+        for _, file_size, path in files:
+            size += file_size
+            if size > self.max_size:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -6,7 +6,7 @@ Classes
 --------
 Network - builds and executes the network.
 """
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from logsim.devices import Devices
 from logsim.names import Names
@@ -47,11 +47,35 @@ class Network:
     invert_signal(self, signal): Returns the inverse of the signal if the
                                  signal is HIGH or LOW.
 
+    signal_level(self, signal): Returns the level (HIGH or LOW) that the
+                                signal is at or moving to.
+
+    levelize(self): Groups the logic gates that are not in or after a
+                    feedback loop by logic level.
+
+    get_gate_levels(self): Returns the levelized gates, levelizing the
+                           network again if it has changed.
+
+    find_strongly_connected_components(self, device_ids, consumers): Returns
+                        the strongly connected components of a device graph.
+
+    find_loops(self): Returns the combinational and sequential feedback loops
+                      in the network.
+
+    get_loops(self): Returns the feedback loops, finding them again if the
+                     network has changed.
+
+    find_oscillating_devices(self): Returns the devices in feedback loops
+                                    which keep toggling.
+
     execute_switch(self, device_id): Simulates a switch press.
 
     execute_gate(self, device_id, x=None, y=None): Simulates a logic gate and
                                               updates its output signal value.
 
+    execute_gate_by_kind(self, device_id): Simulates a logic gate using the
+                                           (x, y) rule of its kind.
+
     execute_d_type(self, device_id): Simulates a D-type device and updates its
                                      output signal value.
 
@@ -59,7 +83,18 @@ class Network:
                                     signal value.
 
     update_clocks(self): If it is time to do so, sets clock signals to RISING
-                         or FALLING.
+                         or FALLING, and returns the clocks changed.
+
+    update_rc(self): If it is time to do so, sets RC signals to FALLING, and
+                     returns the RCs changed.
+
+    execute_iteration(self): Executes every device in the network once.
+
+    get_state(self): Returns all the outputs and D-type memories in the
+                     network.
+
+    set_engine(self, engine): Sets an alternative engine to execute the
+                              network with, or None for the default.
 
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
@@ -75,6 +110,42 @@ class Network:
             self.names.unique_error_codes(6))
         self.steady_state = True  # for checking if signals have settled
 
+        # Number of iterations to wait for the signals to settle before
+        # declaring the network unstable. Oscillations are detected as soon
+        # as a state repeats, so this only bounds networks which take very
+        # long to settle.
+        self.iteration_limit = 1000
+
+        # Number of iterations after which the state repeated in the last
+        # cycle that failed to settle, or None
+        self.oscillation_period = None
+
+        # structure_version changes whenever a connection is made, so that
+        # compiled forms of the network can detect when they are out of date
+        self.structure_version = 0
+
+        # Alternative engine which execute_network() delegates to, if any
+        self.engine = None
+
+        # gate_rules stores {gate_kind: (x, y)}, see execute_gate()
+        self.gate_rules = {self.devices.AND: (self.devices.HIGH, self.devices.HIGH),
+                           self.devices.OR: (self.devices.LOW, self.devices.LOW),
+                           self.devices.NAND: (self.devices.HIGH, self.devices.LOW),
+                           self.devices.NOR: (self.devices.LOW, self.devices.HIGH),
+                           self.devices.XOR: (None, None)}
+
+        # Levelized gates, see levelize(), and the versions they were
+        # computed from
+        self.gate_levels = []
+        self.feedback_gates = []
+        self.levelized_version = None
+
+        # Feedback loops, see find_loops(), and the versions they were
+        # computed from
+        self.combinational_loops = []
+        self.sequential_loops = []
+        self.loops_version = None
+
     def get_connected_output(self, device_id: int, input_id: int) -> Optional[Tuple[int, Optional[int]]]:
         """Return the output connected to the given input.
 
@@ -130,7 +201,9 @@ class Network:
                     # Input is already in a connection
                     error_type = self.INPUT_CONNECTED
                 else:
-                    input_device.inputs[input_port_id] = (output_device_id, output_port_id)
+                    self.devices.set_input(input_device_id, input_port_id,
+                                           (output_device_id, output_port_id))
+                    self.structure_version += 1
                     error_type = self.NO_ERROR
             else:
                 error_type = self.INPUT_PORT_ABSENT
@@ -183,6 +256,211 @@ class Network:
         else:
             return None
 
+    def signal_level(self, signal: int) -> Optional[int]:
+        """Return the level (HIGH or LOW) that the signal is at or moving to.
+
+        Return None if the signal is not HIGH, LOW, RISING or FALLING.
+        """
+        if signal in [self.devices.HIGH, self.devices.RISING]:
+            return self.devices.HIGH
+        elif signal in [self.devices.LOW, self.devices.FALLING]:
+            return self.devices.LOW
+        else:
+            return None
+
+    def levelize(self) -> Tuple[List[List[int]], List[int]]:
+        """Group the logic gates that are not in or after a feedback loop by level.
+
+        Return (gate_levels, feedback_gates). Gates in gate_levels[n] only
+        read switches, clocks, D-types, RCs and gates in lower levels, so
+        executing the levels in order settles every gate in a single pass.
+        feedback_gates lists the remaining gates, which are in a feedback loop
+        of gates or read from one, in the default order (by kind).
+        """
+        gate_ids = []
+        for gate_kind in self.devices.gate_types:
+            gate_ids.extend(self.devices.find_devices(gate_kind))
+        gate_set = set(gate_ids)
+
+        # Count the inputs of each gate driven by other gates
+        # (Kahn's algorithm), and record which gates read each gate
+        gate_inputs = dict.fromkeys(gate_ids, 0)  # {device_id: count}
+        gate_consumers = {device_id: [] for device_id in gate_ids}
+        for device_id in gate_ids:
+            device = self.devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None and connected_output[0] in gate_set:
+                    gate_inputs[device_id] += 1
+                    gate_consumers[connected_output[0]].append(device_id)
+
+        gate_levels = []
+        level = [device_id for device_id in gate_ids if gate_inputs[device_id] == 0]
+        while level:
+            gate_levels.append(level)
+            next_level = []
+            for device_id in level:
+                for consumer_id in gate_consumers[device_id]:
+                    gate_inputs[consumer_id] -= 1
+                    if gate_inputs[consumer_id] == 0:
+                        next_level.append(consumer_id)
+            level = next_level
+
+        feedback_gates = [device_id for device_id in gate_ids if gate_inputs[device_id] > 0]
+        return gate_levels, feedback_gates
+
+    def get_gate_levels(self) -> Tuple[List[List[int]], List[int]]:
+        """Return the levelized gates, levelizing the network again if it has changed.
+
+        See levelize() for the return value.
+        """
+        version = (self.devices.structure_version, self.structure_version)
+        if self.levelized_version != version:
+            self.gate_levels, self.feedback_gates = self.levelize()
+            self.levelized_version = version
+        return self.gate_levels, self.feedback_gates
+
+    def find_strongly_connected_components(self, device_ids: List[int],
+                                           consumers: dict) -> List[List[int]]:
+        """Return the strongly connected components of a graph of devices.
+
+        consumers stores {device_id: [device_id]}, the devices reading each
+        device. Uses an iterative form of Tarjan's algorithm, which takes
+        time linear in the number of devices and connections.
+        """
+        order = {}  # {device_id: order in which it was first visited}
+        lowlink = {}  # {device_id: lowest order reachable from it}
+        stack = []
+        on_stack = set()
+        components = []
+        for root_id in device_ids:
+            if root_id in order:
+                continue
+            order[root_id] = lowlink[root_id] = len(order)
+            stack.append(root_id)
+            on_stack.add(root_id)
+            path = [(root_id, iter(consumers[root_id]))]
+            while path:
+                device_id, unvisited = path[-1]
+                for consumer_id in unvisited:
+                    if consumer_id not in order:
+                        order[consumer_id] = lowlink[consumer_id] = len(order)
+                        stack.append(consumer_id)
+                        on_stack.add(consumer_id)
+                        path.append((consumer_id, iter(consumers[consumer_id])))
+                        break
+                    elif consumer_id in on_stack:
+                        lowlink[device_id] = min(lowlink[device_id],
+                                                 order[consumer_id])
+                else:  # every consumer visited
+                    path.pop()
+                    if path:
+                        parent_id = path[-1][0]
+                        lowlink[parent_id] = min(lowlink[parent_id],
+                                                 lowlink[device_id])
+                    if lowlink[device_id] == order[device_id]:
+                        component = []
+                        member_id = None
+                        while member_id != device_id:
+                            member_id = stack.pop()
+                            on_stack.discard(member_id)
+                            component.append(member_id)
+                        components.append(component)
+        return components
+
+    def find_loops(self) -> Tuple[List[List[int]], List[List[int]]]:
+        """Find the feedback loops in the network.
+
+        Return (combinational_loops, sequential_loops). Each loop is a list of
+        device IDs which all depend on each other. Sequential loops pass
+        through a D-type, which breaks the loop until the next clock edge;
+        combinational loops only pass through gates, so they may oscillate.
+        """
+        device_ids = self.devices.find_devices()
+        position = {device_id: index for index, device_id in enumerate(device_ids)}
+        consumers = {device_id: [] for device_id in device_ids}
+        for device_id in device_ids:
+            device = self.devices.get_device(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None and connected_output[0] in consumers:
+                    consumers[connected_output[0]].append(device_id)
+
+        def find_loops_in(graph_ids: List[int], graph_consumers: dict) -> List[List[int]]:
+            loops = []
+            for component in self.find_strongly_connected_components(
+                    graph_ids, graph_consumers):
+                first_id = component[0]
+                if len(component) > 1 or first_id in graph_consumers[first_id]:
+                    loops.append(sorted(component, key=position.get))
+            return sorted(loops, key=lambda loop: position[loop[0]])
+
+        d_type_set = set(self.devices.find_devices(self.devices.D_TYPE))
+        sequential_loops = [loop for loop in find_loops_in(device_ids, consumers)
+                            if not d_type_set.isdisjoint(loop)]
+
+        # Cutting every D-type out of the graph leaves the combinational loops
+        gate_ids = [device_id for device_id in device_ids
+                    if device_id not in d_type_set]
+        gate_consumers = {device_id: [consumer_id for consumer_id in consumers[device_id]
+                                      if consumer_id not in d_type_set]
+                          for device_id in gate_ids}
+        combinational_loops = find_loops_in(gate_ids, gate_consumers)
+        return combinational_loops, sequential_loops
+
+    def get_loops(self) -> Tuple[List[List[int]], List[List[int]]]:
+        """Return the feedback loops, finding them again if the network has changed.
+
+        See find_loops() for the return value.
+        """
+        version = (self.devices.structure_version, self.structure_version)
+        if self.loops_version != version:
+            self.combinational_loops, self.sequential_loops = self.find_loops()
+            self.loops_version = version
+        return self.combinational_loops, self.sequential_loops
+
+    def find_oscillating_devices(self) -> List[List[int]]:
+        """Find the devices in feedback loops which keep toggling.
+
+        Call this after execute_network() has failed to settle. Further
+        settle iterations are executed from the current state until it
+        repeats, recording the devices whose outputs change in each
+        iteration, and the state is then restored. Only the devices which
+        change within the repeating iterations are counted as toggling. Return
+        the toggling devices of each loop, combinational loops first.
+        """
+        saved_state = [(device, dict(device.outputs), device.dtype_memory)
+                       for device in self.devices.devices_list]
+
+        seen_states = {self.get_state(): 0}  # {state: iteration}
+        changes = []  # [set of device_ids changed in each iteration]
+        first_repeated = 0
+        for iteration in range(1, self.iteration_limit + 1):
+            outputs = [list(device.outputs.values())
+                       for device in self.devices.devices_list]
+            if not self.execute_iteration():
+                break
+            changes.append({device.device_id for device, device_outputs
+                            in zip(self.devices.devices_list, outputs)
+                            if list(device.outputs.values()) != device_outputs})
+            state = self.get_state()
+            if state in seen_states:
+                first_repeated = seen_states[state]
+                break
+            seen_states[state] = iteration
+        toggling = set().union(*changes[first_repeated:])
+
+        for device, outputs, dtype_memory in saved_state:
+            device.outputs.update(outputs)
+            device.dtype_memory = dtype_memory
+        self.steady_state = False
+
+        combinational_loops, sequential_loops = self.get_loops()
+        oscillating_devices = []
+        for loop in combinational_loops + sequential_loops:
+            loop_toggling = [device_id for device_id in loop if device_id in toggling]
+            if loop_toggling and loop_toggling not in oscillating_devices:
+                oscillating_devices.append(loop_toggling)
+        return oscillating_devices
+
     def execute_switch(self, device_id: int) -> bool:
         """Simulate a switch.
 
@@ -207,6 +485,9 @@ class Network:
         output is the inverse of y.
         Note: (x,y) pairs for AND, OR, NOR, NAND, XOR are: (HIGH, HIGH), (LOW,
         LOW), (LOW, HIGH), (HIGH, LOW), (None, None).
+        Inputs that are RISING or FALLING are read as the level they are moving
+        to, so that a gate settles as soon as the gates before it have been
+        executed.
         Return True if successful.
         """
         device = self.devices.get_device(device_id)
@@ -217,7 +498,7 @@ class Network:
 
         input_signal_list = []
         for input_id in device.inputs:
-            input_signal = self.get_input_signal(device_id, input_id)
+            input_signal = self.signal_level(self.get_input_signal(device_id, input_id))
             input_signal_list.append(input_signal)
             if device.device_kind != self.devices.XOR:
                 if input_signal != x:
@@ -241,6 +522,15 @@ class Network:
         device.outputs[None] = updated_signal
         return True
 
+    def execute_gate_by_kind(self, device_id: int) -> bool:
+        """Simulate a logic gate using the (x, y) rule of its kind.
+
+        Return True if successful.
+        """
+        device = self.devices.get_device(device_id)
+        x, y = self.gate_rules[device.device_kind]
+        return self.execute_gate(device_id, x, y)
+
     def execute_d_type(self, device_id: int) -> bool:
         """Simulate a D-type device and update its output signal value.
 
@@ -337,44 +627,82 @@ class Network:
         else:
             return False
 
-    def update_clocks(self) -> None:
-        """If it is time to do so, set clock signals to RISING or FALLING."""
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        for device_id in clock_devices:
-            device = self.devices.get_device(device_id)
-            if device.clock_counter == device.clock_half_period:
-                device.clock_counter = 0
-                output_signal = self.get_output_signal(device_id,
-                                                       output_id=None)
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
-
-    def update_rc(self) -> None:
-        """If it is time to lower the RC signal to LOW, set it to LOW."""
-        rc_devices = self.devices.find_devices(self.devices.RC)
-        for device_id in rc_devices:
-            device = self.devices.get_device(device_id)
-            if device.rc_counter == device.trigger_cycle:
+    def update_clocks(self) -> list:
+        """If it is time to do so, set clock signals to RISING or FALLING.
+
+        Only the clocks due to toggle in this cycle are visited: each clock
+        is scheduled on the clock timing wheel at the cycle its counter
+        reaches clock_half_period, and the counters of the other clocks
+        advance with the wheel. Return the clocks whose signal was changed.
+        """
+        wheel = self.devices.clock_wheel
+        for device in wheel.take_changed():  # counters set directly
+            if device.clock_origin is not None:
+                due_cycle = device.clock_origin + device.clock_half_period
+                if due_cycle >= wheel.cycle:
+                    wheel.schedule(device, due_cycle)
+
+        changed_devices = []
+        cycle = wheel.cycle
+        for device in wheel.pop_due():
+            # Skip entries made out of date by a counter set directly
+            if (device.clock_origin is None
+                    or device.clock_origin + device.clock_half_period != cycle
+                    or self.devices.get_device(device.device_id) is not device):
+                continue
+            device.clock_origin = cycle  # the counter is reset to 0
+            wheel.schedule(device, cycle + device.clock_half_period)
+            output_signal = device.outputs[None]
+            if output_signal == self.devices.HIGH:
+                device.outputs[None] = self.devices.FALLING
+                changed_devices.append(device)
+            elif output_signal == self.devices.LOW:
+                device.outputs[None] = self.devices.RISING
+                changed_devices.append(device)
+        return changed_devices
+
+    def update_rc(self) -> list:
+        """If it is time to lower the RC signal to LOW, set it to FALLING.
+
+        Only the RCs due to trigger in this cycle are visited, see
+        update_clocks(). Return the RCs whose signal was changed.
+        """
+        wheel = self.devices.rc_wheel
+        for device in wheel.take_changed():  # counters set directly
+            if device.rc_origin is not None:
+                due_cycle = device.rc_origin + device.trigger_cycle
+                if due_cycle >= wheel.cycle:
+                    wheel.schedule(device, due_cycle)
+
+        changed_devices = []
+        cycle = wheel.cycle
+        for device in wheel.pop_due():
+            # Skip entries made out of date by a counter set directly
+            if (device.rc_origin is None
+                    or device.rc_origin + device.trigger_cycle != cycle
+                    or self.devices.get_device(device.device_id) is not device):
+                continue
+            if device.outputs[None] != self.devices.FALLING:
                 device.outputs[None] = self.devices.FALLING
-            device.rc_counter += 1
+                changed_devices.append(device)
+        return changed_devices
+
+    def set_engine(self, engine) -> None:
+        """Set an alternative engine for execute_network() to delegate to.
+
+        The engine must provide an execute_network() method with the same
+        contract as this class, and must leave the Device objects up to date
+        after every cycle. Set engine to None to use the default engine.
+        """
+        self.engine = engine
 
     def execute_network(self) -> bool:
         """Execute all the devices in the network for one simulation cycle.
 
         Return True if successful and the network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-        rc_devices = self.devices.find_devices(self.devices.RC)
+        if self.engine is not None:
+            return self.engine.execute_network()
 
         # This sets clock signals to RISING or FALLING, where necessary
         self.update_clocks()
@@ -382,48 +710,72 @@ class Network:
         # Checks if any RC has to be triggered
         self.update_rc()
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
-
+        # seen_states stores {state: iteration}. Iterations are
+        # deterministic, so a repeated state will never settle. The states
+        # themselves are stored, as equal hashes do not prove a repeat.
+        seen_states = {}
+        self.oscillation_period = None
         iterations = 0
-        while iterations < iteration_limit:
+        while iterations < self.iteration_limit:
             iterations += 1
-            self.steady_state = True
-
-            for device_id in switch_devices:  # execute switch devices
-                if not self.execute_switch(device_id):
-                    return False
-            # Execute D-type devices before clocks to catch the rising edge of
-            # the clock
-            for device_id in d_type_devices:  # execute DTYPE devices
-                if not self.execute_d_type(device_id):
-                    return False
-            for device_id in clock_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
-                    return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
-                    return False
-            for device_id in rc_devices:  # execute RC devices
-                if not self.execute_rc(device_id):
-                    return False
+            if not self.execute_iteration():
+                return False
             if self.steady_state:
                 break
+            state = self.get_state()
+            if state in seen_states:
+                self.oscillation_period = iterations - seen_states[state]
+                break
+            seen_states[state] = iterations
         return self.steady_state
+
+    def execute_iteration(self) -> bool:
+        """Execute every device in the network once (one settle iteration).
+
+        Set steady_state to False if any output changed. Return True if
+        successful.
+        """
+        clock_devices = self.devices.find_devices(self.devices.CLOCK)
+        switch_devices = self.devices.find_devices(self.devices.SWITCH)
+        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
+        rc_devices = self.devices.find_devices(self.devices.RC)
+        gate_levels, feedback_gates = self.get_gate_levels()
+        self.steady_state = True
+
+        for device_id in switch_devices:  # execute switch devices
+            if not self.execute_switch(device_id):
+                return False
+        # Execute D-type devices before clocks to catch the rising edge of
+        # the clock
+        for device_id in d_type_devices:  # execute DTYPE devices
+            if not self.execute_d_type(device_id):
+                return False
+        for device_id in clock_devices:  # complete clock executions
+            if not self.execute_clock(device_id):
+                return False
+        # Execute the gates outside feedback loops in a single pass,
+        # level by level
+        for level in gate_levels:
+            for device_id in level:
+                if not self.execute_gate_by_kind(device_id):
+                    return False
+        # Gates in or after feedback loops settle over the iterations
+        for device_id in feedback_gates:
+            if not self.execute_gate_by_kind(device_id):
+                return False
+        for device_id in rc_devices:  # execute RC devices
+            if not self.execute_rc(device_id):
+                return False
+        return True
+
+    def get_state(self) -> tuple:
+        """Return all the outputs and D-type memories in the network.
+
+        Together with the switches, clocks and RCs, which do not change within
+        a cycle, these determine the result of the next settle iteration.
+        """
+        state = []
+        for device in self.devices.devices_list:
+            state.extend(device.outputs.values())
+            state.append(device.dtype_memory)
+        return tuple(state)
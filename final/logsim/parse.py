@@ -9,17 +9,16 @@ Classes
 Parser - parses the definition file and builds the logic network.
 """
 
-from typing import List, Union
+from typing import List, Optional, Union
 from collections import OrderedDict
-from copy import copy
 
 from logsim.names import Names
 from logsim.devices import Devices
 from logsim.network import Network
 from logsim.monitors import Monitors
-from logsim.scanner import Scanner
+from logsim.netlist_cache import NetlistCache
+from logsim.scanner import Scanner, Symbol, TokenBuffer
 from logsim.parser_handler import ParserErrorHandler, LineTerminalOutput, FileTerminalOutput
-from logsim.scanner import Symbol
 
 
 class Parser:
@@ -32,6 +31,15 @@ class Parser:
     the parser detects this and tries to recover from it, giving helpful
     error messages.
 
+    The symbols are read from a token buffer, which the scanner fills with
+    the whole file before parsing starts. The parser moves through the
+    buffer by index, and keeps the indices of the symbols it needs later,
+    so Symbol objects are only made for error messages.
+
+    With a netlist cache, the network of a file which has been parsed
+    without errors before is loaded from the cache instead, and the network
+    of a file parsed without errors is stored in it.
+
     Parameters
     ----------
     names: instance of the names.Names() class.
@@ -39,10 +47,16 @@ class Parser:
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
     scanner: instance of the scanner.Scanner() class.
+    cache: instance of the netlist_cache.NetlistCache() class, or None.
 
     Public methods
     --------------
-    parse_network(self): Parses the circuit definition file.
+    tokenize(self): Translates the whole circuit definition file into the
+                    token buffer.
+
+    parse_network(self): Parses the circuit definition file, after
+                         translating it if tokenize has not been called, or
+                         loads its network from the cache.
     """
 
     DTYPE_PIN_IN = ["DATA", "CLK", "SET", "CLEAR"]
@@ -52,16 +66,21 @@ class Parser:
     INITIAL_STATE = ["0", "1"]
     RC = "RC"
 
-    def __init__(self, names: Names, devices: Devices, network: Network, monitors: Monitors, scanner: Scanner):
+    def __init__(self, names: Names, devices: Devices, network: Network, monitors: Monitors, scanner: Scanner,
+                 cache: Optional[NetlistCache] = None):
         """Initialise constants."""
         self.names = names
         self.devices = devices
         self.network = network
         self.monitors = monitors
         self.scanner = scanner
+        self.cache = cache
         self.error_handler = ParserErrorHandler(names=names, devices=devices, network=network, monitors=monitors,
                                                 scanner=scanner)
-        self.symbol = None
+        self.tokens: Optional[TokenBuffer] = None
+        self.index = -1  # index of the current symbol in tokens
+        self.symbol_type = None
+        self.symbol_id = None
         self.block_parse_flags = {"DEVICE": False,
                                   "SWITCH": False,
                                   "CLOCK": False,
@@ -72,16 +91,29 @@ class Parser:
                                               ("CLOCK", False),
                                               ("MONITOR", False),
                                               ("CONNECTION", False)])
-        self.current_identifier = None
+        self.current_identifier = None  # indices in tokens of the current device's symbols
         self.current_qualifier = None
         self.current_device_kind = None
 
+    def tokenize(self) -> None:
+        """Translate the whole circuit definition file into the token buffer."""
+        self.tokens = self.scanner.get_token_buffer()
+        self.index = -1
+
     def parse_network(self) -> bool:
         """Parse the circuit definition file."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.get_key(self.scanner.text, self.names)
+            if self.cache.load(cache_key, self.names, self.devices, self.network, self.monitors):
+                return True
+
+        if self.tokens is None:
+            self.tokenize()
         self.advance()
-        while self.symbol.type != Scanner.EOF:
-            if self.symbol.type == Scanner.KEYWORD:
-                keyword = self.names.get_name_string(self.symbol.id)
+        while self.symbol_type != Scanner.EOF:
+            if self.symbol_type == Scanner.KEYWORD:
+                keyword = self.names.get_name_string(self.symbol_id)
                 if self.block_parse_flags[keyword]:
                     self.error_handler.line_error(self.error_handler.DUPLICATE_KEYWORD, self.symbol)
                     self.skip_to_close_bracket()
@@ -132,14 +164,18 @@ class Parser:
                     if input_signal is None:  # this input is unconnected
                         self.error_handler.file_error(self.error_handler.MISSING_INPUT_TO_PIN,
                                                       self.devices.get_signal_name(device_id, input_id))
-        return False if self.fetch_error_output() else True
+        if self.fetch_error_output():
+            return False
+        if cache_key is not None:
+            self.cache.save(cache_key, self.names, self.devices, self.network, self.monitors)
+        return True
 
     def parse_list(self, sub_rule: bool()) -> None:
         """A generic function to parse all the list rules, with keyword specifying which list,
 
         and sub_rule specifying which sub-rule to follow."""
         self.advance()
-        if self.symbol.type == Scanner.OPEN_CURLY_BRACKET:
+        if self.symbol_type == Scanner.OPEN_CURLY_BRACKET:
             self.advance()
             # list cannot be empty
             # wrong first sub-rule
@@ -147,11 +183,11 @@ class Parser:
                 self.skip_after_semicolon_or_to_close_bracket()
 
             # check for subsequent sub-rule if any
-            while self.symbol.type != Scanner.CLOSE_CURLY_BRACKET and self.symbol.type != Scanner.EOF:
+            while self.symbol_type != Scanner.CLOSE_CURLY_BRACKET and self.symbol_type != Scanner.EOF:
                 # wrong sub-rule
                 if not sub_rule():
                     self.skip_after_semicolon_or_to_close_bracket()
-            if self.symbol.type != Scanner.CLOSE_CURLY_BRACKET:
+            if self.symbol_type != Scanner.CLOSE_CURLY_BRACKET:
                 self.error_handler.line_error(self.error_handler.EXPECT_CLOSE_CURLY_BRACKET, self.symbol)
 
         else:
@@ -228,7 +264,7 @@ class Parser:
         # expect clock cycle
         if not self.clock_cycle():
             return False
-        self.current_qualifier = copy(self.symbol)
+        self.current_qualifier = self.index
         self.advance()
 
         # expect semicolon
@@ -254,7 +290,7 @@ class Parser:
         # expect initial state
         if not self.initial_state():
             return False
-        self.current_qualifier = copy(self.symbol)
+        self.current_qualifier = self.index
         self.advance()
 
         # expect semicolon
@@ -271,7 +307,7 @@ class Parser:
         # expect identifier
         if not self.identifier():
             return False
-        identifier_symbol = copy(self.symbol)
+        identifier_index = self.index
         self.advance()
 
         # expect colon
@@ -282,20 +318,20 @@ class Parser:
         # expect identifier
         if not self.identifier():
             return False
-        device_symbol = copy(self.symbol)
+        device_index = self.index
         self.advance()
 
         # except full stop or semicolon
         # optionally expect full stop
-        port_symbol = None
-        if self.symbol.type == Scanner.FULL_STOP:
+        port_index = None
+        if self.symbol_type == Scanner.FULL_STOP:
             self.advance()
             if not self.pin_in_or_out():
                 # expect pin in or out
                 return False
-            port_symbol = self.symbol
+            port_index = self.index
             self.advance()
-        elif self.symbol.type != Scanner.SEMICOLON:  # not full stop or semicolon
+        elif self.symbol_type != Scanner.SEMICOLON:  # not full stop or semicolon
             self.error_handler.line_error(self.error_handler.EXPECT_FULL_STOP_OR_SEMICOLON, self.symbol)
             return False
         # expect semicolon
@@ -303,7 +339,7 @@ class Parser:
             return False
         else:
             #  attempts to make monitor
-            self.make_monitor(identifier_symbol=identifier_symbol, port_symbol=port_symbol, device_symbol=device_symbol)
+            self.make_monitor(identifier_index=identifier_index, port_index=port_index, device_index=device_index)
             return True
 
     def connect(self) -> bool:
@@ -312,23 +348,23 @@ class Parser:
         # expect identifier
         if not self.identifier():
             return False
-        out_device_symbol = copy(self.symbol)
+        out_device_index = self.index
         self.advance()
         # expect full stop or arrow
         # optionally expect full stop
-        out_port_symbol = None
-        if self.symbol.type == Scanner.FULL_STOP:
+        out_port_index = None
+        if self.symbol_type == Scanner.FULL_STOP:
             self.advance()
             # expect pin out
             if not self.pin_out():
                 return False
-            out_port_symbol = copy(self.symbol)
+            out_port_index = self.index
             self.advance()
-        elif self.symbol.type != Scanner.ARROW:  # not full stop or arrow
+        elif self.symbol_type != Scanner.ARROW:  # not full stop or arrow
             self.error_handler.line_error(self.error_handler.EXPECT_FULL_STOP_OR_ARROW, self.symbol)
             return False
         # expect arrow
-        if self.symbol.type != Scanner.ARROW:
+        if self.symbol_type != Scanner.ARROW:
             self.error_handler.line_error(self.error_handler.EXPECT_ARROW, self.symbol)
             return False
         self.advance()
@@ -336,7 +372,7 @@ class Parser:
         # expect identifier
         if not self.identifier():
             return False
-        in_device_symbol = copy(self.symbol)
+        in_device_index = self.index
         self.advance()
 
         # expect full stop
@@ -347,7 +383,7 @@ class Parser:
         # expect pin in
         if not self.pin_in():
             return False
-        in_port_symbol = copy(self.symbol)
+        in_port_index = self.index
         self.advance()
 
         # expect semicolon
@@ -355,12 +391,12 @@ class Parser:
             return False
         else:
             # attempts to make connection between devices
-            self.make_connection(out_device_symbol, out_port_symbol, in_device_symbol, in_port_symbol)
+            self.make_connection(out_device_index, out_port_index, in_device_index, in_port_index)
             return True
 
     def colon(self) -> bool:
         """Check if the current symbol is a colon."""
-        if not self.symbol.type == Scanner.COLON:
+        if not self.symbol_type == Scanner.COLON:
             self.error_handler.line_error(self.error_handler.EXPECT_COLON, self.symbol)
             return False
         else:
@@ -368,7 +404,7 @@ class Parser:
 
     def semicolon(self) -> bool:
         """Check if the current symbol is a semicolon."""
-        if not self.symbol.type == Scanner.SEMICOLON:
+        if not self.symbol_type == Scanner.SEMICOLON:
             self.error_handler.line_error(self.error_handler.EXPECT_SEMICOLON, self.symbol)
             return False
         else:
@@ -377,7 +413,7 @@ class Parser:
 
     def full_stop(self) -> bool:
         """Check if the current symbol is a full stop."""
-        if not self.symbol.type == Scanner.FULL_STOP:
+        if not self.symbol_type == Scanner.FULL_STOP:
             self.error_handler.line_error(self.error_handler.EXPECT_FULL_STOP, self.symbol)
             return False
         else:
@@ -386,8 +422,8 @@ class Parser:
     def identifier(self) -> bool:
         """Check if the current symbol is an identifier."""
         # Note: EBNF technically allows keywords to be used as identifier, but here the software will not allow
-        if self.symbol.type == Scanner.NAME:
-            self.current_identifier = copy(self.symbol)
+        if self.symbol_type == Scanner.NAME:
+            self.current_identifier = self.index
             return True
         else:
             self.error_handler.line_error(self.error_handler.EXPECT_IDENTIFIER, self.symbol)
@@ -395,11 +431,11 @@ class Parser:
 
     def input_device(self) -> bool:
         """Check if the following symbols follow the rule of an input device."""
-        if self.symbol.type == Scanner.NAME:
+        if self.symbol_type == Scanner.NAME:
             if self.symbol_string() in self.VARIABLE_INPUT_DEVICE:
-                self.current_device_kind = self.symbol.id
+                self.current_device_kind = self.symbol_id
                 self.advance()
-                if self.symbol.type != Scanner.COMMA:
+                if self.symbol_type != Scanner.COMMA:
                     # expect comma
                     self.error_handler.line_error(self.error_handler.EXPECT_COMMA, self.symbol)
                     return False
@@ -409,12 +445,12 @@ class Parser:
                 return self.variable_input_number()
             elif self.symbol_string() in self.FIXED_INPUT_DEVICE:
                 self.current_qualifier = None
-                self.current_device_kind = self.symbol.id
+                self.current_device_kind = self.symbol_id
                 return True
             elif self.symbol_string() == self.RC:
-                self.current_device_kind = self.symbol.id
+                self.current_device_kind = self.symbol_id
                 self.advance()
-                if self.symbol.type != Scanner.COMMA:
+                if self.symbol_type != Scanner.COMMA:
                     # expect comma
                     self.error_handler.line_error(self.error_handler.EXPECT_COMMA, self.symbol)
                     return False
@@ -428,9 +464,9 @@ class Parser:
 
     def variable_input_number(self) -> bool:
         """Check if the current symbol is a valid variable input number (1-16)."""
-        if (self.symbol.type == Scanner.NUMBER and self.symbol.id[0] != "0"
-                and 1 <= int(self.symbol.id) <= 16):
-            self.current_qualifier = copy(self.symbol)
+        if (self.symbol_type == Scanner.NUMBER and self.symbol_id[0] != "0"
+                and 1 <= int(self.symbol_id) <= 16):
+            self.current_qualifier = self.index
             return True
         else:
             # expect variable input number
@@ -439,7 +475,7 @@ class Parser:
 
     def initial_state(self) -> bool:
         """Check if the initial state of the switch is 0(LOW) or 1(HIGH)."""
-        if self.symbol.type == Scanner.NUMBER and self.symbol.id in self.INITIAL_STATE:
+        if self.symbol_type == Scanner.NUMBER and self.symbol_id in self.INITIAL_STATE:
             return True
         else:
             # expect initial state
@@ -454,7 +490,7 @@ class Parser:
 
     def pin_in(self) -> bool:
         """Check if the pin name is a valid input pin name."""
-        if self.symbol.type == Scanner.NAME and self.symbol_string()[0] == "I":
+        if self.symbol_type == Scanner.NAME and self.symbol_string()[0] == "I":
             # expect variable input number
             remaining_symbol_string = self.symbol_string()[1:]
             if self.pin_in_variable_input_number(remaining_symbol_string):
@@ -462,7 +498,7 @@ class Parser:
             else:
                 self.error_handler.line_error(self.error_handler.EXPECT_PIN_IN, self.symbol)
                 return False
-        elif self.symbol.type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_IN:
+        elif self.symbol_type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_IN:
             return True
         else:
             # expect pin in
@@ -471,7 +507,7 @@ class Parser:
 
     def pin_out(self) -> bool:
         """Check if the pin name is a valid output pin name"""
-        if self.symbol.type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_OUT:
+        if self.symbol_type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_OUT:
             return True
         else:
             # expect pin out
@@ -480,7 +516,7 @@ class Parser:
 
     def pin_in_or_out(self) -> bool:
         """Check if the pin name is either input pin name or output pin name"""
-        if self.symbol.type == Scanner.NAME and self.symbol_string()[0] == "I":
+        if self.symbol_type == Scanner.NAME and self.symbol_string()[0] == "I":
             # expect variable input number
             remaining_symbol_string = self.symbol_string()[1:]
             if self.pin_in_variable_input_number(remaining_symbol_string):
@@ -488,9 +524,9 @@ class Parser:
             else:
                 self.error_handler.line_error(self.error_handler.EXPECT_PIN_IN_OR_OUT, self.symbol)
                 return False
-        elif self.symbol.type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_IN:
+        elif self.symbol_type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_IN:
             return True
-        elif self.symbol.type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_OUT:
+        elif self.symbol_type == Scanner.NAME and self.symbol_string() in self.DTYPE_PIN_OUT:
             return True
         else:
             # expect pin in or out
@@ -499,7 +535,7 @@ class Parser:
 
     def clock_cycle(self) -> bool:
         """Check if the qualifier is a valid clock cycle number."""
-        if self.symbol.type == Scanner.NUMBER and self.symbol.id[0] != "0":
+        if self.symbol_type == Scanner.NUMBER and self.symbol_id[0] != "0":
             return True
         else:
             # expect clock cycle
@@ -508,8 +544,8 @@ class Parser:
 
     def check_rc_trigger_cycle(self) -> bool:
         """Check if the qualifier is a valid clock cycle number."""
-        if self.symbol.type == Scanner.NUMBER and self.symbol.id[0] != "0":
-            self.current_qualifier = self.symbol
+        if self.symbol_type == Scanner.NUMBER and self.symbol_id[0] != "0":
+            self.current_qualifier = self.index
             return True
         else:
             # expect RC trigger cycle
@@ -518,25 +554,37 @@ class Parser:
 
     def skip_after_semicolon_or_to_close_bracket(self) -> None:
         """Skip to the symbol after the next semicolon or to the next close curly bracket, whichever comes first."""
-        while (self.symbol.type != Scanner.SEMICOLON and
-               self.symbol.type != Scanner.CLOSE_CURLY_BRACKET and
-               self.symbol.type != Scanner.EOF):
+        while (self.symbol_type != Scanner.SEMICOLON and
+               self.symbol_type != Scanner.CLOSE_CURLY_BRACKET and
+               self.symbol_type != Scanner.EOF):
             self.advance()
-        if self.symbol.type == Scanner.SEMICOLON:
+        if self.symbol_type == Scanner.SEMICOLON:
             self.advance()
 
     def skip_to_close_bracket(self) -> None:
         """Skip to the next close curly bracket."""
-        while self.symbol.type != Scanner.CLOSE_CURLY_BRACKET and self.symbol.type != Scanner.EOF:
+        while self.symbol_type != Scanner.CLOSE_CURLY_BRACKET and self.symbol_type != Scanner.EOF:
             self.advance()
 
     def advance(self) -> None:
-        """Advance to the next symbol."""
-        self.symbol = self.scanner.get_symbol()
+        """Advance to the next symbol, or stay on the EOF symbol at the end of the tokens."""
+        if self.index < len(self.tokens) - 1:
+            self.index += 1
+        self.symbol_type = self.tokens.types[self.index]
+        self.symbol_id = self.tokens.ids[self.index]
+
+    @property
+    def symbol(self) -> Symbol:
+        """Return the current symbol as a Symbol, for error messages."""
+        return self.tokens.get_symbol(self.index)
+
+    def get_symbol(self, index: Optional[int]) -> Optional[Symbol]:
+        """Return the symbol at the index as a Symbol, for error messages."""
+        return None if index is None else self.tokens.get_symbol(index)
 
     def symbol_string(self) -> str:
         """Return the current symbol's string representation."""
-        return self.names.get_name_string(self.symbol.id)
+        return self.names.get_name_string(self.symbol_id)
 
     def fetch_error_output(self) -> List[Union[LineTerminalOutput, FileTerminalOutput]]:
         """Return the error list from error_handler."""
@@ -550,58 +598,59 @@ class Parser:
         """Make device (gates, switch or clock), calls error handler to report error if necessary."""
         if not self.error_count():
             device_kind = self.current_device_kind
-            device_id = self.current_identifier.id
-            device_property = int(self.current_qualifier.id) if self.current_qualifier else None
+            device_id = self.tokens.ids[self.current_identifier]
+            device_property = int(self.tokens.ids[self.current_qualifier]) \
+                if self.current_qualifier is not None else None
             error_type = self.devices.make_device(device_id, device_kind, device_property)
             if error_type == self.devices.NO_ERROR:
                 pass
             elif error_type == self.devices.DEVICE_PRESENT:
-                self.error_handler.line_error(error_type, self.current_identifier)
+                self.error_handler.line_error(error_type, self.get_symbol(self.current_identifier))
             elif error_type == self.devices.QUALIFIER_PRESENT:
-                self.error_handler.line_error(error_type, self.current_qualifier)
+                self.error_handler.line_error(error_type, self.get_symbol(self.current_qualifier))
             else:
                 print(f"Error type: {error_type}, should not be encountered")
 
-    def make_monitor(self, identifier_symbol: Symbol, port_symbol: Symbol, device_symbol: Symbol) -> None:
+    def make_monitor(self, identifier_index: int, port_index: Optional[int], device_index: int) -> None:
         """Make monitor, calls error handler to report error if necessary."""
         if not self.error_count():
-            identifier = self.names.get_name_string(identifier_symbol.id)
-            port_id = port_symbol.id if port_symbol else None
-            device_id = device_symbol.id
+            identifier = self.names.get_name_string(self.tokens.ids[identifier_index])
+            port_id = self.tokens.ids[port_index] if port_index is not None else None
+            device_id = self.tokens.ids[device_index]
             error_type = self.monitors.make_monitor(identifier=identifier, port_id=port_id, device_id=device_id)
             if error_type == self.monitors.NO_ERROR:
                 pass
             elif error_type == self.monitors.MONITOR_PORT_ABSENT:
-                self.error_handler.line_error(self.monitors.MONITOR_PORT_ABSENT, port_symbol)
+                self.error_handler.line_error(self.monitors.MONITOR_PORT_ABSENT, self.get_symbol(port_index))
             elif error_type == self.monitors.MONITOR_IDENTIFIER_PRESENT:
-                self.error_handler.line_error(self.monitors.MONITOR_IDENTIFIER_PRESENT, identifier_symbol)
+                self.error_handler.line_error(self.monitors.MONITOR_IDENTIFIER_PRESENT, self.get_symbol(identifier_index))
             elif error_type == self.monitors.MONITOR_DEVICE_ABSENT:
-                self.error_handler.line_error(self.monitors.MONITOR_DEVICE_ABSENT, device_symbol)
+                self.error_handler.line_error(self.monitors.MONITOR_DEVICE_ABSENT, self.get_symbol(device_index))
             elif error_type == self.monitors.MONITOR_PORT_ABSENT:
-                self.error_handler.line_error(self.monitors.MONITOR_PORT_ABSENT, port_symbol)
+                self.error_handler.line_error(self.monitors.MONITOR_PORT_ABSENT, self.get_symbol(port_index))
             else:
                 print(f"Error type: {error_type}, should not be encountered")
 
-    def make_connection(self, out_device_symbol: Symbol, out_port_symbol: Symbol,
-                        in_device_symbol: Symbol, in_port_symbol: Symbol) -> None:
+    def make_connection(self, out_device_index: int, out_port_index: Optional[int],
+                        in_device_index: int, in_port_index: int) -> None:
         """Make connection, calls error handler to report error if necessary."""
         if not self.error_count():
-            out_device_id = out_device_symbol.id
-            out_port_id = out_port_symbol.id if out_port_symbol else None
-            in_device_id = in_device_symbol.id
-            in_port_id = in_port_symbol.id
+            out_device_id = self.tokens.ids[out_device_index]
+            out_port_id = self.tokens.ids[out_port_index] if out_port_index is not None else None
+            in_device_id = self.tokens.ids[in_device_index]
+            in_port_id = self.tokens.ids[in_port_index]
             error_type = self.network.make_connection(out_device_id, out_port_id, in_device_id, in_port_id)
             if error_type == self.network.NO_ERROR:
                 pass
             elif error_type == self.network.INPUT_PORT_ABSENT:
-                self.error_handler.line_error(self.network.INPUT_PORT_ABSENT, in_port_symbol)
+                self.error_handler.line_error(self.network.INPUT_PORT_ABSENT, self.get_symbol(in_port_index))
             elif error_type == self.network.OUTPUT_PORT_ABSENT:
-                self.error_handler.line_error(self.network.OUTPUT_PORT_ABSENT, out_port_symbol)
+                self.error_handler.line_error(self.network.OUTPUT_PORT_ABSENT, self.get_symbol(out_port_index))
             elif error_type == self.network.INPUT_DEVICE_ABSENT:
-                self.error_handler.line_error(self.network.INPUT_DEVICE_ABSENT, in_device_symbol)
+                self.error_handler.line_error(self.network.INPUT_DEVICE_ABSENT, self.get_symbol(in_device_index))
             elif error_type == self.network.OUTPUT_DEVICE_ABSENT:
-                self.error_handler.line_error(self.network.OUTPUT_DEVICE_ABSENT, out_device_symbol)
+                self.error_handler.line_error(self.network.OUTPUT_DEVICE_ABSENT, self.get_symbol(out_device_index))
             elif error_type == self.network.INPUT_CONNECTED:
-                self.error_handler.line_error(self.network.INPUT_CONNECTED, in_port_symbol)
+                self.error_handler.line_error(self.network.INPUT_CONNECTED, self.get_symbol(in_port_index))
             else:
                 print(f"Error type: {error_type}, should not be encountered")
@@ -176,7 +176,7 @@ class ParserErrorHandler:
         """Return terminal output based on information of the line error encountered."""
         left_char_limit = 25
         right_char_limit = 25
-        line_str = self.scanner.file_lines[line]
+        line_str = self.scanner.get_line(line)
         line_length = len(line_str)
         if character_in_line > left_char_limit:
             line_str = "..." + line_str[character_in_line-left_char_limit:]
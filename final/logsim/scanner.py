@@ -7,8 +7,13 @@ Classes
 -------
 Scanner - reads definition file and translates characters into symbols.
 Symbol - encapsulates a symbol and stores its properties.
+TokenBuffer - stores the symbols of a file as parallel arrays.
 """
-from typing import TextIO, List
+import bisect
+import itertools
+import re
+from array import array
+from typing import Iterator, List, Tuple, Union
 
 from logsim.names import Names
 
@@ -34,6 +39,45 @@ class Symbol:
         self.character_in_line = None
 
 
+class TokenBuffer:
+
+    """Store the symbols of a file as parallel arrays.
+
+    The type, ID, line and character in line of the symbol at each index are
+    stored in four arrays, so that the symbols of a whole file are held
+    without making a Symbol object for each of them. The IDs are name IDs,
+    or the strings of numbers and invalid characters, or None.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    get_symbol(self, index): Returns the symbol at the index as a Symbol.
+    """
+
+    def __init__(self):
+        """Initialise the empty arrays."""
+        self.types = array("b")
+        self.ids: List[Union[int, str, None]] = []
+        self.lines = array("q")
+        self.characters = array("q")
+
+    def __len__(self) -> int:
+        """Return the number of symbols."""
+        return len(self.types)
+
+    def get_symbol(self, index: int) -> Symbol:
+        """Return the symbol at the index as a Symbol."""
+        symbol = Symbol()
+        symbol.type = self.types[index]
+        symbol.id = self.ids[index]
+        symbol.line = self.lines[index]
+        symbol.character_in_line = self.characters[index]
+        return symbol
+
+
 class Scanner:
 
     """Read circuit definition file and translate the characters into symbols.
@@ -43,6 +87,12 @@ class Scanner:
     that the parser can use. It also skips over comments and irrelevant
     formatting characters, such as spaces and line breaks.
 
+    The file is read once into a string. Each symbol is found by one match
+    of a compiled regular expression from the current position, rather than
+    by reading one character at a time, and its line and character are found
+    from the table of the positions at which the lines start. The lines
+    themselves are only sliced from the text when an error is reported.
+
     Parameters
     ----------
     path: path to the circuit definition file.
@@ -52,14 +102,32 @@ class Scanner:
     -------------
     get_symbol(self): Translates the next sequence of characters into a symbol
                       and returns the symbol.
+
+    get_token_buffer(self): Translates the whole file into a token buffer
+                            and returns the buffer.
+
+    get_line(self, line): Returns the text of a line of the file.
     """
 
     symbol_type_list = [COMMA, SEMICOLON, COLON, FULL_STOP, ARROW, OPEN_CURLY_BRACKET, CLOSE_CURLY_BRACKET, KEYWORD,
                         NUMBER, NAME, EOF, INVALID] = range(12)
     keywords_list = ["DEVICE", "CLOCK", "SWITCH", "MONITOR", "CONNECTION"]
+    keywords_set = frozenset(keywords_list)
+    punctuation_dictionary = {",": COMMA, ";": SEMICOLON, ":": COLON, ".": FULL_STOP, ">": ARROW,
+                              "{": OPEN_CURLY_BRACKET, "}": CLOSE_CURLY_BRACKET}
+
+    # One match skips the spaces and closed comments before a symbol, and reads
+    # an ASCII name, number or punctuation. \s and \w match the characters of
+    # str.isspace(), and of str.isalnum() or "_"
+    symbol_pattern = re.compile(r"(?:\s+|#[^\n]*\n|/[^/]*/)*"
+                                r"(?:([A-Za-z]\w*)|([0-9]+)|([,;:.>{}]))?")
+    NAME_GROUP, NUMBER_GROUP, PUNCTUATION_GROUP = 1, 2, 3
+    spaces_pattern = re.compile(r"\s*")
+    name_pattern = re.compile(r"\w*")
+    digits_pattern = re.compile(r"[0-9]*")  # other digits are read one at a time
 
     def __init__(self, path: str, names: Names):
-        """Open specified file and initialise reserved words and IDs."""
+        """Read specified file and initialise reserved words and IDs."""
 
         if not isinstance(path, str):
             raise TypeError("Expected path to be a string.")
@@ -67,161 +135,184 @@ class Scanner:
             raise TypeError("Expected names to be a Names object.")
 
         self.path = path
-        self.file = self.get_file()
-        self.file_lines = self.get_file_lines()
+        self.text = self.get_text()
+        self.line_starts = self.get_line_starts()
         self.names = names
         [self.DEVICE_ID, self.CLOCK_ID, self.SWITCH_ID, self.MONITOR_ID, self.CONNECT_ID] \
             = self.names.lookup(self.keywords_list)
-        self.current_character = " "
-        self.current_line = 0
-        self.current_character_in_line = -1
+        self.symbols = self.get_symbols()
 
     def get_symbol(self) -> Symbol:
         """Translate the next sequence of characters into a symbol and return the symbol."""
-
-        symbol = Symbol()
-        self.skip_spaces()  # current character now not whitespace
-
-        while self.current_character == "#" or self.current_character == "/":  # comment
-            if self.current_character == "#":  # single-line comment
-                self.skip_single_line_comment()
-            else:  # multi-line comment
-                self.skip_multi_line_comment()
-            self.skip_spaces()
-
-        symbol.line = self.current_line
-        symbol.character_in_line = self.current_character_in_line
-
-        if self.current_character.isalpha():  # name
-            name_string = self.get_name()
-            if name_string in self.keywords_list:
-                symbol.type = self.KEYWORD
-            else:
-                symbol.type = self.NAME
-            [symbol.id] = self.names.lookup([name_string])
-
-        elif self.current_character.isdigit():  # number
-            symbol.id = self.get_number()
-            symbol.type = self.NUMBER
-
-        elif self.current_character == ",":  # punctuation
-            symbol.type = self.COMMA
-            self.advance()
-
-        elif self.current_character == ";":
-            symbol.type = self.SEMICOLON
-            self.advance()
-
-        elif self.current_character == ":":
-            symbol.type = self.COLON
-            self.advance()
-
-        elif self.current_character == ".":
-            symbol.type = self.FULL_STOP
-            self.advance()
-
-        elif self.current_character == ">":
-            symbol.type = self.ARROW
-            self.advance()
-
-        elif self.current_character == "{":
-            symbol.type = self.OPEN_CURLY_BRACKET
-            self.advance()
-
-        elif self.current_character == "}":
-            symbol.type = self.CLOSE_CURLY_BRACKET
-            self.advance()
-
-        elif not self.current_character:  # end of file
-            symbol.type = self.EOF
+        return next(self.symbols)
+
+    def get_symbols(self) -> Iterator[Symbol]:
+        """Yield the symbols of the file, and then EOF symbols."""
+        for symbol_type, symbol_id, line, character_in_line in self.get_tokens():
+            symbol = Symbol()
+            symbol.type = symbol_type
+            symbol.id = symbol_id
+            symbol.line = line
+            symbol.character_in_line = character_in_line
+            yield symbol
+
+    def get_token_buffer(self) -> TokenBuffer:
+        """Translate the whole file into a token buffer and return the buffer.
+
+        The file is translated from its start, whichever symbols have already
+        been returned by get_symbol. The buffer ends with one EOF token.
+        """
+        tokens = TokenBuffer()
+        append_type, append_id = tokens.types.append, tokens.ids.append
+        append_line, append_character = tokens.lines.append, tokens.characters.append
+        for symbol_type, symbol_id, line, character_in_line in self.get_tokens():
+            append_type(symbol_type)
+            append_id(symbol_id)
+            append_line(line)
+            append_character(character_in_line)
+            if symbol_type == self.EOF:
+                return tokens
+
+    def get_tokens(self) -> Iterator[Tuple[int, Union[int, str, None], int, int]]:
+        """Yield the type, ID, line and character in line of each symbol of the
+        file, and then of EOF symbols.
+
+        ASCII names, numbers and punctuation, with the spaces and closed
+        comments before them, are matched by one search over the text. Other
+        characters are translated one symbol at a time, before the search
+        continues after them. The line of each symbol is found by moving
+        forward through the line starts.
+        """
+        text = self.text
+        line_starts = self.line_starts
+        last_line = len(line_starts) - 1
+        query = self.names.query
+        keywords_set = self.keywords_set
+        punctuation_dictionary = self.punctuation_dictionary
+        NAME_GROUP, NUMBER_GROUP = self.NAME_GROUP, self.NUMBER_GROUP
+        KEYWORD, NAME, NUMBER = self.KEYWORD, self.NAME, self.NUMBER
+
+        position = 0
+        line = 0
+        next_line_start = line_starts[1] if last_line else len(text)
+        while True:
+            group = None
+            for match in self.symbol_pattern.finditer(text, position):
+                group = match.lastindex
+                position = match.end()
+                if group is None:  # not an ASCII symbol, or a comment left open
+                    break
+                start = match.start(group)
+                while start >= next_line_start:
+                    line += 1
+                    next_line_start = line_starts[line + 1] if line < last_line else len(text)
+
+                if group == NAME_GROUP:
+                    name_string = match.group(group)
+                    name_id = query(name_string)
+                    if name_id is None:
+                        [name_id] = self.names.lookup([name_string])
+                    yield (KEYWORD if name_string in keywords_set else NAME, name_id,
+                           line, start - line_starts[line])
+
+                elif group == NUMBER_GROUP:
+                    if text[position:position + 1].isdigit():  # followed by other digits
+                        position = self.get_number_end(position)
+                        yield NUMBER, text[start:position], line, start - line_starts[line]
+                        break  # and continue the search after the number
+                    yield NUMBER, match.group(group), line, start - line_starts[line]
+
+                else:  # punctuation
+                    yield (punctuation_dictionary[match.group(group)], None,
+                           line, start - line_starts[line])
+
+            if group is None:
+                token, position = self.get_other_token(position)
+                yield token
+                if token[0] == self.EOF:
+                    break
+                line = token[2]
+                next_line_start = line_starts[line + 1] if line < last_line else len(text)
+
+        while True:  # the end of file does not move
+            yield token
+
+    def get_other_token(self, position: int) -> Tuple[Tuple[int, Union[int, str, None], int, int], int]:
+        """Translate the characters from position, which do not start with an
+        ASCII symbol, into the type, ID, line and character in line of a
+        symbol. Return them and the position after the symbol.
+        """
+        text = self.text
+        position = self.skip_spaces_and_comments(position)
+        character = text[position:position + 1]
+        line, character_in_line = self.get_line_and_character(position)
+
+        if character.isalpha():  # name
+            end = self.name_pattern.match(text, position + 1).end()
+            [name_id] = self.names.lookup([text[position:end]])
+            return (self.NAME, name_id, line, character_in_line), end
+
+        elif character.isdigit():  # number
+            end = self.get_number_end(position + 1)
+            return (self.NUMBER, text[position:end], line, character_in_line), end
+
+        elif not character:  # end of file
+            return (self.EOF, None, line, character_in_line), position
 
         else:  # not a valid character
-            symbol.id = self.current_character
-            symbol.type = self.INVALID
-            self.advance()
-
-        return symbol
-
-    def get_file(self) -> TextIO:
-        return open(self.path, "r")
-
-    def get_file_lines(self) -> List[str]:
-        file = self.get_file()
-        file_lines = file.readlines()
-        file_lines.append("")
-        file.close()
-        return file_lines
-
-    def get_next_character(self) -> str:
-        """Read and return the next character in file."""
-
-        char = self.file.read(1)
-        if char == "\n":  # next line
-            self.current_line += 1
-            self.current_character_in_line = -1
-        else:
-            self.current_character_in_line += 1
-        return char
-
-    def skip_spaces(self) -> None:
-        """Seek and update current_character to the next non-whitespace in file."""
-
-        char = self.current_character
-
-        while char.isspace():
-            char = self.get_next_character()
-
-        self.current_character = char
-
-    def skip_single_line_comment(self) -> None:
-        """Skip single line comment"""
-
-        char = self.get_next_character()
-
-        while char and char != "\n":
-            char = self.get_next_character()
-
-        self.current_character = self.get_next_character()
-
-    def skip_multi_line_comment(self) -> None:
-        """Skip multi line comment"""
-
-        char = self.get_next_character()
-
-        while char and char != "/":
-            char = self.get_next_character()
-
-        self.current_character = self.get_next_character()
-
-    def get_name(self) -> str:
-        """Seek and return the next name string in file."""
-
-        name = self.current_character
-        next_char = self.get_next_character()
-
-        while next_char.isalnum() or next_char == "_":
-            name += next_char
-            next_char = self.get_next_character()
-
-        self.current_character = next_char
-
-        return name
-
-    def get_number(self) -> str:
-        """Seek and return the next number string in file."""
-
-        number = self.current_character
-        next_char = self.get_next_character()
-
-        while next_char.isdigit():
-            number += next_char
-            next_char = self.get_next_character()
-
-        self.current_character = next_char
-
-        return number
-
-    def advance(self) -> None:
-        """Advance to the next character in file"""
-
-        self.current_character = self.get_next_character()
+            return (self.INVALID, character, line, character_in_line), position + 1
+
+    def get_number_end(self, position: int) -> int:
+        """Return the position after the digits from position."""
+        text = self.text
+        while text[position:position + 1].isdigit():
+            position = self.digits_pattern.match(text, position + 1).end()
+        return position
+
+    def get_text(self) -> str:
+        """Read and return the whole file."""
+        with open(self.path, "r") as file:
+            return file.read()
+
+    def get_line_starts(self) -> array:
+        """Return the position in text at which each line starts."""
+        return array("q", itertools.chain([0], (match.end() for match
+                                                in re.finditer("\n", self.text))))
+
+    def get_line(self, line: int) -> str:
+        """Return the text of a line, with its line break.
+
+        The line after the last line of the file is empty.
+        """
+        if line >= len(self.line_starts):
+            return ""
+        start = self.line_starts[line]
+        if line + 1 < len(self.line_starts):
+            return self.text[start:self.line_starts[line + 1]]
+        return self.text[start:]
+
+    def get_line_and_character(self, position: int) -> Tuple[int, int]:
+        """Return the line, and the character in the line, of a position in text.
+
+        Positions past the end of the file are on the last line.
+        """
+        line = bisect.bisect_right(self.line_starts, position) - 1
+        return line, position - self.line_starts[line]
+
+    def skip_spaces_and_comments(self, position: int) -> int:
+        """Return the position of the next character which is not whitespace or in a comment.
+
+        A single-line comment runs from # to the end of the line, and a
+        multi-line comment from / to the next /. A comment left open at the
+        end of the file ends one position past it.
+        """
+        text = self.text
+        position = self.spaces_pattern.match(text, position).end()
+        character = text[position:position + 1]
+        while character == "#" or character == "/":
+            end = text.find("\n" if character == "#" else "/", position + 1)
+            if end < 0:  # comment left open
+                return len(text) + 1
+            position = self.spaces_pattern.match(text, end + 1).end()
+            character = text[position:position + 1]
+        return position
@@ -0,0 +1,539 @@
+"""Run the simulation and record the monitored signals.
+
+Used in the Logic Simulator project by both user interfaces to run the network
+for a number of simulation cycles.
+
+Classes
+-------
+Simulator - runs the network and records the monitors, cycle by cycle.
+"""
+import bisect
+import math
+from array import array
+from typing import Dict, Optional, Tuple, Union
+
+from logsim.names import Names
+from logsim.devices import Devices, Snapshot
+from logsim.network import Network
+from logsim.monitors import Monitors
+
+
+class Simulator:
+
+    """Run the network and record the monitors, cycle by cycle.
+
+    Once the switches are fixed, the state of the network (all outputs, D-type
+    memories and clock and RC counters) determines the state in the next
+    cycle. If a state repeats, the network is periodic: the remaining cycles
+    are filled in by repeating the monitored signals of the last period,
+    instead of simulating them.
+
+    Repeated states are found with Brent's cycle detection algorithm, which
+    compares the state with a single saved state, saved again after 1, 2, 4,
+    8... comparisons. This finds the period after at most about twice the
+    length of the transient plus the period, without storing the state of
+    every cycle. A state cannot repeat while an RC counts up to its trigger
+    cycle, and the period is a multiple of the period bound, after which
+    every clock is back in the same phase, so the state is only compared
+    every period bound cycles once every RC has triggered. Runs too short to
+    skip a period are not checked at all. With an engine, the state is read
+    from the engine's packed arrays rather than from the Device objects.
+
+    A keyframe (a Snapshot of the devices) is kept every keyframe_interval
+    cycles, at the start of every run and after every skip, so the state at
+    any past cycle can be reconstructed by restoring the keyframe before it
+    and simulating at most keyframe_interval cycles. Switches can only change
+    between runs, so the keyframes record every switch change. Once there are
+    more than max_keyframes keyframes, every other one is dropped and the
+    interval is doubled, which bounds their memory.
+
+    Monitors made after a run can be filled in with the signals they would
+    have recorded, which are simulated again from the keyframes. Skipped
+    cycles are read from the period before them. Setting history_budget
+    also records the settled level of every output after every simulated
+    cycle, packed one bit per output, so that backfilling reads the rows
+    instead: every output is LOW or HIGH once the network has settled, so
+    one bit is enough. Only the rows of the last history_budget bytes, or of
+    about the last history window cycles, are kept, and older cycles are
+    simulated again. The history is off by default (history_budget is 0),
+    as recording it slows every cycle down.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_state(self): Returns the state of the network, which determines its
+                     state in the next cycle.
+
+    get_run_state(self): Returns the state of the network, as compared within
+                         a run.
+
+    get_period_bound(self): Returns the number of cycles after which every
+                            clock is back in the same phase.
+
+    get_transient_bound(self): Returns the number of cycles before every RC
+                               has triggered.
+
+    run_cycles(self, cycles): Runs the network for the specified number of
+                              cycles and records the monitors.
+
+    skip_periods(self, period, repeats): Fills in repeats periods of the
+                                         simulation without simulating them.
+
+    start_run(self): Starts counting cycles from 0, after a cold start-up.
+
+    add_keyframe(self, required=False): Adds a keyframe at the current cycle.
+
+    get_snapshot(self, cycle): Returns a Snapshot of the devices at a past
+                               cycle of the run.
+
+    get_outputs(self, cycle): Returns every output signal at a past cycle of
+                              the run.
+
+    update_history_ports(self): Indexes the outputs of the network, and
+                                discards the history if they changed.
+
+    get_row(self, cycle): Returns the history row of a simulated cycle.
+
+    record_history(self): Records the level of every output in the history.
+
+    trim_history(self): Discards the oldest rows beyond the history budget
+                        or window.
+
+    get_history_signals(self, device_id, port_id, start=0): Returns the
+                       signals of a port from the start cycle of the run.
+
+    get_simulated_signals(self, position, start, stop): Returns the signals
+                       of an output over simulated cycles.
+
+    replay_signals(self, position, start, stop): Returns the signals of an
+                       output simulated again from a keyframe.
+
+    backfill_monitor(self, device_id, port_id): Fills in the recorded signals
+                                                of a monitor made after a run.
+    """
+
+    def __init__(self, names: Names, devices: Devices, network: Network,
+                 monitors: Monitors):
+        """Initialise the fast-forward settings and the keyframes."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.fast_forward = True  # False to simulate every cycle
+        self.period = None  # period found by the last run, if any
+
+        self.cycle = 0  # cycles completed since the start of the run
+        self.keyframe_interval = 1024
+        self.max_keyframes = 1024
+
+        # keyframes stores {cycle: Snapshot}, and keyframe_cycles their
+        # cycles in order. Keyframes at the start of a run or after a skip
+        # are required, and are never dropped.
+        self.keyframes = {}
+        self.keyframe_cycles = []
+        self.required_keyframes = set()
+
+        # skipped stores [(start cycle, end cycle, period)] of every skip
+        self.skipped = []
+
+        # history stores one row of history_row_size bytes per simulated
+        # cycle, with the bit of each output of history_ports set if it is
+        # HIGH. history_first_row is the number of the first row kept, see
+        # get_row(). Skipped cycles have no rows.
+        self.history = bytearray()
+        self.history_ports = []
+        self.history_positions = {}  # {port: position in history_ports}
+        self.history_row_size = 0
+        self.history_version = None
+        self.history_first_row = 0
+        self.history_budget = 0  # most bytes of rows kept, 0 for none
+
+        # history_digits translates HIGH signals to "1", and others to "0"
+        self.history_digits = bytes(ord("1") if signal == devices.HIGH else ord("0")
+                                    for signal in range(256))
+
+    def get_state(self) -> tuple:
+        """Return the state of the network, which determines its next state.
+
+        RC counters past the trigger cycle no longer affect the network, so
+        they are all counted as the cycle after the trigger cycle.
+        """
+        state = []
+        for device in self.devices.devices_list:
+            state.extend(device.outputs.values())
+            rc_counter = device.rc_counter
+            if rc_counter is not None and rc_counter > device.trigger_cycle:
+                rc_counter = device.trigger_cycle + 1
+            state.extend((device.switch_state, device.dtype_memory,
+                          device.clock_counter, rc_counter))
+        return tuple(state)
+
+    def get_run_state(self) -> Union[tuple, bytes]:
+        """Return the state of the network, as compared within a run.
+
+        Switches cannot change within a run, and RC counters are only
+        compared once past their trigger cycle, so only the outputs, D-type
+        memories and clock counters are needed. They are read from the
+        packed arrays of the engine, if it has them.
+        """
+        get_packed_state = getattr(self.network.engine, "get_packed_state", None)
+        if get_packed_state is None:
+            return self.get_state()
+        clock_counters = array("q", [self.devices.get_device(device_id).clock_counter
+                                     for device_id in self.devices.find_devices(self.devices.CLOCK)])
+        return get_packed_state() + clock_counters.tobytes()
+
+    def get_period_bound(self) -> int:
+        """Return the number of cycles after which every clock is back in the same phase.
+
+        This is the least common multiple of the full periods of the clocks,
+        and the period of any repeating state is a multiple of it.
+        """
+        bound = 1
+        for device_id in self.devices.find_devices(self.devices.CLOCK):
+            full_period = 2 * self.devices.get_device(device_id).clock_half_period
+            bound = bound * full_period // math.gcd(bound, full_period)
+        return bound
+
+    def get_transient_bound(self) -> int:
+        """Return the number of cycles before every RC has triggered.
+
+        Until then, the RC counters differ in every cycle, so no state can
+        repeat.
+        """
+        bound = 0
+        for device_id in self.devices.find_devices(self.devices.RC):
+            device = self.devices.get_device(device_id)
+            bound = max(bound, device.trigger_cycle + 1 - device.rc_counter)
+        return bound
+
+    def run_cycles(self, cycles: int) -> bool:
+        """Run the network for the specified number of cycles.
+
+        Record the monitors after every cycle. Return True if successful, or
+        False if the network oscillates.
+        """
+        self.period = None
+        self.add_keyframe(required=True)
+        detect = self.fast_forward
+        if detect:
+            period_bound = self.get_period_bound()
+            detect_start = self.get_transient_bound()
+            # The first skip needs a transient, a period and another period
+            detect = cycles - detect_start >= 2 * period_bound
+        saved_state = None
+        power = 1
+        distance = 1  # comparisons since the state was saved
+        cycle = 0
+        while cycle < cycles:
+            if not self.network.execute_network():
+                return False
+            self.monitors.record_signals()
+            self.record_history()
+            cycle += 1
+            self.cycle += 1
+            if self.cycle % self.keyframe_interval == 0:
+                self.add_keyframe()
+            if (not detect or self.period is not None or cycle < detect_start
+                    or (cycle - detect_start) % period_bound):
+                continue
+
+            state = self.get_run_state()
+            if state == saved_state:
+                period = distance * period_bound
+                self.period = period
+                repeats = (cycles - cycle) // period
+                if repeats:
+                    self.skip_periods(period, repeats)
+                    cycle += period * repeats
+                    self.skipped.append((self.cycle, self.cycle + period * repeats,
+                                         period))
+                    self.cycle += period * repeats
+                    self.add_keyframe(required=True)
+                continue
+
+            if distance == power:  # save the state after 1, 2, 4... comparisons
+                saved_state = state
+                power *= 2
+                distance = 0
+            distance += 1
+        return True
+
+    def skip_periods(self, period: int, repeats: int) -> None:
+        """Fill in repeats periods of the simulation without simulating them.
+
+        The network ends in the same state, apart from the RC counters, which
+        count every cycle.
+        """
+        self.monitors.repeat_signals(period, repeats)
+        for device_id in self.devices.find_devices(self.devices.RC):
+            self.devices.get_device(device_id).rc_counter += period * repeats
+        self.devices.mark_state_changed()
+
+    def start_run(self) -> None:
+        """Start counting cycles from 0, and discard the keyframes.
+
+        Call this after a cold start-up, before running the network.
+        """
+        self.cycle = 0
+        self.keyframes = {}
+        self.keyframe_cycles = []
+        self.required_keyframes = set()
+        self.skipped = []
+        self.history = bytearray()
+        self.history_version = None
+
+    def add_keyframe(self, required: bool = False) -> None:
+        """Add a keyframe of the devices at the current cycle.
+
+        Required keyframes are never dropped to save memory.
+        """
+        if self.cycle not in self.keyframes:
+            bisect.insort(self.keyframe_cycles, self.cycle)
+        self.keyframes[self.cycle] = self.devices.take_snapshot(self.cycle)
+        if required:
+            self.required_keyframes.add(self.cycle)
+
+        if len(self.keyframes) > self.max_keyframes:
+            self.keyframe_interval *= 2
+            self.keyframe_cycles = [
+                cycle for cycle in self.keyframe_cycles
+                if cycle % self.keyframe_interval == 0
+                or cycle in self.required_keyframes]
+            self.keyframes = {cycle: self.keyframes[cycle]
+                              for cycle in self.keyframe_cycles}
+
+    def get_snapshot(self, cycle: int) -> Optional[Snapshot]:
+        """Return a Snapshot of the devices after the specified cycle of the run.
+
+        The current state of the devices is left unchanged. Return None if the
+        cycle has not been simulated yet, or the network oscillates when
+        simulated again.
+        """
+        if not 0 <= cycle <= self.cycle or not self.keyframe_cycles:
+            return None
+
+        # A skipped cycle has the same state as a simulated cycle a whole
+        # number of periods earlier, apart from the RC counters
+        shift = 0
+        for start, end, period in self.skipped:
+            if start < cycle < end:
+                shift = -(-(cycle - start) // period) * period
+                break
+        simulated_cycle = cycle - shift
+
+        position = bisect.bisect_right(self.keyframe_cycles, simulated_cycle) - 1
+        if position < 0:
+            return None
+        keyframe_cycle = self.keyframe_cycles[position]
+
+        current = self.devices.take_snapshot(self.cycle)
+        if not self.devices.restore_snapshot(self.keyframes[keyframe_cycle]):
+            return None
+        for _ in range(simulated_cycle - keyframe_cycle):
+            if not self.network.execute_network():
+                self.devices.restore_snapshot(current)
+                return None
+        snapshot = self.devices.take_snapshot(cycle)
+        self.devices.restore_snapshot(current)
+
+        for position in range(len(snapshot.rc_counters)):
+            snapshot.rc_counters[position] += shift
+        return snapshot
+
+    def get_outputs(self, cycle: int) -> Optional[Dict[Tuple[int, Optional[int]], int]]:
+        """Return every output signal after the specified cycle of the run.
+
+        Return {(device_id, port_id): signal}, or None if the cycle has not
+        been simulated yet.
+        """
+        snapshot = self.get_snapshot(cycle)
+        if snapshot is None:
+            return None
+        ports = [(device.device_id, port_id)
+                 for device in self.devices.devices_list
+                 for port_id in device.outputs]
+        return dict(zip(ports, snapshot.outputs))
+
+    def update_history_ports(self) -> None:
+        """Index the outputs of the network, and discard the history if they changed."""
+        if self.history_version != self.devices.structure_version:
+            self.history_ports = [(device.device_id, port_id)
+                                  for device in self.devices.devices_list
+                                  for port_id in device.outputs]
+            self.history_positions = {port: position for position, port
+                                      in enumerate(self.history_ports)}
+            self.history_row_size = (len(self.history_ports) + 7) // 8
+            self.history_version = self.devices.structure_version
+            self.history = bytearray()
+            self.history_first_row = self.get_row(self.cycle)
+
+    def get_row(self, cycle: int) -> int:
+        """Return the number of the history row of a simulated cycle.
+
+        Rows count the simulated cycles of the run, which are all the cycles
+        but those skipped.
+        """
+        return cycle - sum(min(end, cycle) - start for start, end, _ in self.skipped
+                           if start < cycle)
+
+    def record_history(self) -> None:
+        """Record the level of every output as a new row of the history.
+
+        Nothing is recorded if the history budget is 0.
+        """
+        if not self.history_budget:
+            self.history = bytearray()
+            self.history_version = None
+            return
+        self.update_history_ports()
+        if not self.history_ports:
+            return
+
+        # Translate the signals to a string of binary digits, the first
+        # output being the least significant bit
+        signals = bytes([signal for device in self.devices.devices_list
+                         for signal in device.outputs.values()])
+        row = int(signals.translate(self.history_digits)[::-1], 2)
+        self.history += row.to_bytes(self.history_row_size, "little")
+        self.trim_history()
+
+    def trim_history(self) -> None:
+        """Discard the oldest rows of the history beyond the budget or window.
+
+        Once the rows take more than the history budget, or twice the history
+        window, the oldest are discarded to keep half the budget, or the
+        window, so recording a row takes constant time on average.
+        """
+        row_size = self.history_row_size
+        limit = self.history_budget // row_size
+        keep = limit // 2
+        window = self.monitors.get_history_window()
+        if window is not None and 2 * window < limit:
+            limit, keep = 2 * window, window
+        rows = len(self.history) // row_size
+        if rows > limit:
+            del self.history[:(rows - keep) * row_size]
+            self.history_first_row += rows - keep
+
+    def get_history_signals(self, device_id: int, port_id: Optional[int],
+                            start: int = 0) -> Optional[bytes]:
+        """Return the signals of the port from the start cycle of the run.
+
+        The port may be an input, which reads the output connected to it.
+        Skipped cycles repeat the signals of the period before them. The
+        signals of simulated cycles are read from the history, or simulated
+        again from the keyframes if their rows are not kept. Return None if
+        the port does not exist, or its signals cannot be found.
+        """
+        self.update_history_ports()
+        port = (device_id, port_id)
+        if port not in self.history_positions:
+            port = self.network.get_connected_output(device_id, port_id)
+        position = self.history_positions.get(port)
+        if position is None:
+            return None
+
+        signals = bytearray()
+        cycle = max(start, 0)
+        for span_start, span_end, period in self.skipped + [(self.cycle, self.cycle, 1)]:
+            if cycle < span_start:
+                simulated = self.get_simulated_signals(position, cycle, span_start)
+                if simulated is None:
+                    return None
+                signals += simulated
+                cycle = span_start
+            if cycle < span_end:
+                pattern = self.get_simulated_signals(position, span_start - period,
+                                                     span_start)
+                if pattern is None:
+                    return None
+                offset = (cycle - span_start) % period
+                count = span_end - cycle
+                signals += (pattern * -(-(offset + count) // period))[offset:offset + count]
+                cycle = span_end
+        return bytes(signals)
+
+    def get_simulated_signals(self, position: int, start: int, stop: int) -> Optional[bytes]:
+        """Return the signals of the output at position in history_ports, from
+        the start cycle up to the stop cycle, which are all simulated.
+
+        Return None if the signals of cycles without a history row cannot be
+        simulated again.
+        """
+        signals = bytearray()
+        first_row = self.get_row(start)
+        replay_stop = min(stop, start + max(self.history_first_row - first_row, 0))
+        if start < replay_stop:
+            replayed = self.replay_signals(position, start, replay_stop)
+            if replayed is None:
+                return None
+            signals += replayed
+
+        row_size = self.history_row_size
+        row = first_row + replay_stop - start - self.history_first_row
+        end_row = first_row + stop - start - self.history_first_row
+        if row < end_row:
+            column = self.history[row * row_size + position // 8:end_row * row_size:row_size]
+            shift = position % 8
+            # Translate each byte of the column to the level of the port's bit
+            levels = bytes(self.devices.HIGH if (byte >> shift) & 1 else self.devices.LOW
+                           for byte in range(256))
+            signals += column.translate(levels)
+        return bytes(signals)
+
+    def replay_signals(self, position: int, start: int, stop: int) -> Optional[bytes]:
+        """Return the signals of the output at position in history_ports, from
+        the start cycle up to the stop cycle, simulated again from the
+        keyframe before them.
+
+        The current state of the devices is left unchanged. Return None if
+        there is no keyframe to start from, or the network oscillates.
+        """
+        keyframe_position = bisect.bisect_right(self.keyframe_cycles, start) - 1
+        if keyframe_position < 0:
+            return None
+        keyframe_cycle = self.keyframe_cycles[keyframe_position]
+
+        current = self.devices.take_snapshot(self.cycle)
+        if not self.devices.restore_snapshot(self.keyframes[keyframe_cycle]):
+            return None
+        device_id, port_id = self.history_ports[position]
+        device = self.devices.get_device(device_id)
+        signals = bytearray()
+        for cycle in range(keyframe_cycle, stop):
+            if not self.network.execute_network():
+                self.devices.restore_snapshot(current)
+                return None
+            if cycle >= start:
+                signals.append(device.outputs[port_id])
+        self.devices.restore_snapshot(current)
+        return bytes(signals)
+
+    def backfill_monitor(self, device_id: int, port_id: Optional[int]) -> bool:
+        """Fill in the signals of a monitor made after the network was run.
+
+        The last recorded cycles of the monitor's trace, which were filled
+        with BLANK signals when it was made, are replaced by the recorded
+        signals of its port. Return True if successful.
+        """
+        trace = self.monitors.signals_dictionary.get((device_id, port_id))
+        if trace is None:
+            return False
+        # Only the cycles of the run still kept by the trace are filled in
+        offset = len(trace) - self.cycle
+        start = max(trace.get_first_cycle() - offset, 0)
+        signals = self.get_history_signals(device_id, port_id, start)
+        if signals is None:
+            return False
+        count = min(len(trace) - trace.get_first_cycle(), len(signals))
+        trace.truncate(len(trace) - count)
+        trace.extend(signals[len(signals) - count:])
+        return True
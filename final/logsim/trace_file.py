@@ -0,0 +1,395 @@
+"""Save and open the monitored traces in a binary columnar file.
+
+Used in the Logic Simulator project to store the traces of a run compactly,
+and to open them again instantly in analysis scripts and in the GUI.
+
+Classes
+-------
+TraceFile - reads the traces of a trace file, and writes trace files.
+FileTrace - reads the signals of a monitor from the column of a trace file.
+"""
+import json
+import lzma
+import mmap
+import struct
+import zlib
+from array import array
+from typing import Callable, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed to read columns as arrays
+    np = None
+
+from logsim.monitors import Monitors
+from logsim.traces import Trace, Signals
+
+
+class TraceFile:
+
+    """Read the traces of a trace file, and write trace files.
+
+    A trace file starts with a fixed prefix: a magic string, the format
+    version, and the offset and length of the header. The columns follow,
+    one per monitored port, with one int8 signal per cycle from the first
+    cycle kept by any trace. Each column is a series of chunks of
+    chunk_cycles cycles, which are stored as they are, or compressed with
+    zlib or lzma. The header is written last, as JSON: the cycles, the
+    compression, the signal levels, and the table of monitored ports, with
+    their identifiers and the offset and length of each chunk.
+
+    Uncompressed columns are contiguous, so they are read straight from the
+    memory-mapped file, or as numpy.memmap arrays, without parsing or
+    copying the signals. Compressed chunks are only decompressed when a
+    cycle within them is read.
+
+    Parameters
+    ----------
+    path: path of the trace file to open.
+
+    Public methods
+    --------------
+    write(monitors, path, compression=None, chunk_cycles=65536): Writes the
+                                  traces of the monitors to a trace file.
+
+    get_signals(self, identifier, start=0, stop=None): Returns the signals
+                                  of a monitor from the start cycle up to the
+                                  stop cycle.
+
+    get_column(self, identifier): Returns the signals of a monitor as a
+                                  NumPy array.
+
+    get_column_view(self, index): Returns the read-only view of the map
+                                  holding the column of port index.
+
+    load_monitors(self, monitors): Replaces the traces of the monitors with
+                                   those of the same identifiers in the file.
+
+    close(self): Closes the file, and unmaps it once no loaded trace reads
+                 it.
+    """
+
+    MAGIC = b"LOGSIMCT"
+    VERSION = 1
+    PREFIX = struct.Struct("<8sHqq")  # magic, version, header offset, length
+    COMPRESSORS = {None: None, "zlib": zlib, "lzma": lzma}
+
+    def __init__(self, path: str):
+        """Open the file and read its header.
+
+        Raise ValueError if the file is not a trace file.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            prefix = self.file.read(self.PREFIX.size)
+            if len(prefix) < self.PREFIX.size:
+                raise ValueError(f"'{path}' is not a trace file")
+            magic, version, header_offset, header_length = self.PREFIX.unpack(prefix)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"'{path}' is not a trace file")
+            self.file.seek(header_offset)
+            header = json.loads(self.file.read(header_length))
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError, struct.error):
+            self.file.close()
+            raise
+
+        self.first_cycle = header["first_cycle"]
+        self.cycles = header["cycles"]  # cycles recorded, from cycle 0
+        self.compression = header["compression"]
+        self.chunk_cycles = header["chunk_cycles"]
+        self.ports = header["ports"]  # [{"device", "port", "identifiers", "chunks"}]
+
+        # identifiers stores {identifier: index in ports}
+        self.identifiers = {identifier: index
+                            for index, port in enumerate(self.ports)
+                            for identifier in port["identifiers"]}
+
+    @classmethod
+    def write(cls, monitors: Monitors, path: str, compression: Optional[str] = None,
+              chunk_cycles: int = 65536) -> None:
+        """Write the traces of the monitors to a trace file.
+
+        compression is None, "zlib" or "lzma". The traces are read a chunk at
+        a time. Raise ValueError for an unknown compression.
+        """
+        if compression not in cls.COMPRESSORS:
+            raise ValueError(f"unknown compression '{compression}'")
+        compressor = cls.COMPRESSORS[compression]
+        names = monitors.names
+        traces = monitors.signals_dictionary
+        first_cycle = monitors.get_first_cycle()
+        cycles = max((len(trace) for trace in traces.values()), default=0)
+
+        ports = []
+        with open(path, "wb") as file:
+            file.write(bytes(cls.PREFIX.size))
+            for port in traces:
+                device_id, port_id = port
+                chunks = []
+                for start in range(first_cycle, cycles, chunk_cycles):
+                    chunk = monitors.get_trace_signals(
+                        port, start, min(start + chunk_cycles, cycles)).tobytes()
+                    if compressor is not None:
+                        chunk = compressor.compress(chunk)
+                    chunks.append([file.tell(), len(chunk)])
+                    file.write(chunk)
+                ports.append({
+                    "device": names.get_name_string(device_id),
+                    "port": None if port_id is None else names.get_name_string(port_id),
+                    "identifiers": sorted(monitors.port_to_identifier[port]),
+                    "chunks": chunks})
+
+            header = json.dumps({
+                "first_cycle": first_cycle, "cycles": cycles,
+                "compression": compression, "chunk_cycles": chunk_cycles,
+                "levels": {"LOW": monitors.devices.LOW, "HIGH": monitors.devices.HIGH,
+                           "RISING": monitors.devices.RISING,
+                           "FALLING": monitors.devices.FALLING,
+                           "BLANK": monitors.devices.BLANK},
+                "ports": ports}).encode()
+            header_offset = file.tell()
+            file.write(header)
+            file.seek(0)
+            file.write(cls.PREFIX.pack(cls.MAGIC, cls.VERSION, header_offset, len(header)))
+
+    def get_chunk(self, index: int, chunk: int) -> bytes:
+        """Return the signals of a chunk of the column of port index."""
+        offset, length = self.ports[index]["chunks"][chunk]
+        data = self.map[offset:offset + length]
+        if self.compression is not None:
+            data = self.COMPRESSORS[self.compression].decompress(data)
+        return data
+
+    def get_signals(self, identifier: str, start: int = 0,
+                    stop: Optional[int] = None) -> array:
+        """Return the signals of a monitor from the start cycle up to the stop cycle.
+
+        Cycles count from 0, and cycles before the first cycle of the file
+        are not returned. Raise KeyError if the identifier is not in the file.
+        """
+        index = self.identifiers[identifier]
+        start, stop, _ = slice(start, stop).indices(self.cycles)
+        start = max(start, self.first_cycle) - self.first_cycle
+        stop = stop - self.first_cycle
+        signals = array("b")
+        if start >= stop:
+            return signals
+
+        if self.compression is None:  # the chunks are contiguous
+            offset = self.ports[index]["chunks"][0][0]
+            signals.frombytes(self.map[offset + start:offset + stop])
+            return signals
+        for chunk in range(start // self.chunk_cycles,
+                           (stop - 1) // self.chunk_cycles + 1):
+            chunk_start = chunk * self.chunk_cycles
+            data = self.get_chunk(index, chunk)
+            signals.frombytes(data[max(start - chunk_start, 0):stop - chunk_start])
+        return signals
+
+    def get_column(self, identifier: str):
+        """Return the signals of a monitor from the first cycle as a NumPy array.
+
+        Uncompressed columns are a read-only numpy.memmap of the file.
+        Raise KeyError if the identifier is not in the file.
+        """
+        if np is None:
+            raise ImportError("Reading trace file columns requires NumPy.")
+        index = self.identifiers[identifier]
+        length = self.cycles - self.first_cycle
+        if not length:
+            return np.zeros(0, dtype=np.int8)
+        if self.compression is None:
+            return np.memmap(self.path, dtype=np.int8, mode="r",
+                             offset=self.ports[index]["chunks"][0][0], shape=(length,))
+        return np.frombuffer(b"".join(self.get_chunk(index, chunk) for chunk
+                                      in range(len(self.ports[index]["chunks"]))),
+                             dtype=np.int8)
+
+    def get_column_view(self, index: int) -> memoryview:
+        """Return the read-only view of the map holding the column of port index.
+
+        The chunks of a column are written one after the other, so the view
+        spans them all.
+        """
+        chunks = self.ports[index]["chunks"]
+        view = memoryview(self.map).cast("b")
+        if not chunks:
+            return view[:0]
+        return view[chunks[0][0]:chunks[-1][0] + chunks[-1][1]]
+
+    def load_monitors(self, monitors: Monitors) -> List[str]:
+        """Replace the traces of the monitors with those of the same identifiers.
+
+        The traces are FileTrace views of the file's columns, so no signals
+        are copied until they are recorded again. The file can be closed,
+        and is unmapped once the traces are released. Return the identifiers
+        whose traces were loaded.
+        """
+        loaded = []
+        traces = monitors.signals_dictionary
+        for identifier, port in monitors.identifier_to_port.items():
+            if identifier not in self.identifiers:
+                continue
+            index = self.identifiers[identifier]
+            chunks = self.ports[index]["chunks"]
+            column_offset = chunks[0][0] if chunks else 0
+            traces[port] = FileTrace(
+                self.get_column_view(index),
+                [(offset - column_offset, length) for offset, length in chunks],
+                self.COMPRESSORS[self.compression], self.chunk_cycles,
+                self.first_cycle, self.cycles,
+                lambda signals, start, port=port: monitors.make_trace(port, signals, start))
+            loaded.append(identifier)
+        return loaded
+
+    def close(self) -> None:
+        """Close the file, and unmap it once no loaded trace reads it."""
+        try:
+            self.map.close()
+        except BufferError:
+            pass  # unmapped when the last view is released
+        self.file.close()
+
+
+class FileTrace(Trace):
+
+    """Read the signals of a monitor from the column of a trace file.
+
+    The trace reads the column through a view of the memory-mapped file:
+    the signals of an uncompressed column are returned as views of it,
+    without copying them, and a compressed chunk is only decompressed when
+    a cycle within it is read, the last one being kept. Cycles before the
+    first cycle of the file are not kept.
+
+    The trace is read-only. Once signals are recorded into it, or it is
+    truncated, its signals are first copied to a trace of the monitors'
+    store, made by make_trace, which then holds them.
+
+    Parameters
+    ----------
+    column: read-only view of signed bytes, holding the chunks of the column.
+    chunks: offset in column and length of every chunk of the column.
+    compressor: module decompressing the chunks, or None.
+    chunk_cycles: number of cycles in each chunk.
+    first_cycle: cycle of the first signal of the column.
+    length: number of cycles in the trace.
+    make_trace: returns a new trace holding signals from a start cycle.
+
+    Public methods
+    --------------
+    get_chunk(self, chunk): Returns the signals of a chunk of the column.
+
+    get_copy(self): Returns the trace of the monitors' store holding the
+                    signals, made when first needed.
+
+    See Trace for the other methods.
+    """
+
+    def __init__(self, column: memoryview, chunks: List[List[int]], compressor,
+                 chunk_cycles: int, first_cycle: int, length: int,
+                 make_trace: Callable[[Iterable[int], int], Trace]):
+        """Initialise the view of the column."""
+        self.column = column
+        self.chunks = chunks
+        self.compressor = compressor
+        self.chunk_cycles = chunk_cycles
+        self.first_cycle = first_cycle
+        self.length = length
+        self.make_trace = make_trace
+        self.cached_chunk = None  # (chunk, signals) of the last chunk decompressed
+        self.copy = None  # trace holding the signals once they are written
+
+    def get_chunk(self, chunk: int) -> Signals:
+        """Return the signals of a chunk of the column."""
+        offset, length = self.chunks[chunk]
+        if self.compressor is None:
+            return self.column[offset:offset + length]
+        if self.cached_chunk is None or self.cached_chunk[0] != chunk:
+            signals = array("b")
+            signals.frombytes(self.compressor.decompress(self.column[offset:offset + length]))
+            self.cached_chunk = (chunk, signals)
+        return self.cached_chunk[1]
+
+    def get_copy(self) -> Trace:
+        """Return the trace of the monitors' store holding the signals.
+
+        It is made when first needed, and the view of the file released.
+        """
+        if self.copy is None:
+            self.copy = self.make_trace(self.get_signals(), self.first_cycle)
+            self.column.release()
+            self.cached_chunk = None
+        return self.copy
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        if self.copy is not None:
+            return len(self.copy)
+        return self.length
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        self.get_copy().append(signal)
+
+    def extend(self, signals: Iterable[int]) -> None:
+        """Append the signals of the next cycles."""
+        self.get_copy().extend(signals)
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times."""
+        self.get_copy().repeat(period, repeats)
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        self.get_copy().truncate(cycle)
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        if self.copy is not None:
+            return self.copy.get_signal(cycle)
+        if cycle < 0:
+            cycle += self.length
+        if not self.first_cycle <= cycle < self.length:
+            raise IndexError("trace index out of range")
+        chunk, position = divmod(cycle - self.first_cycle, self.chunk_cycles)
+        return self.get_chunk(chunk)[position]
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> Signals:
+        """Return the signals from the start cycle up to the stop cycle.
+
+        The signals of an uncompressed column are a view of the file.
+        """
+        if self.copy is not None:
+            return self.copy.get_signals(start, stop)
+        start, stop, _ = slice(start, stop).indices(self.length)
+        start = max(start, self.first_cycle) - self.first_cycle
+        stop = max(stop - self.first_cycle, start)
+        if self.compressor is None:  # the chunks are contiguous
+            return self.column[start:stop]
+        signals = array("b")
+        if start >= stop:
+            return signals
+        for chunk in range(start // self.chunk_cycles,
+                           (stop - 1) // self.chunk_cycles + 1):
+            chunk_start = chunk * self.chunk_cycles
+            signals.extend(self.get_chunk(chunk)[max(start - chunk_start, 0):
+                                                 stop - chunk_start])
+        return signals
+
+    def get_first_cycle(self) -> int:
+        """Return the first cycle whose signal is kept."""
+        if self.copy is not None:
+            return self.copy.get_first_cycle()
+        return self.first_cycle
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals.
+
+        The column is only paged into memory, and the last chunk decompressed
+        is kept.
+        """
+        if self.copy is not None:
+            return self.copy.get_size()
+        return 0 if self.cached_chunk is None else len(self.cached_chunk[1])
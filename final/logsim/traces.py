@@ -0,0 +1,590 @@
+"""Store the signal traces recorded by the monitors.
+
+Used in the Logic Simulator project to store one signal per simulation cycle
+for every monitor, in a form suited to the length and activity of the run.
+
+Classes
+-------
+Trace - defines the interface shared by all the trace stores.
+ArrayTrace - stores every signal of the trace in a byte array.
+ChangeTrace - stores only the cycles at which the signal changes.
+RingTrace - stores the signals of a window of the most recent cycles.
+MappedTrace - stores every signal of the trace in a memory-mapped file.
+"""
+import mmap
+import struct
+from array import array
+from itertools import repeat
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Optional, Union
+
+# The signals read from a trace: an array("b"), or a read-only memoryview of
+# signed bytes, which is indexed, sliced, iterated and compared alike
+Signals = Union[array, memoryview]
+
+
+class Trace:
+
+    """Define the interface shared by all the trace stores.
+
+    A trace holds one signal per simulation cycle, numbered from 0. Readers
+    such as Monitors.display_signals() and the GUI canvas only use these
+    methods, so any trace store can be used by the monitors. Two traces are
+    equal if they hold the same signals, and a trace is equal to an
+    array("b") holding its signals. Like a sequence, a trace can be indexed
+    by cycle, or sliced to an array("b").
+
+    A trace may only keep the signals from its first cycle on. Cycles keep
+    their absolute numbers, so the length of the trace is the number of
+    cycles recorded, and reading the signals of earlier cycles returns the
+    signals from the first cycle on.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    append(self, signal): Appends the signal of the next cycle.
+
+    extend(self, signals): Appends the signals of the next cycles.
+
+    repeat(self, period, repeats): Appends the last period signals repeats
+                                   times.
+
+    truncate(self, cycle): Discards the signals after the specified cycle.
+
+    get_signal(self, cycle): Returns the signal at the specified cycle.
+
+    get_signals(self, start=0, stop=None): Returns the signals from the start
+                                           cycle up to the stop cycle.
+
+    get_first_cycle(self): Returns the first cycle whose signal is kept.
+
+    get_size(self): Returns the number of bytes of memory used by the
+                    signals.
+    """
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the signals of every cycle."""
+        return iter(self.get_signals())
+
+    def __getitem__(self, index):
+        """Return the signal at a cycle, or the signals of a slice of cycles."""
+        if isinstance(index, slice):
+            if index.step is not None and index.step != 1:
+                return self.get_signals()[index]
+            return self.get_signals(index.start or 0, index.stop)
+        return self.get_signal(index)
+
+    def __eq__(self, other) -> bool:
+        """Return True if the other trace or array holds the same signals."""
+        if isinstance(other, Trace):
+            other = other.get_signals()
+        return self.get_signals() == other
+
+    def __repr__(self) -> str:
+        """Return the class name and the signals of the trace."""
+        return f"{type(self).__name__}({self.get_signals().tolist()})"
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        raise NotImplementedError
+
+    def extend(self, signals: Iterable[int]) -> None:
+        """Append the signals of the next cycles."""
+        for signal in signals:
+            self.append(signal)
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times."""
+        self.extend(self.get_signals(len(self) - period) * repeats)
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        raise NotImplementedError
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        raise NotImplementedError
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> Signals:
+        """Return the signals from the start cycle up to the stop cycle.
+
+        Return a buffer of Signals, with one signal per cycle. It may be a
+        view of the trace, so callers which keep or change the signals copy
+        them with array("b", signals).
+        """
+        raise NotImplementedError
+
+    def get_first_cycle(self) -> int:
+        """Return the first cycle whose signal is kept."""
+        return 0
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals."""
+        raise NotImplementedError
+
+
+class ArrayTrace(Trace):
+
+    """Store every signal of the trace in a byte array.
+
+    Each cycle takes one byte, and the array grows geometrically as signals
+    are appended. This is the fastest store to record and read, and the
+    default store of the monitors.
+
+    Parameters
+    ----------
+    signals: initial signals of the trace (optional).
+
+    Public methods
+    --------------
+    See Trace.
+    """
+
+    def __init__(self, signals: Iterable[int] = ()):
+        """Initialise the byte array."""
+        self.signals = array("b", signals)
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        return len(self.signals)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the signals of every cycle, without copying them."""
+        return iter(self.signals)
+
+    def __getitem__(self, index):
+        """Return the signal at a cycle, or the signals of a slice of cycles."""
+        return self.signals[index]
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        self.signals.append(signal)
+
+    def extend(self, signals: Iterable[int]) -> None:
+        """Append the signals of the next cycles."""
+        self.signals.extend(signals)
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times."""
+        self.signals.extend(self.signals[-period:] * repeats)
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        del self.signals[cycle:]
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        return self.signals[cycle]
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> array:
+        """Return the signals from the start cycle up to the stop cycle."""
+        return self.signals[start:stop]
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals."""
+        return self.signals.buffer_info()[1] * self.signals.itemsize
+
+
+class ChangeTrace(Trace):
+
+    """Store only the cycles at which the signal changes.
+
+    Like a VCD file, the trace is stored as change events: the cycles at
+    which the signal takes a new value, and the values. Memory is then
+    proportional to the number of changes rather than the length of the run.
+    The signal at a cycle is found by a binary search of the change cycles,
+    and a range of signals is built one run of equal signals at a time.
+
+    Parameters
+    ----------
+    signals: initial signals of the trace (optional).
+
+    Public methods
+    --------------
+    See Trace.
+    """
+
+    def __init__(self, signals: Iterable[int] = ()):
+        """Initialise the change events as empty."""
+        self.change_cycles = array("q")  # cycles at which the signal changes
+        self.change_signals = array("b")  # signals from those cycles on
+        self.length = 0
+        self.extend(signals)
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        return self.length
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the signals of every cycle, one run at a time."""
+        ends = self.change_cycles[1:].tolist() + [self.length]
+        for cycle, end, signal in zip(self.change_cycles, ends, self.change_signals):
+            yield from repeat(signal, end - cycle)
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        if not self.change_signals or self.change_signals[-1] != signal:
+            self.change_cycles.append(self.length)
+            self.change_signals.append(signal)
+        self.length += 1
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times.
+
+        Only the changes within the period are repeated, so this takes time
+        proportional to the number of changes appended.
+        """
+        period = min(period, self.length)  # as a slice of the last cycles
+        if period == 0:
+            return
+        start = self.length - period
+        first = bisect_right(self.change_cycles, start)
+        # The signal at the start of the period, then the changes within it
+        events = [(start, self.change_signals[first - 1])]
+        events.extend(zip(self.change_cycles[first:], self.change_signals[first:]))
+        if len(events) == 1:  # the signal is constant over the period
+            self.length += period * repeats
+            return
+        for offset in range(period, period * (repeats + 1), period):
+            for cycle, signal in events:
+                if self.change_signals[-1] != signal:
+                    self.change_cycles.append(cycle + offset)
+                    self.change_signals.append(signal)
+        self.length += period * repeats
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        if cycle < self.length:
+            position = bisect_left(self.change_cycles, max(cycle, 0))
+            del self.change_cycles[position:]
+            del self.change_signals[position:]
+            self.length = max(cycle, 0)
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        if cycle < 0:
+            cycle += self.length
+        if not 0 <= cycle < self.length:
+            raise IndexError("trace index out of range")
+        return self.change_signals[bisect_right(self.change_cycles, cycle) - 1]
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> array:
+        """Return the signals from the start cycle up to the stop cycle."""
+        start, stop, _ = slice(start, stop).indices(self.length)
+        signals = array("b")
+        if start >= stop:
+            return signals
+        position = bisect_right(self.change_cycles, start) - 1
+        cycle = start
+        while cycle < stop:
+            position += 1
+            if position < len(self.change_cycles):
+                run_end = min(self.change_cycles[position], stop)
+            else:
+                run_end = stop
+            signals.extend(array("b", [self.change_signals[position - 1]])
+                           * (run_end - cycle))
+            cycle = run_end
+        return signals
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals."""
+        return (len(self.change_cycles) * self.change_cycles.itemsize
+                + len(self.change_signals) * self.change_signals.itemsize)
+
+
+class RingTrace(Trace):
+
+    """Store the signals of a window of the most recent cycles.
+
+    The signals are kept in a ring buffer of window bytes, the signal of
+    cycle c being at position c % window, so memory stays constant however
+    long the simulation runs. Cycles keep their absolute numbers: the signals
+    of the cycles before get_first_cycle() are discarded.
+
+    Parameters
+    ----------
+    signals: initial signals of the trace (optional).
+    window: number of most recent cycles to keep.
+    start: cycle of the first initial signal (optional).
+
+    Public methods
+    --------------
+    See Trace.
+    """
+
+    def __init__(self, signals: Iterable[int] = (), window: int = 1000,
+                 start: int = 0):
+        """Initialise the ring buffer."""
+        if window < 1:
+            raise ValueError("window must be at least one cycle")
+        self.window = window
+        self.buffer = array("b", bytes(window))
+        self.first_cycle = start  # cycles [first_cycle, length) are kept
+        self.length = start
+        self.extend(signals)
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        return self.length
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        self.buffer[self.length % self.window] = signal
+        self.length += 1
+        if self.length - self.first_cycle > self.window:
+            self.first_cycle += 1
+
+    def extend(self, signals: Iterable[int]) -> None:
+        """Append the signals of the next cycles."""
+        signals = array("b", signals)
+        count = len(signals)
+        if count > self.window:
+            signals = signals[-self.window:]
+        # Write the signals kept in at most two slices of the ring
+        position = (self.length + count - len(signals)) % self.window
+        split = min(len(signals), self.window - position)
+        self.buffer[position:position + split] = signals[:split]
+        self.buffer[:len(signals) - split] = signals[split:]
+        self.length += count
+        self.first_cycle = max(self.first_cycle, self.length - self.window)
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times.
+
+        Only the signals which stay in the window are written. If the period
+        is longer than the window, the discarded signals of the period are
+        repeated as those of its first kept cycle.
+        """
+        period = min(period, self.length)
+        if period == 0:
+            return
+        pattern = self.get_signals(self.length - period)
+        if len(pattern) < period:
+            pattern = array("b", [pattern[0]]) * (period - len(pattern)) + pattern
+        count = min(period * repeats, self.window)
+        phase = (period * repeats - count) % period
+        signals = pattern[phase:] + pattern * (-(-(count - period + phase) // period))
+        self.length += period * repeats - count
+        self.first_cycle = max(self.first_cycle, self.length - self.window)
+        self.extend(signals[:count])
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        cycle = max(cycle, 0)
+        if cycle < self.length:
+            self.length = cycle
+            self.first_cycle = min(self.first_cycle, cycle)
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        if cycle < 0:
+            cycle += self.length
+        if not self.first_cycle <= cycle < self.length:
+            raise IndexError("trace index out of range")
+        return self.buffer[cycle % self.window]
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> array:
+        """Return the signals from the start cycle up to the stop cycle."""
+        start, stop, _ = slice(start, stop).indices(self.length)
+        start = max(start, self.first_cycle)
+        if start >= stop:
+            return array("b")
+        position = start % self.window
+        end = position + stop - start
+        if end <= self.window:
+            return self.buffer[position:end]
+        return self.buffer[position:] + self.buffer[:end - self.window]
+
+    def get_first_cycle(self) -> int:
+        """Return the first cycle whose signal is kept."""
+        return self.first_cycle
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals."""
+        return self.window
+
+
+class MappedTrace(Trace):
+
+    """Store every signal of the trace in a memory-mapped file.
+
+    The file holds a header, with the number of cycles recorded, followed by
+    one byte per cycle. It is mapped into memory, so the operating system
+    pages the signals in and out as they are read and written: traces much
+    larger than the memory only take disk space, and reading a range of
+    cycles only reads the pages holding it. The file grows geometrically as
+    signals are appended.
+
+    The signals are read as views of the map, so reading them copies nothing.
+    The header is updated with every signal, so the file can be opened again
+    with MappedTrace.load() to read the trace or to continue recording it,
+    even if the program was stopped during a run.
+
+    Parameters
+    ----------
+    path: path of the file, which is created or overwritten.
+    signals: initial signals of the trace (optional).
+
+    Public methods
+    --------------
+    load(path): Returns the trace stored in an existing file.
+
+    release(self): Drops the map, and returns True if it is unmapped.
+
+    close(self): Unmaps the file, and truncates it to the signals recorded.
+
+    See Trace for the other methods.
+    """
+
+    MAGIC = b"LOGSIMTR"
+    HEADER = struct.Struct("<8sq")  # magic, number of cycles
+    INITIAL_CAPACITY = 4096
+    BLOCK_SIZE = 2 ** 20  # signals written at once by repeat()
+
+    def __init__(self, path: str, signals: Iterable[int] = ()):
+        """Create the file and map it into memory."""
+        self.path = path
+        self.length = 0
+        self.capacity = 0
+        self.map = None
+        with open(path, "wb"):
+            pass
+        self.resize(self.INITIAL_CAPACITY)
+        self.extend(signals)
+
+    @classmethod
+    def load(cls, path: str) -> "MappedTrace":
+        """Return the trace stored in an existing file, to read or extend.
+
+        Raise ValueError if the file is not a trace file.
+        """
+        trace = cls.__new__(cls)
+        trace.path = path
+        trace.map = None
+        with open(path, "rb") as file:
+            magic, length = cls.HEADER.unpack(file.read(cls.HEADER.size).ljust(
+                cls.HEADER.size, b"\0"))
+            file.seek(0, 2)
+            capacity = file.tell() - cls.HEADER.size
+        if magic != cls.MAGIC or not 0 <= length <= capacity:
+            raise ValueError(f"'{path}' is not a trace file")
+        trace.length = length
+        trace.capacity = capacity
+        trace.resize(max(capacity, cls.INITIAL_CAPACITY))
+        return trace
+
+    def resize(self, capacity: int) -> None:
+        """Grow the file to hold capacity signals, and map it again."""
+        self.release()
+        with open(self.path, "r+b") as file:
+            file.truncate(self.HEADER.size + capacity)
+            self.map = mmap.mmap(file.fileno(), 0)
+        self.capacity = capacity
+        self.HEADER.pack_into(self.map, 0, self.MAGIC, self.length)
+
+    def release(self) -> bool:
+        """Drop the map, and return True if it is unmapped.
+
+        A map still viewed by signals returned by get_signals() is only
+        unmapped once the views are released.
+        """
+        if self.map is None:
+            return True
+        try:
+            self.map.close()
+        except BufferError:
+            self.map = None
+            return False
+        self.map = None
+        return True
+
+    def close(self) -> None:
+        """Unmap the file, and truncate it to the signals recorded.
+
+        The file is not truncated under views still in use, as reading them
+        past its end would fail, and MappedTrace.load() ignores the rest.
+        """
+        if self.map is not None and self.release():
+            with open(self.path, "r+b") as file:
+                file.truncate(self.HEADER.size + self.length)
+
+    def __len__(self) -> int:
+        """Return the number of cycles in the trace."""
+        return self.length
+
+    def append(self, signal: int) -> None:
+        """Append the signal of the next cycle."""
+        if self.length == self.capacity:
+            self.resize(2 * self.capacity)
+        self.map[self.HEADER.size + self.length] = signal
+        self.length += 1
+        self.HEADER.pack_into(self.map, 0, self.MAGIC, self.length)
+
+    def extend(self, signals: Iterable[int]) -> None:
+        """Append the signals of the next cycles."""
+        signals = array("b", signals)
+        if self.length + len(signals) > self.capacity:
+            capacity = self.capacity
+            while self.length + len(signals) > capacity:
+                capacity *= 2
+            self.resize(capacity)
+        position = self.HEADER.size + self.length
+        self.map[position:position + len(signals)] = signals.tobytes()
+        self.length += len(signals)
+        self.HEADER.pack_into(self.map, 0, self.MAGIC, self.length)
+
+    def repeat(self, period: int, repeats: int) -> None:
+        """Append the last period signals of the trace, repeats times.
+
+        The signals are written in blocks of whole periods, so memory stays
+        bounded however many cycles are appended.
+        """
+        pattern = array("b", self.get_signals(self.length - period))
+        if not pattern:
+            return
+        block = pattern * max(1, self.BLOCK_SIZE // len(pattern))
+        remaining = len(pattern) * repeats
+        while remaining:
+            count = min(remaining, len(block))
+            self.extend(block[:count])
+            remaining -= count
+
+    def truncate(self, cycle: int) -> None:
+        """Discard the signals after the specified cycle."""
+        if cycle < self.length:
+            self.length = max(cycle, 0)
+            self.HEADER.pack_into(self.map, 0, self.MAGIC, self.length)
+
+    def get_signal(self, cycle: int) -> int:
+        """Return the signal at the specified cycle."""
+        if cycle < 0:
+            cycle += self.length
+        if not 0 <= cycle < self.length:
+            raise IndexError("trace index out of range")
+        return self.map[self.HEADER.size + cycle]
+
+    def get_signals(self, start: int = 0, stop: Optional[int] = None) -> Signals:
+        """Return the signals from the start cycle up to the stop cycle.
+
+        Return a read-only view of the map, so no signals are copied, and
+        only the pages of the file holding the cycles are read when it is.
+        """
+        start, stop, _ = slice(start, stop).indices(self.length)
+        stop = max(start, stop)
+        view = memoryview(self.map).toreadonly().cast("b")
+        return view[self.HEADER.size + start:self.HEADER.size + stop]
+
+    def get_size(self) -> int:
+        """Return the number of bytes of memory used by the signals.
+
+        The signals are stored in the file, and only paged into memory.
+        """
+        return 0
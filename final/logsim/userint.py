@@ -13,6 +13,8 @@ from logsim.names import Names
 from logsim.devices import Devices
 from logsim.monitors import Monitors
 from logsim.network import Network
+from logsim.cold_start_sweep import ColdStartSweep
+from logsim.simulator import Simulator
 
 
 class UserInterface:
@@ -70,6 +72,16 @@ class UserInterface:
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
+
+    sweep_command(self): Runs many seeded cold start-ups and reports the
+                         monitors which depend on the start-up state.
+
+    outputs_command(self): Prints every output at a past cycle of the run.
+
+    get_device_names(self, device_ids): Returns the device names, separated
+                                        by commas.
+
+    report_loops(self): Prints the feedback loops in the network.
     """
 
     def __init__(self, names: Names, devices: Devices, network: Network, monitors: Monitors):
@@ -78,6 +90,7 @@ class UserInterface:
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        self.simulator = Simulator(names, devices, network, monitors)
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
@@ -89,6 +102,7 @@ class UserInterface:
         """Read the command entered and call the corresponding function."""
         print("Logic Simulator: interactive command line user interface.\n"
               "Enter 'h' for help.")
+        self.report_loops()
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
@@ -104,6 +118,10 @@ class UserInterface:
                 self.run_command()
             elif command == "c":
                 self.continue_command()
+            elif command == "x":
+                self.sweep_command()
+            elif command == "o":
+                self.outputs_command()
             else:
                 print("Invalid command. Enter 'h' for help.")
             self.get_line()  # get the user entry
@@ -237,6 +255,9 @@ class UserInterface:
         print("m I:X     - set a monitor on signal X by identifier I "
               "(identifier: device_name OR device_name.port_number)")
         print("z X       - zap the monitor on signal X")
+        print("x N S     - run S cold start-ups for N cycles and report "
+              "the monitors which differ")
+        print("o N       - show every output at cycle N of the run")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -259,6 +280,8 @@ class UserInterface:
             monitor_error = self.monitors.make_monitor(device, port, identifier,
                                                        self.cycles_completed)
             if monitor_error == self.monitors.NO_ERROR:
+                # Fill in the cycles already run from the recorded history
+                self.simulator.backfill_monitor(device, port)
                 print("Successfully made monitor.")
             else:
                 print("Error! Could not make monitor.")
@@ -278,12 +301,14 @@ class UserInterface:
 
         Return True if successful.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        if not self.simulator.run_cycles(cycles):
+            print("Error! Network oscillating.")
+            if self.network.oscillation_period is not None:
+                print(f"Oscillation period: {self.network.oscillation_period} "
+                      "iterations")
+            for loop in self.network.find_oscillating_devices():
+                print("Oscillating loop: " + self.get_device_names(loop))
+            return False
         self.monitors.display_signals()
         return True
 
@@ -296,6 +321,7 @@ class UserInterface:
             self.monitors.reset_monitors()
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
+            self.simulator.start_run()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
 
@@ -309,3 +335,44 @@ class UserInterface:
                 self.cycles_completed += cycles
                 print(" ".join(["Continuing for", str(cycles), "cycles.",
                                 "Total:", str(self.cycles_completed)]))
+
+    def sweep_command(self) -> None:
+        """Run many seeded cold start-ups and report the differing monitors."""
+        cycles = self.read_number(0, None)
+        if cycles is not None:
+            seed_count = self.read_number(1, None)
+            if seed_count is not None:
+                print(" ".join(["Sweeping", str(seed_count), "cold start-ups of",
+                                str(cycles), "cycles"]))
+                sweep = ColdStartSweep(self.names, self.devices, self.network,
+                                       self.monitors)
+                sweep.run_sweep(range(seed_count), cycles)
+                for line in sweep.get_report():
+                    print(line)
+
+    def outputs_command(self) -> None:
+        """Print every output at the specified cycle of the run."""
+        cycle = self.read_number(0, self.simulator.cycle)
+        if cycle is not None:
+            outputs = self.simulator.get_outputs(cycle)
+            if outputs is None:
+                print("Error! Nothing to show. Run first.")
+                return
+            print(" ".join(["Outputs at cycle", str(cycle)]))
+            for (device_id, port_id), signal in outputs.items():
+                signal_name = self.devices.get_signal_name(device_id, port_id)
+                print(" ".join([signal_name, "=",
+                                str(self.network.signal_level(signal))]))
+
+    def get_device_names(self, device_ids: List[int]) -> str:
+        """Return the names of the devices, separated by commas."""
+        return ", ".join(self.names.get_name_string(device_id)
+                         for device_id in device_ids)
+
+    def report_loops(self) -> None:
+        """Print the feedback loops in the network."""
+        combinational_loops, sequential_loops = self.network.get_loops()
+        for loop in combinational_loops:
+            print("Warning: combinational loop: " + self.get_device_names(loop))
+        for loop in sequential_loops:
+            print("Loop broken by D-types: " + self.get_device_names(loop))
@@ -0,0 +1,213 @@
+"""Write the monitored signals to Value Change Dump (VCD) files.
+
+Used in the Logic Simulator project to open the simulated traces in standard
+waveform viewers, and to feed them to other tools.
+
+Classes
+-------
+VcdWriter - writes the signals of the monitors to a VCD file.
+"""
+from typing import List, Optional, Tuple
+
+from logsim.monitors import Monitors
+
+
+class VcdWriter:
+
+    """Write the signals of the monitors to a VCD file.
+
+    Every monitor identifier in Monitors.identifier_to_port is a one-bit wire
+    of the dump, and identifiers of the same port share its identifier code.
+    Each simulation cycle is one time unit. LOW and HIGH are written as 0 and
+    1, RISING and FALLING, which are not settled levels, as x (unknown), and
+    BLANK, where no signal was recorded, as z (undriven).
+
+    The writer can stream the cycles as they are simulated, when added to
+    Monitors.writers: the monitors pass it each block of buffered signals,
+    and each skipped period, so whole traces are never held in memory. It
+    can also export the traces already recorded, reading them a block of
+    cycles at a time. Only the monitors present when the header is written
+    are dumped, and the dump cannot go back to an earlier cycle: when the
+    monitors are reset for a new run, the writer is restarted, and the file
+    holds the new run only.
+
+    Parameters
+    ----------
+    monitors: instance of the monitors.Monitors() class.
+    path: path of the VCD file, which is created or overwritten.
+
+    Public methods
+    --------------
+    write_header(self, cycle=0): Writes the definitions of the monitors, with
+                                 the dump starting at the specified cycle.
+
+    write_rows(self, ports, rows): Writes the cycles of a block of signals.
+
+    repeat_rows(self, ports, rows, repeats): Writes a period of signals
+                                             repeats times.
+
+    write_traces(self): Writes the signals recorded in the monitors' traces.
+
+    restart(self, cycle=0): Discards the dump written so far, and writes the
+                            header again.
+
+    close(self): Writes the end time of the dump and closes the file.
+    """
+
+    BLOCK_SIZE = 4096  # cycles read from the traces at once
+
+    def __init__(self, monitors: Monitors, path: str):
+        """Open the file, and initialise the identifier codes."""
+        self.monitors = monitors
+        self.devices = devices = monitors.devices
+        self.file = open(path, "w")
+
+        # value_table translates each signal to its VCD value
+        self.value_table = bytes.maketrans(
+            bytes([devices.LOW, devices.HIGH, devices.RISING, devices.FALLING,
+                   devices.BLANK]), b"01xxz")
+
+        self.ports = []  # monitored ports, in the order of their codes
+        self.codes = []  # identifier code of each port
+        self.values = None  # last VCD value of each port, as bytes
+        self.cycle = 0  # next cycle to be written
+
+        # positions of self.ports in the rows of the last ports written
+        self.row_ports = None
+        self.positions = []
+
+    def get_code(self, index: int) -> str:
+        """Return the identifier code of the port at index, from '!' up to '~'."""
+        code = ""
+        index += 1
+        while index:
+            index, digit = divmod(index - 1, 94)
+            code = chr(33 + digit) + code
+        return code
+
+    def write_header(self, cycle: int = 0) -> None:
+        """Write the definitions of the monitors, with the dump starting at cycle."""
+        self.cycle = cycle
+        self.ports = []
+        self.codes = []
+        for identifier, port in self.monitors.identifier_to_port.items():
+            if port not in self.ports:
+                self.ports.append(port)
+                self.codes.append(self.get_code(len(self.codes)))
+        self.values = None
+        self.row_ports = None
+
+        lines = ["$comment Logic Simulator monitor traces $end",
+                 "$timescale 1 ns $end",
+                 "$scope module logsim $end"]
+        for identifier, port in self.monitors.identifier_to_port.items():
+            code = self.codes[self.ports.index(port)]
+            lines.append(f"$var wire 1 {code} {identifier} $end")
+        lines.extend(["$upscope $end", "$enddefinitions $end", ""])
+        self.file.write("\n".join(lines))
+
+    def get_values(self, ports: List[Tuple[int, Optional[int]]], rows: bytes) -> List[bytes]:
+        """Return the VCD values of the header's ports for every row of signals.
+
+        Ports of the header missing from the rows keep their last value.
+        """
+        if ports != self.row_ports:
+            self.row_ports = list(ports)
+            self.positions = [ports.index(port) if port in ports else None
+                              for port in self.ports]
+        row_size = len(ports)
+        rows = rows.translate(self.value_table)
+        if ports == self.ports:
+            return [rows[start:start + row_size]
+                    for start in range(0, len(rows), row_size)]
+
+        last_values = self.values or b"x" * len(self.ports)
+        values = []
+        for start in range(0, len(rows), row_size):
+            row = rows[start:start + row_size]
+            values.append(bytes(last_values[index] if position is None else row[position]
+                                for index, position in enumerate(self.positions)))
+        return values
+
+    def get_changes(self, previous: Optional[bytes], values: bytes) -> str:
+        """Return the value changes from the previous values to the values."""
+        codes = self.codes
+        if previous is None:
+            return "".join(f"{chr(value)}{code}\n" for value, code in zip(values, codes))
+        return "".join(f"{chr(value)}{codes[index]}\n"
+                       for index, (value, last) in enumerate(zip(values, previous))
+                       if value != last)
+
+    def write_rows(self, ports: List[Tuple[int, Optional[int]]], rows: bytes) -> None:
+        """Write the cycles of a block of signals, one row of ports per cycle."""
+        if not ports or not self.ports:
+            return
+        write = self.file.write
+        for values in self.get_values(ports, rows):
+            if values != self.values:
+                write(f"#{self.cycle}\n{self.get_changes(self.values, values)}")
+                self.values = values
+            self.cycle += 1
+
+    def repeat_rows(self, ports: List[Tuple[int, Optional[int]]], rows: bytes,
+                    repeats: int) -> None:
+        """Write a period of signals, one row of ports per cycle, repeats times.
+
+        The changes of one period are found once, and written again at the
+        time of each period.
+        """
+        if not ports or not self.ports or not repeats:
+            return
+        period = len(rows) // len(ports)
+        self.write_rows(ports, rows)
+
+        # After the first period, each period starts from its own last values
+        values = self.get_values(ports, rows)
+        changes = []
+        for offset, row in enumerate(values):
+            previous = values[offset - 1]
+            if row != previous:
+                changes.append((offset, self.get_changes(previous, row)))
+        if changes:
+            write = self.file.write
+            for start in range(self.cycle, self.cycle + period * (repeats - 1), period):
+                for offset, text in changes:
+                    write(f"#{start + offset}\n{text}")
+        self.cycle += period * (repeats - 1)
+
+    def write_traces(self) -> None:
+        """Write the header and the signals recorded in the monitors' traces.
+
+        The traces are read a block of cycles at a time. Traces which do not
+        keep their first cycles are written from the first cycle kept by any
+        trace, with the missing cycles BLANK.
+        """
+        traces = self.monitors.signals_dictionary
+        first_cycle = self.monitors.get_first_cycle()
+        self.write_header(first_cycle)
+        ports = list(traces)
+        length = max((len(trace) for trace in traces.values()), default=0)
+        for start in range(first_cycle, length, self.BLOCK_SIZE):
+            stop = min(start + self.BLOCK_SIZE, length)
+            rows = bytearray((stop - start) * len(ports))
+            for position, port in enumerate(ports):
+                rows[position::len(ports)] = self.monitors.get_trace_signals(
+                    port, start, stop).tobytes()
+            self.write_rows(ports, bytes(rows))
+
+    def restart(self, cycle: int = 0) -> None:
+        """Discard the dump written so far, and write the header again.
+
+        The dump then starts at the specified cycle, so that a new run does
+        not continue the timeline of the previous one.
+        """
+        if not self.file.closed:
+            self.file.seek(0)
+            self.file.truncate()
+            self.write_header(cycle)
+
+    def close(self) -> None:
+        """Write the end time of the dump and close the file."""
+        if not self.file.closed:
+            self.file.write(f"#{self.cycle}\n")
+            self.file.close()
@@ -0,0 +1,332 @@
+"""Execute the network with NumPy array operations.
+
+Used in the Logic Simulator project to simulate very large networks, by
+evaluating whole groups of devices at once instead of one device at a time.
+
+Classes
+-------
+VectorizedNetwork - executes the network with vectorized array operations.
+"""
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for this engine
+    np = None
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.compiled_network import CompiledNetwork
+
+
+class VectorizedNetwork(CompiledNetwork):
+
+    """Execute the network with vectorized array operations.
+
+    All output signals are stored in a NumPy int8 array, followed by two
+    constant slots holding LOW and HIGH. Each settle iteration executes the
+    same phases as Network.execute_network(), but evaluates each phase with a
+    few array operations: switches, D-types, clocks and RCs as masked updates,
+    and each level of gates as an all/any reduction over a fan-in index
+    matrix, padded with the constant slot equal to the gate's x value.
+
+    Devices within a phase are updated simultaneously rather than one after
+    another. This gives the same signals only where no device in the phase
+    reads the output of another: switches, clocks and RCs have no such
+    inputs, and the gates of one level only read earlier levels. D-types
+    which read, or drive, the outputs of other D-types, and gates in
+    feedback loops, are still executed one after another, in the order of
+    Network.execute_network().
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    compile(self): Compiles the network into flat and vectorized arrays.
+
+    load_state(self): Loads the network state from the Device objects.
+
+    store_state(self): Writes the changed network state back to the Device
+                       objects.
+
+    execute_network(self): Executes all the devices in the network for one
+                           simulation cycle.
+    """
+
+    def __init__(self, names: Names, devices: Devices, network: Network):
+        """Initialise the lookup tables used by the array operations."""
+        if np is None:
+            raise ImportError("The vectorized engine requires NumPy.")
+        super().__init__(names, devices, network)
+
+        self.transition_table = np.array(self.transitions, dtype=np.int8)
+        self.level_table = np.array(self.levels, dtype=np.int8)
+
+        self.low_slot = 0  # constant slots, after the output slots
+        self.high_slot = 1
+
+        empty = np.zeros(0, dtype=np.intp)
+        self.switch_indices = empty
+        self.switch_slots = empty
+        self.dtype_indices = empty
+        self.dtype_q_slots = empty
+        self.dtype_input_slots = np.zeros((0, 4), dtype=np.intp)
+        self.parallel_dtypes = empty  # positions of the D-types updated at once
+        self.parallel_q_slots = empty
+        self.parallel_input_slots = np.zeros((0, 4), dtype=np.intp)
+
+        # chained_dtypes stores (position, Q slot, CLK, SET, CLEAR and DATA
+        # slots) of the D-types connected to other D-types, in execution order
+        self.chained_dtypes = []
+        self.clock_slots = empty
+        self.rc_slots = empty
+        self.feedback_indices = []
+
+        # gate_groups stores, for each level of gates,
+        # (gate_slots, gate_fanin, gate_x, gate_y, xor_slots, xor_fanin)
+        self.gate_groups = []
+
+        self.stored_signals = np.zeros(0, dtype=np.int8)
+        self.stored_memory = np.zeros(0, dtype=np.int8)
+
+    def compile(self) -> bool:
+        """Compile the network into flat and vectorized arrays.
+
+        Return True if successful, or False if an input is unconnected.
+        """
+        if not super().compile():
+            return False
+
+        slot_count = len(self.slot_ports)
+        self.low_slot = slot_count + self.LOW
+        self.high_slot = slot_count + self.HIGH
+
+        def indices_of_kind(kind: int) -> List[int]:
+            return [index for index, device_kind in enumerate(self.kinds)
+                    if device_kind == kind]
+
+        def output_slots(indices: List[int]) -> np.ndarray:
+            return np.array([self.output_start[index] for index in indices],
+                            dtype=np.intp)
+
+        self.switch_indices = np.array(indices_of_kind(self.SWITCH),
+                                       dtype=np.intp)
+        self.switch_slots = output_slots(self.switch_indices)
+
+        # D-type inputs are compiled in the order CLK, SET, CLEAR, DATA
+        self.dtype_indices = np.array(indices_of_kind(self.D_TYPE),
+                                      dtype=np.intp)
+        self.dtype_q_slots = output_slots(self.dtype_indices)
+        self.dtype_input_slots = np.array(
+            [self.fanin[self.fanin_start[index]:self.fanin_start[index + 1]]
+             for index in self.dtype_indices], dtype=np.intp).reshape(-1, 4)
+
+        # D-types connected to other D-types depend on the order in which
+        # they are updated, so they are executed one after another
+        q_slots = self.dtype_q_slots.tolist()
+        input_slots = self.dtype_input_slots.tolist()
+        dtype_output_slots = set(q_slots) | {slot + 1 for slot in q_slots}
+        dtype_input_slots = {slot for slots in input_slots for slot in slots}
+        chained = [position for position, q_slot in enumerate(q_slots)
+                   if dtype_output_slots.intersection(input_slots[position])
+                   or q_slot in dtype_input_slots
+                   or q_slot + 1 in dtype_input_slots]
+        self.chained_dtypes = [(position, q_slots[position], *input_slots[position])
+                               for position in chained]
+        chained = set(chained)
+        self.parallel_dtypes = np.array(
+            [position for position in range(len(q_slots)) if position not in chained],
+            dtype=np.intp)
+        self.parallel_q_slots = self.dtype_q_slots[self.parallel_dtypes]
+        self.parallel_input_slots = self.dtype_input_slots[self.parallel_dtypes]
+
+        self.clock_slots = output_slots(self.clock_indices)
+        self.rc_slots = output_slots(self.rc_indices)
+
+        device_index = {device_id: index
+                        for index, device_id in enumerate(self.device_ids)}
+        gate_levels, feedback_gates = self.network.get_gate_levels()
+        self.feedback_indices = [device_index[device_id]
+                                 for device_id in feedback_gates]
+
+        self.gate_groups = []
+        for level in gate_levels:
+            gate_indices = []
+            xor_indices = []
+            for device_id in level:
+                index = device_index[device_id]
+                if self.kinds[index] == self.XOR:
+                    xor_indices.append(index)
+                else:
+                    gate_indices.append(index)
+
+            # Pad each row of the fan-in matrix with the constant slot equal
+            # to the gate's x value, so that padding never changes the result
+            gate_x = np.array([self.gate_rules[self.kinds[index]][0]
+                               for index in gate_indices], dtype=np.int8)
+            gate_y = np.array([self.gate_rules[self.kinds[index]][1]
+                               for index in gate_indices], dtype=np.int8)
+            width = max([self.fanin_start[index + 1] - self.fanin_start[index]
+                         for index in gate_indices], default=0)
+            gate_fanin = np.empty((len(gate_indices), width), dtype=np.intp)
+            for row, index in enumerate(gate_indices):
+                inputs = self.fanin[self.fanin_start[index]:
+                                    self.fanin_start[index + 1]]
+                gate_fanin[row, :] = slot_count + int(gate_x[row])
+                gate_fanin[row, :len(inputs)] = inputs
+
+            xor_fanin = np.array(
+                [self.fanin[self.fanin_start[index]:self.fanin_start[index] + 2]
+                 for index in xor_indices], dtype=np.intp).reshape(-1, 2)
+
+            self.gate_groups.append((output_slots(gate_indices), gate_fanin,
+                                     gate_x, gate_y, output_slots(xor_indices),
+                                     xor_fanin))
+        return True
+
+    def load_state(self) -> None:
+        """Load the network state from the Device objects."""
+        super().load_state()
+        self.signals = np.array(list(self.signals) + [self.LOW, self.HIGH],
+                                dtype=np.int8)
+        self.switch_state = np.array(self.switch_state, dtype=np.int8)
+        self.dtype_memory = np.array(self.dtype_memory,
+                                     dtype=np.int8)[self.dtype_indices]
+
+        self.stored_signals = self.signals[:len(self.slot_ports)].copy()
+        self.stored_memory = self.dtype_memory.copy()
+
+    def store_state(self) -> None:
+        """Write the changed network state back to the Device objects."""
+        slot_count = len(self.slot_ports)
+        signals = self.signals[:slot_count]
+        changed_slots = np.flatnonzero(signals != self.stored_signals)
+        for slot in changed_slots.tolist():
+            port_id = self.slot_ports[slot][1]
+            self.slot_devices[slot].outputs[port_id] = int(signals[slot])
+        self.stored_signals[changed_slots] = signals[changed_slots]
+
+        changed_memory = np.flatnonzero(self.dtype_memory != self.stored_memory)
+        for position in changed_memory.tolist():
+            device = self.device_objects[self.dtype_indices[position]]
+            device.dtype_memory = int(self.dtype_memory[position])
+        self.stored_memory[changed_memory] = self.dtype_memory[changed_memory]
+
+    def execute_dtypes(self) -> None:
+        """Execute the D-types which are not connected to other D-types at once."""
+        signals = self.signals
+        positions = self.parallel_dtypes
+        input_signals = signals[self.parallel_input_slots]
+        clock_signal = input_signals[:, 0]
+        set_signal = input_signals[:, 1]
+        clear_signal = input_signals[:, 2]
+        data_signal = input_signals[:, 3]
+
+        edge = clock_signal == self.RISING
+        memory = self.dtype_memory[positions]
+        memory = np.where(edge & ((data_signal == self.HIGH) | (data_signal == self.FALLING)),
+                          self.HIGH, memory)
+        memory = np.where(edge & ((data_signal == self.LOW) | (data_signal == self.RISING)),
+                          self.LOW, memory)
+        memory = np.where(set_signal == self.HIGH, self.HIGH, memory)
+        memory = np.where(clear_signal == self.HIGH, self.LOW, memory)
+        self.dtype_memory[positions] = memory
+
+        q_slots = self.parallel_q_slots
+        signals[q_slots] = self.transition_table[signals[q_slots], memory]
+        signals[q_slots + 1] = self.transition_table[signals[q_slots + 1], 1 - memory]
+
+    def execute_chained_dtypes(self) -> None:
+        """Execute the D-types connected to other D-types, one after another."""
+        signals = self.signals
+        dtype_memory = self.dtype_memory
+        transitions = self.transitions
+        HIGH = self.HIGH
+        LOW = self.LOW
+        for (position, q_slot, clock_slot, set_slot, clear_slot,
+             data_slot) in self.chained_dtypes:
+            memory = int(dtype_memory[position])
+            data_signal = signals[data_slot]
+            if signals[clock_slot] == self.RISING:
+                if data_signal == HIGH or data_signal == self.FALLING:
+                    memory = HIGH
+                elif data_signal == LOW or data_signal == self.RISING:
+                    memory = LOW
+            if signals[set_slot] == HIGH:
+                memory = HIGH
+            if signals[clear_slot] == HIGH:
+                memory = LOW
+            dtype_memory[position] = memory
+            signals[q_slot] = transitions[signals[q_slot]][memory]
+            signals[q_slot + 1] = transitions[signals[q_slot + 1]][1 - memory]
+
+    def execute_gate_group(self, gate_group: tuple) -> None:
+        """Execute all the gates in one level at once."""
+        gate_slots, gate_fanin, gate_x, gate_y, xor_slots, xor_fanin = gate_group
+        signals = self.signals
+        levels = self.level_table
+        transitions = self.transition_table
+        if gate_slots.size:
+            all_x = (levels[signals[gate_fanin]] == gate_x[:, None]).all(axis=1)
+            target = np.where(all_x, gate_y, 1 - gate_y)
+            signals[gate_slots] = transitions[signals[gate_slots], target]
+        if xor_slots.size:
+            xor_levels = levels[signals[xor_fanin]]
+            target = (xor_levels[:, 0] != xor_levels[:, 1]).astype(np.int8)
+            signals[xor_slots] = transitions[signals[xor_slots], target]
+
+    def execute_network(self) -> bool:
+        """Execute all the devices in the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        if not self.prepare():
+            return False
+
+        self.update_sources()
+
+        signals = self.signals
+        levels = self.level_table
+        previous_signals = np.empty_like(signals)
+        seen_states = {}  # {packed state: iteration}, as in Network
+        self.network.oscillation_period = None
+        steady_state = False
+        iterations = 0
+        while iterations < self.network.iteration_limit:
+            iterations += 1
+            np.copyto(previous_signals, signals)
+
+            if self.switch_slots.size:
+                signals[self.switch_slots] = self.transition_table[
+                    signals[self.switch_slots],
+                    self.switch_state[self.switch_indices]]
+            if self.parallel_dtypes.size:
+                self.execute_dtypes()
+            if self.chained_dtypes:
+                self.execute_chained_dtypes()
+            if self.clock_slots.size:  # RISING to HIGH, FALLING to LOW
+                signals[self.clock_slots] = levels[signals[self.clock_slots]]
+            for gate_group in self.gate_groups:
+                self.execute_gate_group(gate_group)
+            for index in self.feedback_indices:
+                self.evaluate_device(index)
+            if self.rc_slots.size:  # FALLING to LOW
+                signals[self.rc_slots] = levels[signals[self.rc_slots]]
+
+            if np.array_equal(previous_signals, signals):
+                steady_state = True
+                break
+            state = self.get_packed_state()
+            if state in seen_states:
+                self.network.oscillation_period = iterations - seen_states[state]
+                break
+            seen_states[state] = iterations
+
+        self.network.steady_state = steady_state
+        self.store_state()
+        return steady_state
@@ -0,0 +1,94 @@
+"""Test the bit_parallel_network module."""
+import itertools
+from array import array
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.monitors import Monitors
+from logsim.network import Network
+from logsim.bit_parallel_network import BitParallelNetwork
+from tests.test_compiled_network import path, build_network
+
+
+def monitor_all_outputs(network: Network) -> Monitors:
+    """Return a Monitors instance monitoring every output of the network."""
+    devices = network.devices
+    monitors = Monitors(network.names, devices, network)
+    for device in devices.devices_list:
+        for port_id in device.outputs:
+            assert monitors.make_monitor(device.device_id, port_id,
+                                         f"{device.device_id}.{port_id}") == monitors.NO_ERROR
+    return monitors
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+    path("test_parse_correct_text_3.txt"),
+    path("test_parse_correct_text_4.txt"),
+    path("test_parse_oscillating.txt"),
+])
+def test_bit_parallel_matches_network(file_path: str) -> None:
+    """Test if every pattern gives the same traces as a separate simulation."""
+    network = build_network(file_path, 0)
+    devices = network.devices
+    switch_ids = devices.find_devices(devices.SWITCH)
+    stimuli = list(itertools.product([0, 1], repeat=len(switch_ids)))
+
+    monitors = monitor_all_outputs(network)
+    traces = BitParallelNetwork(network.names, devices, network,
+                                monitors).run_patterns(switch_ids, stimuli, 100)
+
+    for pattern, row in enumerate(stimuli):
+        reference = build_network(file_path, 0)
+        for switch_id, switch_state in zip(switch_ids, row):
+            reference.devices.set_switch(switch_id, switch_state)
+        reference_monitors = monitor_all_outputs(reference)
+        for _ in range(100):
+            if not reference.execute_network():
+                break
+            reference_monitors.record_signals()
+
+        for port, signal_list in reference_monitors.signals_dictionary.items():
+            assert traces[port][pattern] == signal_list
+
+
+def test_bit_parallel_leaves_devices_unchanged() -> None:
+    """Test if running the patterns leaves the Device objects unchanged."""
+    network = build_network(path("test_parse_correct_text.txt"), 0)
+    devices = network.devices
+    outputs = [dict(device.outputs) for device in devices.devices_list]
+    switch_ids = devices.find_devices(devices.SWITCH)
+
+    monitors = monitor_all_outputs(network)
+    bit_parallel = BitParallelNetwork(network.names, devices, network, monitors)
+    traces = bit_parallel.run_patterns(switch_ids, [[0] * len(switch_ids),
+                                                    [1] * len(switch_ids)], 10)
+
+    assert [dict(device.outputs) for device in devices.devices_list] == outputs
+    for signal_lists in traces.values():
+        assert [len(signal_list) for signal_list in signal_lists] == [10, 10]
+
+
+def test_bit_parallel_oscillating_pattern() -> None:
+    """Test if only the traces of the oscillating patterns are cut short."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    # Nand1 oscillates when its enable switch is HIGH
+    [SW1_ID, NAND1_ID, I1, I2] = names.lookup(["Sw1", "Nand1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    network.make_connection(NAND1_ID, None, NAND1_ID, I2)
+    monitors.make_monitor(NAND1_ID, None, "Nand1")
+
+    bit_parallel = BitParallelNetwork(names, devices, network, monitors)
+    traces = bit_parallel.run_patterns([SW1_ID], [[0], [1], [0]], 5)
+
+    assert traces[(NAND1_ID, None)] == [array("b", [devices.HIGH] * 5), array("b"),
+                                        array("b", [devices.HIGH] * 5)]
@@ -0,0 +1,93 @@
+"""Test the cold_start_sweep module."""
+import random
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.scanner import Scanner
+from logsim.parse import Parser
+from logsim.cold_start_sweep import (ColdStartSweep, serialize_network,
+                                     build_network)
+from tests.test_compiled_network import path
+
+
+def parse_file(file_path: str) -> Parser:
+    """Return the parser which has built the network from the definition file."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(file_path, names))
+    assert parser.parse_network()
+    return parser
+
+
+def test_serialize_network() -> None:
+    """Test if the rebuilt network has the same devices, connections and monitors."""
+    parser = parse_file(path("test_parse_correct_text_2.txt"))
+    netlist = serialize_network(parser.names, parser.devices, parser.network,
+                                parser.monitors)
+    names, devices, network, monitors = build_network(netlist)
+
+    assert names.id_to_name == parser.names.id_to_name
+    for device in parser.devices.devices_list:
+        rebuilt_device = devices.get_device(device.device_id)
+        assert rebuilt_device.device_kind == device.device_kind
+        assert rebuilt_device.inputs == device.inputs
+        assert rebuilt_device.outputs.keys() == device.outputs.keys()
+    assert monitors.identifier_to_port == parser.monitors.identifier_to_port
+    assert serialize_network(names, devices, network, monitors) == netlist
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+])
+def test_sweep_matches_serial_runs(file_path: str) -> None:
+    """Test if the sweep gives the same traces as seeded runs in this process."""
+    parser = parse_file(file_path)
+    sweep = ColdStartSweep(parser.names, parser.devices, parser.network,
+                           parser.monitors)
+    divergence = sweep.run_sweep(range(6), 40, max_workers=2)
+
+    for seed in range(6):
+        reference = parse_file(file_path)
+        random.seed(seed)
+        reference.devices.cold_startup()
+        for _ in range(40):
+            assert reference.network.execute_network()
+            reference.monitors.record_signals()
+        assert sweep.traces[seed] == reference.monitors.signals_dictionary
+
+    for port, signal_list in parser.monitors.signals_dictionary.items():
+        signal_lists = [sweep.traces[seed][port] for seed in range(6)]
+        if all(signal_list == signal_lists[0] for signal_list in signal_lists):
+            assert port not in divergence
+        else:
+            cycle = divergence[port]
+            assert all(signal_list[:cycle] == signal_lists[0][:cycle]
+                       for signal_list in signal_lists)
+            assert len({signal_list[cycle] for signal_list in signal_lists}) > 1
+
+
+def test_sweep_independent_of_start_up() -> None:
+    """Test if a network without D-types or clocks is reported as independent."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, NAND1_ID, I1] = names.lookup(["Sw1", "Nand1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(NAND1_ID, devices.NAND, 1)
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    monitors.make_monitor(NAND1_ID, None, "Nand1")
+
+    sweep = ColdStartSweep(names, devices, network, monitors)
+    assert sweep.run_sweep(range(4), 10, max_workers=2) == {}
+    assert sweep.get_report() == [
+        "Cold start-up sweep: 4 seeds, 10 cycles",
+        "All monitors are independent of the start-up state."]
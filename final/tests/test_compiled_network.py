@@ -0,0 +1,160 @@
+"""Test the compiled_network module."""
+import os
+import random
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.scanner import Scanner
+from logsim.parse import Parser
+from logsim.compiled_network import CompiledNetwork
+from logsim.event_network import EventDrivenNetwork
+
+
+def path(*args: str) -> str:
+    """Return the path of the test file."""
+    current_file_directory = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_file_directory, "test_text", *args)
+
+
+def build_network(file_path: str, seed: int) -> Network:
+    """Return the network built from the definition file, seeded for cold start-up."""
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(file_path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    assert parser.parse_network()
+    return network
+
+
+def run_traces(network: Network, cycles: int) -> list:
+    """Run the network and return every output signal at every cycle."""
+    devices = network.devices
+    traces = []
+    for cycle in range(cycles):
+        if cycle == cycles // 2:  # change the inputs half way through
+            for switch_id in devices.find_devices(devices.SWITCH):
+                switch_state = devices.get_device(switch_id).switch_state
+                devices.set_switch(switch_id, 1 - switch_state)
+        steady_state = network.execute_network()
+        outputs = [(device.device_id, port_id, signal)
+                   for device in devices.devices_list
+                   for port_id, signal in device.outputs.items()]
+        traces.append((steady_state, network.oscillation_period, outputs))
+    return traces
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+    path("test_parse_correct_text_3.txt"),
+    path("test_parse_correct_text_4.txt"),
+    path("test_parse_oscillating.txt"),
+])
+def test_compiled_matches_network(file_path: str) -> None:
+    """Test if the compiled engine gives the same results as execute_network."""
+    for seed in range(3):
+        reference = build_network(file_path, seed)
+        reference_traces = run_traces(reference, 250)
+
+        network = build_network(file_path, seed)
+        network.set_engine(CompiledNetwork(network.names, network.devices,
+                                           network))
+        assert run_traces(network, 250) == reference_traces
+
+
+def test_compiled_invalidated() -> None:
+    """Test if the compiled arrays are rebuilt when the network changes."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    compiled = CompiledNetwork(names, devices, network)
+    network.set_engine(compiled)
+
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "And1",
+                                                      "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+
+    # And1.I2 is unconnected, so the network cannot be executed
+    assert not network.execute_network()
+    assert compiled.get_slot(AND1_ID, I1) == compiled.get_slot(SW1_ID, None)
+    assert compiled.get_slot(AND1_ID, I2) is None
+
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    assert compiled.is_stale()
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    assert network.execute_network()
+    assert not compiled.is_stale()
+    assert network.get_output_signal(AND1_ID, None) == devices.HIGH
+
+    # Switch changes are picked up without recompiling
+    devices.set_switch(SW2_ID, devices.LOW)
+    assert network.execute_network()
+    assert not compiled.is_stale()
+    assert network.get_output_signal(AND1_ID, None) == devices.LOW
+
+
+@pytest.mark.parametrize("engine_class", [CompiledNetwork, EventDrivenNetwork])
+def test_engines_share_timing_wheels(engine_class: type) -> None:
+    """Test if the engines advance the clock and RC counters on the timing wheels."""
+    file_path = path("test_parse_correct_text.txt")
+    reference = build_network(file_path, 0)
+    network = build_network(file_path, 0)
+    network.set_engine(engine_class(network.names, network.devices, network))
+
+    for cycles in [3, 250]:
+        run_traces(reference, cycles)
+        run_traces(network, cycles)
+        assert ([(device.clock_counter, device.rc_counter)
+                 for device in network.devices.devices_list]
+                == [(device.clock_counter, device.rc_counter)
+                    for device in reference.devices.devices_list])
+        # The counters are not set directly, so nothing is rescheduled
+        assert not network.devices.clock_wheel.changed
+        assert not network.devices.rc_wheel.changed
+
+    # Switching back to the default engine continues from the same counters
+    network.set_engine(None)
+    assert run_traces(network, 50) == run_traces(reference, 50)
+
+
+class CollidingTuple(tuple):
+
+    """Tuple whose hash collides with every other."""
+
+    def __hash__(self):
+        return 0
+
+
+class CollidingBytes(bytes):
+
+    """Bytes whose hash collides with every other."""
+
+    def __hash__(self):
+        return 0
+
+
+@pytest.mark.parametrize("engine_class", [None, CompiledNetwork, EventDrivenNetwork])
+def test_hash_collisions_settle(engine_class: type) -> None:
+    """Test if settle states with equal hashes are not taken for oscillation."""
+    file_path = path("test_parse_correct_text.txt")
+    reference_traces = run_traces(build_network(file_path, 0), 100)
+
+    network = build_network(file_path, 0)
+    if engine_class is None:
+        get_state = network.get_state
+        network.get_state = lambda: CollidingTuple(get_state())
+    else:
+        engine = engine_class(network.names, network.devices, network)
+        get_packed_state = engine.get_packed_state
+        engine.get_packed_state = lambda: CollidingBytes(get_packed_state())
+        network.set_engine(engine)
+    assert run_traces(network, 100) == reference_traces
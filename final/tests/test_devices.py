@@ -2,7 +2,8 @@
 import pytest
 
 from logsim.names import Names
-from logsim.devices import Devices
+from logsim.devices import Devices, Device
+from logsim.network import Network
 
 
 @pytest.fixture
@@ -148,3 +149,109 @@ def test_set_switch(new_devices: Devices) -> None:
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_remove_device(devices_with_items: Devices) -> None:
+    """Test if remove_device keeps the device indexes consistent."""
+    devices = devices_with_items
+    names = devices.names
+    [AND1_ID, NOR1_ID, SW1_ID, I1] = names.lookup(["And1", "Nor1", "Sw1", "I1"])
+
+    # Connect the switch to the AND gate, then remove the switch
+    and_device = devices.get_device(AND1_ID)
+    assert devices.set_input(AND1_ID, I1, (SW1_ID, None))
+    assert devices.consumers[SW1_ID] == {(AND1_ID, I1)}
+    assert devices.remove_device(SW1_ID)
+    assert SW1_ID not in devices.consumers
+
+    assert devices.get_device(SW1_ID) is None
+    assert devices.find_devices() == [AND1_ID, NOR1_ID]
+    assert devices.find_devices(devices.SWITCH) == []
+    assert SW1_ID not in [device.device_id for device in devices.devices_list]
+    # The input that was connected to the switch is now unconnected
+    assert and_device.inputs[I1] is None
+
+    # Removing a device that does not exist fails
+    assert not devices.remove_device(SW1_ID)
+
+    # The same ID can be reused for a new device
+    assert devices.make_device(SW1_ID, devices.SWITCH, 1) == devices.NO_ERROR
+    assert devices.find_devices(devices.SWITCH) == [SW1_ID]
+
+
+def test_devices_share_timing_wheels(new_devices: Devices) -> None:
+    """Test if made devices share the wheels, and others only get one when needed."""
+    [AND1_ID, CL1_ID] = new_devices.names.lookup(["And1", "Clock1"])
+    new_devices.make_device(AND1_ID, new_devices.AND, 2)
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 10)
+    for device in new_devices.devices_list:
+        assert device.clock_wheel is new_devices.clock_wheel
+        assert device.rc_wheel is new_devices.rc_wheel
+
+    device = Device(AND1_ID)
+    assert device.clock_wheel is None and device.rc_wheel is None
+    assert device.clock_counter is None
+    device.rc_counter = 4
+    assert device.rc_counter == 4 and device.clock_wheel is None
+
+
+def test_counters_advance_with_timing_wheel(new_devices: Devices) -> None:
+    """Test if clock counters advance with the timing wheel, and can be set."""
+    [CL1_ID] = new_devices.names.lookup(["Clock1"])
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 10)
+    clock = new_devices.get_device(CL1_ID)
+    wheel = new_devices.clock_wheel
+
+    clock.clock_counter = 3
+    assert wheel.take_changed() == [clock]
+    assert wheel.take_changed() == []
+
+    wheel.schedule(clock, 2)
+    assert wheel.pop_due() == []
+    assert wheel.pop_due() == []
+    assert clock.clock_counter == 5
+    assert wheel.pop_due() == [clock]
+    assert wheel.cycle == 3
+
+
+def test_snapshot_and_restore(new_devices: Devices) -> None:
+    """Test if restoring a snapshot makes the network repeat the same cycles."""
+    devices = new_devices
+    network = Network(devices.names, devices)
+    [SW1_ID, CL1_ID, D1_ID, RC1_ID, XOR1_ID, I1, I2] = devices.names.lookup(
+        ["Sw1", "Clock1", "D1", "Rc1", "Xor1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(CL1_ID, devices.CLOCK, 2)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(RC1_ID, devices.RC, 7)
+    devices.make_device(XOR1_ID, devices.XOR)
+    network.make_connection(CL1_ID, None, D1_ID, devices.CLK_ID)
+    network.make_connection(RC1_ID, None, D1_ID, devices.SET_ID)
+    network.make_connection(SW1_ID, None, D1_ID, devices.CLEAR_ID)
+    network.make_connection(D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID)
+    network.make_connection(D1_ID, devices.Q_ID, XOR1_ID, I1)
+    network.make_connection(SW1_ID, None, XOR1_ID, I2)
+
+    def run(cycles: int) -> list:
+        trace = []
+        for _ in range(cycles):
+            assert network.execute_network()
+            trace.append([dict(device.outputs) for device in devices.devices_list])
+        return trace
+
+    run(3)
+    snapshot = devices.take_snapshot(3)
+    assert snapshot.cycle == 3
+    devices.set_switch(SW1_ID, 0)
+    trace = run(10)
+
+    devices.set_switch(SW1_ID, 1)
+    run(4)
+    assert devices.restore_snapshot(snapshot)
+    assert devices.get_device(SW1_ID).switch_state == 1
+    devices.set_switch(SW1_ID, 0)
+    assert run(10) == trace
+
+    # Snapshots do not apply once the devices have changed
+    devices.make_device(devices.names.lookup(["Sw2"])[0], devices.SWITCH, 0)
+    assert not devices.restore_snapshot(snapshot)
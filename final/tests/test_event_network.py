@@ -0,0 +1,64 @@
+"""Test the event_network module."""
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.event_network import EventDrivenNetwork
+from tests.test_compiled_network import path, build_network, run_traces
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+    path("test_parse_correct_text_3.txt"),
+    path("test_parse_correct_text_4.txt"),
+    path("test_parse_oscillating.txt"),
+])
+def test_event_driven_matches_network(file_path: str) -> None:
+    """Test if the event-driven engine gives the same results as execute_network."""
+    for seed in range(3):
+        reference = build_network(file_path, seed)
+        reference_traces = run_traces(reference, 250)
+
+        network = build_network(file_path, seed)
+        network.set_engine(EventDrivenNetwork(network.names, network.devices,
+                                              network))
+        assert run_traces(network, 250) == reference_traces
+
+
+def test_event_driven_evaluates_dirty_devices() -> None:
+    """Test if only the devices reading a changed signal are evaluated."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    engine = EventDrivenNetwork(names, devices, network)
+    network.set_engine(engine)
+
+    [SW1_ID, SW2_ID, NOT1_ID, NOT2_ID, I1] = names.lookup(["Sw1", "Sw2", "Not1",
+                                                           "Not2", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(NOT1_ID, devices.NAND, 1)
+    devices.make_device(NOT2_ID, devices.NAND, 1)
+    network.make_connection(SW1_ID, None, NOT1_ID, I1)
+    network.make_connection(SW2_ID, None, NOT2_ID, I1)
+
+    evaluated = []
+    evaluate_device = engine.evaluate_device
+
+    def record_evaluation(index: int) -> bool:
+        evaluated.append(engine.device_ids[index])
+        return evaluate_device(index)
+
+    engine.evaluate_device = record_evaluation
+
+    # Every device is evaluated once the state has been loaded
+    assert network.execute_network()
+    assert set(evaluated) == {SW1_ID, SW2_ID, NOT1_ID, NOT2_ID}
+
+    # Nothing has changed, so nothing is evaluated
+    evaluated.clear()
+    assert network.execute_network()
+    assert evaluated == []
+    assert network.get_output_signal(NOT1_ID, None) == devices.HIGH
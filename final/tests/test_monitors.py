@@ -1,10 +1,13 @@
 """Test the monitor module."""
+from array import array
+
 import pytest
 
 from logsim.names import Names
 from logsim.network import Network
 from logsim.devices import Devices
 from logsim.monitors import Monitors
+from logsim.traces import ChangeTrace, MappedTrace
 
 
 @pytest.fixture
@@ -43,11 +46,11 @@ def test_make_monitor(new_monitors: Monitors) -> None:
     [SW1_ID, SW2_ID, OR1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Or1",
                                                      "I1", "I2"])
 
-    assert new_monitors.signals_dictionary == {(SW1_ID, None): [],
-                                               (SW2_ID, None): [],
-                                               (OR1_ID, None): [],
-                                               (OR1_ID, I1): [],
-                                               (OR1_ID, I2): []}
+    assert new_monitors.signals_dictionary == {(SW1_ID, None): array("b"),
+                                               (SW2_ID, None): array("b"),
+                                               (OR1_ID, None): array("b"),
+                                               (OR1_ID, I1): array("b"),
+                                               (OR1_ID, I2): array("b")}
 
 
 def test_identify_monitor(new_monitors: Monitors) -> None:
@@ -99,10 +102,10 @@ def test_remove_monitor_by_port(new_monitors: Monitors) -> None:
                                                      "I1", "I2"])
 
     new_monitors.remove_monitor_by_port(SW1_ID, None)
-    assert new_monitors.signals_dictionary == {(SW2_ID, None): [],
-                                               (OR1_ID, None): [],
-                                               (OR1_ID, I1): [],
-                                               (OR1_ID, I2): []}
+    assert new_monitors.signals_dictionary == {(SW2_ID, None): array("b"),
+                                               (OR1_ID, None): array("b"),
+                                               (OR1_ID, I1): array("b"),
+                                               (OR1_ID, I2): array("b")}
 
     assert new_monitors.port_to_identifier == {(SW2_ID, None): {"C"},
                                                (OR1_ID, None): {"A1", "A2"},
@@ -116,11 +119,11 @@ def test_remove_monitor_by_identifier(new_monitors: Monitors) -> None:
     [SW1_ID, SW2_ID, OR1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Or1",
                                                      "I1", "I2"])
     new_monitors.remove_monitor_by_identifier(identifier="A1")
-    assert new_monitors.signals_dictionary == {(SW1_ID, None): [],
-                                               (SW2_ID, None): [],
-                                               (OR1_ID, None): [],
-                                               (OR1_ID, I1): [],
-                                               (OR1_ID, I2): []}
+    assert new_monitors.signals_dictionary == {(SW1_ID, None): array("b"),
+                                               (SW2_ID, None): array("b"),
+                                               (OR1_ID, None): array("b"),
+                                               (OR1_ID, I1): array("b"),
+                                               (OR1_ID, I2): array("b")}
 
     assert new_monitors.port_to_identifier == {(SW1_ID, None): {"B"},
                                                (SW2_ID, None): {"C"},
@@ -169,11 +172,194 @@ def test_record_signals(new_monitors: Monitors) -> None:
     new_monitors.record_signals()
 
     assert new_monitors.signals_dictionary == {
-        (OR1_ID, None): [LOW, HIGH, HIGH],
-        (SW1_ID, None): [LOW, HIGH, HIGH],
-        (SW2_ID, None): [LOW, LOW, HIGH],
-        (OR1_ID, I1): [LOW, HIGH, HIGH],
-        (OR1_ID, I2): [LOW, LOW, HIGH]}
+        (OR1_ID, None): array("b", [LOW, HIGH, HIGH]),
+        (SW1_ID, None): array("b", [LOW, HIGH, HIGH]),
+        (SW2_ID, None): array("b", [LOW, LOW, HIGH]),
+        (OR1_ID, I1): array("b", [LOW, HIGH, HIGH]),
+        (OR1_ID, I2): array("b", [LOW, LOW, HIGH])}
+
+
+def test_record_signals_buffered(new_monitors: Monitors) -> None:
+    """Test if buffered signals are flushed, and connections resolved again."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "And1",
+                                                      "I1", "I2"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+    BLANK = devices.BLANK
+
+    new_monitors.record_limit = 3
+    switch_states = [LOW, HIGH, HIGH, LOW, HIGH, LOW, LOW]
+    for switch_state in switch_states:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+        # Full rows of the buffer are flushed to the traces
+        assert len(new_monitors.trace_dictionary[(SW1_ID, None)]) % 3 == 0
+    assert len(new_monitors.record_buffer) == 5
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array("b", switch_states)
+    assert not new_monitors.record_buffer
+
+    # A monitor on an unconnected input records BLANK signals
+    devices.make_device(AND1_ID, devices.AND, 2)
+    new_monitors.make_monitor(AND1_ID, I1, "And1_I1", len(switch_states))
+    new_monitors.record_signals()
+
+    # Connecting the input resolves the monitors again
+    network.make_connection(SW2_ID, None, AND1_ID, I1)
+    network.make_connection(SW1_ID, None, AND1_ID, I2)
+    devices.set_switch(SW2_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals()
+    assert new_monitors.signals_dictionary[(AND1_ID, I1)] == array(
+        "b", [BLANK] * 8 + [HIGH])
+
+
+def test_repeat_signals(new_monitors: Monitors) -> None:
+    """Test if repeat_signals repeats the last period of every monitor."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    for switch_state in [LOW, HIGH, LOW]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    new_monitors.repeat_signals(2, 2)
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array("b", [
+        LOW, HIGH, LOW, HIGH, LOW, HIGH, LOW])
+    assert new_monitors.signals_dictionary[(OR1_ID, None)] == array("b", [
+        LOW, HIGH, LOW, HIGH, LOW, HIGH, LOW])
+
+
+def test_truncate_signals(new_monitors: Monitors) -> None:
+    """Test if truncate_signals discards the signals after the cycle."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, OR1_ID] = names.lookup(["Sw1", "Or1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    for switch_state in [LOW, HIGH, LOW]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    new_monitors.truncate_signals(1)
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array("b", [LOW])
+    assert new_monitors.signals_dictionary[(OR1_ID, None)] == array("b", [LOW])
+
+
+def test_set_trace_class(new_monitors: Monitors) -> None:
+    """Test if set_trace_class stores existing and new traces in the store."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID] = names.lookup(["Sw1", "Sw2"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+    BLANK = devices.BLANK
+
+    network.execute_network()
+    new_monitors.record_signals()
+    new_monitors.set_trace_class(ChangeTrace)
+    devices.set_switch(SW1_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals()
+    new_monitors.remove_monitor_by_port(SW2_ID, None)
+    new_monitors.make_monitor(SW2_ID, None, "C", 2)
+    new_monitors.repeat_signals(1, 3)
+
+    for trace in new_monitors.signals_dictionary.values():
+        assert isinstance(trace, ChangeTrace)
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array(
+        "b", [LOW, HIGH, HIGH, HIGH, HIGH])
+    assert new_monitors.signals_dictionary[(SW2_ID, None)] == array(
+        "b", [BLANK] * 5)
+
+
+def test_set_history_window(capsys, new_monitors: Monitors) -> None:
+    """Test if a history window keeps the last cycles, aligned on their numbers."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    new_monitors.set_history_window(4)
+    new_monitors.set_history_window(6, SW2_ID, None)
+    for switch_state in [LOW, HIGH, LOW, HIGH, HIGH, HIGH, LOW, LOW]:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert len(new_monitors.signals_dictionary[(SW1_ID, None)]) == 8
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array(
+        "b", [HIGH, HIGH, LOW, LOW])
+    assert new_monitors.signals_dictionary[(SW2_ID, None)] == array("b", [LOW] * 6)
+    assert new_monitors.get_first_cycle() == 2
+    assert new_monitors.get_history_window() == 6
+
+    new_monitors.display_signals()
+    out, _ = capsys.readouterr()
+    traces = out.split("\n")
+    assert traces[0] == "From cycle 2:"
+    assert "A1    :   --__" in traces
+    assert "C     : ______" in traces
+
+    # Removing the window keeps the signals, with the discarded cycles BLANK
+    new_monitors.set_history_window(None)
+    assert new_monitors.signals_dictionary[(OR1_ID, None)] == array(
+        "b", [devices.BLANK] * 4 + [HIGH, HIGH, LOW, LOW])
+
+
+def test_set_spill(tmp_path, new_monitors: Monitors) -> None:
+    """Test if the traces are spilled to files once over the budget, and loaded again."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, OR1_ID, I1] = names.lookup(["Sw1", "Or1", "I1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    new_monitors.set_spill(str(tmp_path / "traces"), budget=40)
+    switch_states = [LOW, HIGH] * 8
+    for switch_state in switch_states:
+        devices.set_switch(SW1_ID, switch_state)
+        network.execute_network()
+        new_monitors.record_signals()
+        # Five traces of one byte per cycle are spilled after eight cycles
+        cycles = len(new_monitors.signals_dictionary[(SW1_ID, None)])
+        assert new_monitors.spilled == (cycles > 8)
+
+    assert all(isinstance(trace, MappedTrace)
+               for trace in new_monitors.signals_dictionary.values())
+    assert new_monitors.get_memory() == 0
+    assert new_monitors.signals_dictionary[(SW1_ID, None)] == array("b", switch_states)
+    assert (tmp_path / "traces" / "Or1.I1.trace").is_file()
+
+    # A new run of the same monitors reads the files back
+    loaded_monitors = Monitors(names, devices, network)
+    for identifier, (device_id, port_id) in new_monitors.identifier_to_port.items():
+        loaded_monitors.make_monitor(device_id, port_id, identifier)
+    assert not loaded_monitors.load_traces(str(tmp_path))
+    assert loaded_monitors.load_traces(str(tmp_path / "traces"))
+    assert loaded_monitors.signals_dictionary == new_monitors.signals_dictionary
+    assert loaded_monitors.signals_dictionary[(OR1_ID, I1)] == array("b", switch_states)
 
 
 def test_get_margin(new_monitors: Monitors) -> None:
@@ -202,17 +388,17 @@ def test_reset_monitors(new_monitors: Monitors) -> None:
     LOW = devices.LOW
     new_monitors.record_signals()
     new_monitors.record_signals()
-    assert new_monitors.signals_dictionary == {(SW1_ID, None): [LOW, LOW],
-                                               (SW2_ID, None): [LOW, LOW],
-                                               (OR1_ID, None): [LOW, LOW],
-                                               (OR1_ID, I1): [LOW, LOW],
-                                               (OR1_ID, I2): [LOW, LOW]}
+    assert new_monitors.signals_dictionary == {(SW1_ID, None): array("b", [LOW, LOW]),
+                                               (SW2_ID, None): array("b", [LOW, LOW]),
+                                               (OR1_ID, None): array("b", [LOW, LOW]),
+                                               (OR1_ID, I1): array("b", [LOW, LOW]),
+                                               (OR1_ID, I2): array("b", [LOW, LOW])}
     new_monitors.reset_monitors()
-    assert new_monitors.signals_dictionary == {(SW1_ID, None): [],
-                                               (SW2_ID, None): [],
-                                               (OR1_ID, None): [],
-                                               (OR1_ID, I1): [],
-                                               (OR1_ID, I2): []}
+    assert new_monitors.signals_dictionary == {(SW1_ID, None): array("b"),
+                                               (SW2_ID, None): array("b"),
+                                               (OR1_ID, None): array("b"),
+                                               (OR1_ID, I1): array("b"),
+                                               (OR1_ID, I2): array("b")}
 
 
 def test_display_signals(capsys, new_monitors: Monitors) -> None:
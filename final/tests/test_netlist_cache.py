@@ -0,0 +1,136 @@
+"""Test the netlist_cache module."""
+import os
+import random
+import shutil
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.scanner import Scanner
+from logsim.parse import Parser
+from logsim.simulator import Simulator
+from logsim.netlist_cache import NetlistCache
+from tests.test_compiled_network import path
+
+
+def parse_file(file_path: str, cache: NetlistCache) -> Parser:
+    """Return the parser for the definition file, once it has parsed the file."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(file_path, names), cache)
+    parser.result = parser.parse_network()
+    return parser
+
+
+def run_parser(parser: Parser, seed: int, cycles: int) -> dict:
+    """Return {identifier: signals} after cold starting with seed and simulating."""
+    random.seed(seed)
+    parser.devices.cold_startup()
+    simulator = Simulator(parser.names, parser.devices, parser.network,
+                          parser.monitors)
+    assert simulator.run_cycles(cycles)
+    return {identifier: list(parser.monitors.signals_dictionary[port])
+            for identifier, port in parser.monitors.identifier_to_port.items()}
+
+
+@pytest.mark.parametrize("file_name", [
+    "test_parse_correct_text.txt",
+    "test_parse_correct_text_2.txt",
+    "test_parse_correct_text_3.txt",
+])
+def test_load_network(tmp_path, file_name):
+    """Test if a cached network has the same names, devices, connections and monitors."""
+    cache = NetlistCache(str(tmp_path / "cache"))
+    parsed = parse_file(path(file_name), cache)
+    assert parsed.result
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+    loaded = parse_file(path(file_name), cache)
+    assert loaded.result
+    assert loaded.tokens is None  # the file was not parsed again
+    assert loaded.names.id_to_name == parsed.names.id_to_name
+    assert loaded.names.name_to_id == parsed.names.name_to_id
+    assert loaded.devices.find_devices() == parsed.devices.find_devices()
+    for device in parsed.devices.devices_list:
+        loaded_device = loaded.devices.get_device(device.device_id)
+        assert loaded_device.device_kind == device.device_kind
+        assert loaded_device.inputs == device.inputs
+        # Clock and D-type signals are random until a cold start-up, as after parsing
+        assert loaded_device.outputs.keys() == device.outputs.keys()
+    assert loaded.devices.names is loaded.names
+    assert loaded.monitors.identifier_to_port == parsed.monitors.identifier_to_port
+
+    for seed in range(3):
+        assert run_parser(loaded, seed, 50) == run_parser(parsed, seed, 50)
+
+
+def test_keys(tmp_path):
+    """Test if changed files miss the cache, and failed parses are not stored."""
+    cache = NetlistCache(str(tmp_path / "cache"))
+    file_path = str(tmp_path / "circuit.txt")
+    shutil.copy(path("test_parse_correct_text.txt"), file_path)
+    assert parse_file(file_path, cache).result
+
+    with open(file_path, "a") as file:
+        file.write("\n# changed\n")
+    changed = parse_file(file_path, cache)
+    assert changed.result
+    assert changed.tokens is not None  # the file was parsed again
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+    wrong = parse_file(path("test_parse_wrong_order_text.txt"), cache)
+    assert not wrong.result
+    assert not parse_file(path("test_parse_wrong_order_text.txt"), cache).result
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+
+def test_unreadable_cache(tmp_path):
+    """Test if a damaged cache file is parsed again and replaced."""
+    cache = NetlistCache(str(tmp_path / "cache"))
+    assert parse_file(path("test_parse_correct_text.txt"), cache).result
+    [file_name] = os.listdir(tmp_path / "cache")
+    with open(tmp_path / "cache" / file_name, "wb") as file:
+        file.write(b"not json")
+
+    parser = parse_file(path("test_parse_correct_text.txt"), cache)
+    assert parser.result
+    assert parser.tokens is not None
+    assert parse_file(path("test_parse_correct_text.txt"), cache).tokens is None
+
+
+def test_default_directory(monkeypatch):
+    """Test if caching is only on when the environment sets the cache directory."""
+    monkeypatch.setenv("LOGSIM_CACHE", "")
+    assert NetlistCache.get_default_directory() is None
+    monkeypatch.setenv("LOGSIM_CACHE", "/tmp/netlists")
+    assert NetlistCache.get_default_directory() == "/tmp/netlists"
+    monkeypatch.delenv("LOGSIM_CACHE")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/cache")
+    assert NetlistCache.get_default_directory() is None
+
+
+def test_eviction(tmp_path):
+    """Test if the least recently used files are removed beyond the cache size."""
+    cache = NetlistCache(str(tmp_path / "cache"))
+    cache_files = []
+    for file_name in ["test_parse_correct_text.txt", "test_parse_correct_text_2.txt",
+                      "test_parse_correct_text_3.txt"]:
+        assert parse_file(path(file_name), cache).result
+        [cache_file] = set(os.listdir(tmp_path / "cache")) - set(cache_files)
+        cache_files.append(cache_file)
+        os.utime(tmp_path / "cache" / cache_file, (1000 + len(cache_files),) * 2)
+    size = sum(os.path.getsize(tmp_path / "cache" / cache_file)
+               for cache_file in cache_files)
+
+    # Loading the first file makes the second the least recently used
+    assert parse_file(path("test_parse_correct_text.txt"), cache).tokens is None
+    cache.max_size = size - 1
+    cache.evict()
+    assert sorted(os.listdir(tmp_path / "cache")) == sorted(
+        [cache_files[0], cache_files[2]])
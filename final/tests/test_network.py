@@ -341,3 +341,197 @@ def test_oscillating_network(new_network: Network) -> None:
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+    # The repeated state is found long before the iteration limit
+    assert network.oscillation_period == 2
+
+
+def test_slow_network_settles(new_network: Network) -> None:
+    """Test if a network settling over many iterations is not rejected."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, NOR1, NOR2, I1, I2] = names.lookup(["Sw1", "Nor1", "Nor2", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    # A chain of inverters after a latch, made in reverse order, so that each
+    # iteration only settles one more inverter
+    inverters = names.lookup([f"Not{index}" for index in range(30)])
+    for device_id in reversed(inverters):
+        devices.make_device(device_id, devices.NAND, 1)
+    devices.make_device(NOR1, devices.NOR, 2)
+    devices.make_device(NOR2, devices.NOR, 2)
+    network.make_connection(SW1, None, NOR1, I1)
+    network.make_connection(NOR2, None, NOR1, I2)
+    network.make_connection(NOR1, None, NOR2, I1)
+    network.make_connection(SW1, None, NOR2, I2)
+    for previous, device_id in zip([NOR1] + inverters, inverters):
+        network.make_connection(previous, None, device_id, I1)
+
+    assert network.execute_network()
+    devices.set_switch(SW1, 1)
+    assert network.execute_network()
+    assert network.oscillation_period is None
+
+
+def test_levelize(new_network: Network) -> None:
+    """Test if levelize groups gates by level and separates feedback loops."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, AND1, OR1, NOR1, NOR2, I1, I2] = names.lookup(
+        ["Sw1", "And1", "Or1", "Nor1", "Nor2", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(AND1, devices.AND, 1)
+    devices.make_device(OR1, devices.OR, 2)
+    devices.make_device(NOR1, devices.NOR, 1)
+    devices.make_device(NOR2, devices.NOR, 1)
+
+    # Sw1 > Or1 > And1, with Nor1 in a loop with itself, read by Nor2
+    network.make_connection(SW1, None, OR1, I1)
+    network.make_connection(SW1, None, OR1, I2)
+    network.make_connection(OR1, None, AND1, I1)
+    network.make_connection(NOR1, None, NOR1, I1)
+    network.make_connection(NOR1, None, NOR2, I1)
+
+    assert network.levelize() == ([[OR1], [AND1]], [NOR1, NOR2])
+
+
+def test_deep_logic_settles(new_network: Network) -> None:
+    """Test if deep logic made in the wrong kind order settles in one cycle."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, I1] = names.lookup(["Sw1", "I1"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+
+    # A chain of 60 gates, each reading the previous one, made so that every
+    # gate is executed before the gate it reads when grouped by kind
+    gate_kinds = [devices.XOR, devices.NOR, devices.NAND, devices.OR, devices.AND]
+    gate_ids = names.lookup(["G" + str(number) for number in range(60)])
+    previous_id = SW1
+    for number, gate_id in enumerate(gate_ids):
+        gate_kind = gate_kinds[number % len(gate_kinds)]
+        if gate_kind == devices.XOR:
+            devices.make_device(gate_id, gate_kind)
+            [I2] = names.lookup(["I2"])
+            network.make_connection(SW1, None, gate_id, I2)
+        else:
+            devices.make_device(gate_id, gate_kind, 1)
+        network.make_connection(previous_id, None, gate_id, I1)
+        previous_id = gate_id
+
+    gate_levels, feedback_gates = network.get_gate_levels()
+    assert [gate_id for [gate_id] in gate_levels] == gate_ids
+    assert feedback_gates == []
+
+    # Each gate settles in a single pass, so the network does not oscillate
+    for switch_state in [devices.HIGH, devices.LOW, devices.HIGH]:
+        devices.set_switch(SW1, switch_state)
+        assert network.execute_network()
+
+
+def test_update_clocks_and_rc(new_network: Network) -> None:
+    """Test if clocks toggle and RCs trigger at the right cycles."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    [CL1_ID, CL2_ID, RC1_ID] = names.lookup(["Clock1", "Clock2", "Rc1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    devices.make_device(CL1_ID, devices.CLOCK, 2)
+    devices.make_device(CL2_ID, devices.CLOCK, 3)
+    devices.make_device(RC1_ID, devices.RC, 4)
+    clock1 = devices.get_device(CL1_ID)
+    clock2 = devices.get_device(CL2_ID)
+    rc1 = devices.get_device(RC1_ID)
+    clock1.outputs[None] = LOW
+    clock1.clock_counter = 0
+    clock2.outputs[None] = HIGH
+    clock2.clock_counter = 1
+
+    signals = []
+    for _ in range(8):
+        network.execute_network()
+        signals.append([clock1.outputs[None], clock2.outputs[None],
+                        rc1.outputs[None]])
+    assert signals == [[LOW, HIGH, HIGH], [LOW, HIGH, HIGH],
+                       [HIGH, LOW, HIGH], [HIGH, LOW, HIGH],
+                       [LOW, LOW, LOW], [LOW, HIGH, LOW],
+                       [HIGH, HIGH, LOW], [HIGH, HIGH, LOW]]
+    assert [clock1.clock_counter, clock2.clock_counter, rc1.rc_counter] == [
+        2, 3, 8]
+
+    # Counters set directly, as by cold start-up, are rescheduled
+    clock1.clock_counter = 2
+    clock2.clock_counter = 0
+    network.execute_network()
+    assert [clock1.outputs[None], clock2.outputs[None]] == [LOW, HIGH]
+    assert [clock1.clock_counter, clock2.clock_counter] == [1, 1]
+
+
+def test_find_loops(new_network: Network) -> None:
+    """Test if find_loops separates combinational and sequential loops."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, CL1, D1, NOR1, NOR2, AND1, OR1, I1, I2] = names.lookup(
+        ["Sw1", "Clock1", "D1", "Nor1", "Nor2", "And1", "Or1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(CL1, devices.CLOCK, 2)
+    devices.make_device(D1, devices.D_TYPE)
+    devices.make_device(NOR1, devices.NOR, 2)
+    devices.make_device(NOR2, devices.NOR, 2)
+    devices.make_device(AND1, devices.AND, 1)
+    devices.make_device(OR1, devices.OR, 2)
+
+    # Nor1 and Nor2 form a latch, read by And1
+    network.make_connection(SW1, None, NOR1, I1)
+    network.make_connection(NOR2, None, NOR1, I2)
+    network.make_connection(SW1, None, NOR2, I1)
+    network.make_connection(NOR1, None, NOR2, I2)
+    network.make_connection(NOR1, None, AND1, I1)
+
+    # D1 toggles on each clock edge, through Or1
+    network.make_connection(CL1, None, D1, devices.CLK_ID)
+    network.make_connection(SW1, None, D1, devices.SET_ID)
+    network.make_connection(SW1, None, D1, devices.CLEAR_ID)
+    network.make_connection(D1, devices.QBAR_ID, OR1, I1)
+    network.make_connection(SW1, None, OR1, I2)
+    network.make_connection(OR1, None, D1, devices.DATA_ID)
+
+    assert network.get_loops() == ([[NOR1, NOR2]], [[D1, OR1]])
+
+
+def test_find_oscillating_devices(new_network: Network) -> None:
+    """Test if only the devices in the toggling loop are reported."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, NAND1, NOT1, NOT2, AND1, I1, I2] = names.lookup(
+        ["Sw1", "Nand1", "Not1", "Not2", "And1", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 1)
+    devices.make_device(NAND1, devices.NAND, 2)
+    devices.make_device(NOT1, devices.NAND, 1)
+    devices.make_device(NOT2, devices.NAND, 1)
+    devices.make_device(AND1, devices.AND, 1)
+
+    # A ring oscillator enabled by Sw1, read by And1
+    network.make_connection(SW1, None, NAND1, I1)
+    network.make_connection(NOT2, None, NAND1, I2)
+    network.make_connection(NAND1, None, NOT1, I1)
+    network.make_connection(NOT1, None, NOT2, I1)
+    network.make_connection(NOT2, None, AND1, I1)
+
+    assert network.get_loops() == ([[NAND1, NOT1, NOT2]], [])
+    assert not network.execute_network()
+
+    outputs = [dict(devices.get_device(device_id).outputs)
+               for device_id in [NAND1, NOT1, NOT2, AND1]]
+    assert network.find_oscillating_devices() == [[NAND1, NOT1, NOT2]]
+    assert [devices.get_device(device_id).outputs
+            for device_id in [NAND1, NOT1, NOT2, AND1]] == outputs
@@ -127,3 +127,51 @@ def test_scanner_raise_exception():
         Scanner(path=path_chinese, names=Names())
     with pytest.raises(UnicodeDecodeError):
         Scanner(path=path_not_text, names=Names())
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("A1 > B.I1;\n  12 ²3 # comment\n[/ multi\nline / C",
+     [(Scanner.NAME, 0, 0), (Scanner.ARROW, 0, 3), (Scanner.NAME, 0, 5), (Scanner.FULL_STOP, 0, 6),
+      (Scanner.NAME, 0, 7), (Scanner.SEMICOLON, 0, 9), (Scanner.NUMBER, 1, 2),
+      (Scanner.NUMBER, 1, 5), (Scanner.INVALID, 2, 0), (Scanner.NAME, 3, 7),
+      (Scanner.EOF, 3, 8)]),
+    ("名字 x / open", [(Scanner.NAME, 0, 0), (Scanner.NAME, 0, 3), (Scanner.EOF, 0, 12)]),
+    ("A # open", [(Scanner.NAME, 0, 0), (Scanner.EOF, 0, 9)]),
+])
+def test_get_symbol_position(tmp_path, text: str, expected: list) -> None:
+    """Test if get_symbol returns the line and character of each symbol."""
+    file_path = tmp_path / "definition.txt"
+    file_path.write_text(text, encoding="utf-8")
+    scanner = Scanner(path=str(file_path), names=Names())
+    symbols = [scanner.get_symbol() for _ in expected]
+    assert [(symbol.type, symbol.line, symbol.character_in_line)
+            for symbol in symbols] == expected
+    assert [symbol.id for symbol in symbols if symbol.type == Scanner.NUMBER] == \
+        (["12", "²3"] if "12" in text else [])
+    assert scanner.get_symbol().type == Scanner.EOF
+
+
+@pytest.mark.parametrize("text, lines", [
+    ("DEVICE {\nG1: AND;\n}\n", ["DEVICE {\n", "G1: AND;\n", "}\n", ""]),
+    ("DEVICE {\n}", ["DEVICE {\n", "}", ""]),
+    ("", [""]),
+])
+def test_get_line(tmp_path, text: str, lines: list) -> None:
+    """Test if get_line returns each line of the file, and an empty line after the last."""
+    file_path = tmp_path / "definition.txt"
+    file_path.write_text(text)
+    scanner = Scanner(path=str(file_path), names=Names())
+    assert [scanner.get_line(line) for line in range(len(lines))] == lines
+
+
+def test_get_token_buffer(new_scanner: Scanner) -> None:
+    """Test if the token buffer holds the symbols returned by get_symbol."""
+    tokens = new_scanner.get_token_buffer()
+    assert len(tokens) == len(test_list)
+    for index in range(len(tokens)):
+        symbol = new_scanner.get_symbol()
+        buffered_symbol = tokens.get_symbol(index)
+        assert (tokens.types[index], tokens.ids[index]) == test_list[index]
+        assert (buffered_symbol.type, buffered_symbol.id, buffered_symbol.line,
+                buffered_symbol.character_in_line) == (symbol.type, symbol.id, symbol.line,
+                                                        symbol.character_in_line)
@@ -0,0 +1,304 @@
+"""Test the simulator module."""
+import random
+from array import array
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from logsim.monitors import Monitors
+from logsim.scanner import Scanner
+from logsim.parse import Parser
+from logsim.simulator import Simulator
+from logsim.compiled_network import CompiledNetwork
+from logsim.event_network import EventDrivenNetwork
+from tests.test_compiled_network import path
+
+
+def parse_simulator(file_path: str, seed: int) -> Simulator:
+    """Return a simulator for the network in the definition file, cold started with seed."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    parser = Parser(names, devices, network, monitors,
+                    Scanner(file_path, names))
+    assert parser.parse_network()
+    random.seed(seed)
+    devices.cold_startup()
+    return Simulator(names, devices, network, monitors)
+
+
+def make_counter(bits: int, half_period: int) -> Simulator:
+    """Return a simulator for a ripple counter, with every D-type monitored."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    [SW_ID, CLK_ID] = names.lookup(["Sw", "Clk"])
+    devices.make_device(SW_ID, devices.SWITCH, 0)
+    devices.make_device(CLK_ID, devices.CLOCK, half_period)
+    clock_output = (CLK_ID, None)
+    for bit in range(bits):
+        [D_ID] = names.lookup([f"D{bit}"])
+        devices.make_device(D_ID, devices.D_TYPE)
+        network.make_connection(*clock_output, D_ID, devices.CLK_ID)
+        network.make_connection(SW_ID, None, D_ID, devices.SET_ID)
+        network.make_connection(SW_ID, None, D_ID, devices.CLEAR_ID)
+        network.make_connection(D_ID, devices.QBAR_ID, D_ID, devices.DATA_ID)
+        monitors.make_monitor(D_ID, devices.Q_ID, f"D{bit}")
+        clock_output = (D_ID, devices.QBAR_ID)
+    return Simulator(names, devices, network, monitors)
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+    path("test_parse_correct_text_3.txt"),
+    path("test_parse_correct_text_4.txt"),
+])
+def test_fast_forward_matches_simulation(file_path: str) -> None:
+    """Test if fast-forwarding gives the same traces as simulating every cycle."""
+    for seed in range(3):
+        reference = parse_simulator(file_path, seed)
+        reference.fast_forward = False
+        assert reference.run_cycles(300)
+        assert reference.run_cycles(77)  # continue
+
+        simulator = parse_simulator(file_path, seed)
+        assert simulator.run_cycles(300)
+        assert simulator.run_cycles(77)
+
+        assert (simulator.monitors.signals_dictionary
+                == reference.monitors.signals_dictionary)
+        assert simulator.get_state() == reference.get_state()
+
+
+def test_fast_forward_counter() -> None:
+    """Test if a long run of a counter only simulates a few periods."""
+    random.seed(0)
+    reference = make_counter(3, 2)
+    reference.fast_forward = False
+    assert reference.run_cycles(1000)
+
+    random.seed(0)
+    simulator = make_counter(3, 2)
+    executed = []
+    execute_network = simulator.network.execute_network
+
+    def count_execution() -> bool:
+        executed.append(1)
+        return execute_network()
+
+    simulator.network.execute_network = count_execution
+    assert simulator.run_cycles(1000)
+    assert simulator.period == 2 * 2 * 2 ** 3
+    assert len(executed) < 4 * simulator.period
+    assert (simulator.monitors.signals_dictionary
+            == reference.monitors.signals_dictionary)
+
+    assert simulator.run_cycles(10 ** 6)
+    assert all(len(signal_list) == 1000 + 10 ** 6 for signal_list
+               in simulator.monitors.signals_dictionary.values())
+
+
+@pytest.mark.parametrize("engine_class", [CompiledNetwork, EventDrivenNetwork])
+def test_fast_forward_with_engine(engine_class: type) -> None:
+    """Test if fast-forwarding with an engine gives the same traces as simulating every cycle."""
+    file_path = path("test_parse_correct_text.txt")
+    for seed in range(3):
+        reference = parse_simulator(file_path, seed)
+        reference.fast_forward = False
+        assert reference.run_cycles(500)
+
+        simulator = parse_simulator(file_path, seed)
+        network = simulator.network
+        network.set_engine(engine_class(simulator.names, simulator.devices, network))
+        assert simulator.run_cycles(500)
+        assert simulator.skipped
+        assert (simulator.monitors.signals_dictionary
+                == reference.monitors.signals_dictionary)
+        assert simulator.get_state() == reference.get_state()
+
+
+def test_fast_forward_comparisons() -> None:
+    """Test if states are only compared when a period could be skipped."""
+    random.seed(0)
+    simulator = make_counter(3, 2)
+    compared = []
+    get_run_state = simulator.get_run_state
+
+    def count_comparison():
+        compared.append(simulator.cycle)
+        return get_run_state()
+
+    simulator.get_run_state = count_comparison
+    assert simulator.get_period_bound() == 4
+    assert simulator.get_transient_bound() == 0
+    assert simulator.run_cycles(7)  # too short to skip a period
+    assert not compared
+
+    assert simulator.run_cycles(1000)
+    assert simulator.period == 2 * 2 * 2 ** 3
+    assert compared and all(cycle % 4 == 3 for cycle in compared)
+    assert len(compared) < 4 * simulator.period // 4
+
+
+def test_oscillating_network() -> None:
+    """Test if an oscillating network is reported."""
+    simulator = parse_simulator(path("test_parse_oscillating.txt"), 0)
+    assert not simulator.run_cycles(10)
+
+
+@pytest.mark.parametrize("fast_forward", [False, True])
+def test_get_outputs_at_past_cycles(fast_forward: bool) -> None:
+    """Test if the outputs at any past cycle are reconstructed exactly."""
+    file_path = path("test_parse_correct_text.txt")
+    reference = parse_simulator(file_path, 0)
+    reference.fast_forward = False
+    devices = reference.devices
+    switch_id = devices.find_devices(devices.SWITCH)[0]
+
+    def get_outputs() -> dict:
+        return {(device.device_id, port_id): signal
+                for device in devices.devices_list
+                for port_id, signal in device.outputs.items()}
+
+    def run_outputs(cycles: int) -> list:
+        outputs = []
+        for _ in range(cycles):
+            assert reference.run_cycles(1)
+            outputs.append(get_outputs())
+        return outputs
+
+    reference_outputs = [get_outputs()]
+    reference_outputs += run_outputs(200)
+    devices.set_switch(switch_id, 1 - devices.get_device(switch_id).switch_state)
+    reference_outputs += run_outputs(300)
+
+    simulator = parse_simulator(file_path, 0)
+    simulator.fast_forward = fast_forward
+    simulator.keyframe_interval = 16
+    simulator.max_keyframes = 8
+    simulator.start_run()
+    assert simulator.run_cycles(200)
+    simulator.devices.set_switch(switch_id, devices.get_device(switch_id).switch_state)
+    assert simulator.run_cycles(300)
+    assert simulator.cycle == 500
+    if fast_forward:
+        assert simulator.skipped
+
+    state = simulator.get_state()
+    for cycle in [0, 1, 15, 16, 17, 150, 200, 201, 333, 499, 500]:
+        assert simulator.get_outputs(cycle) == reference_outputs[cycle]
+    assert simulator.get_outputs(501) is None
+    assert simulator.get_state() == state
+    assert len(simulator.keyframes) <= (simulator.max_keyframes
+                                        + len(simulator.required_keyframes))
+
+
+def test_backfill_monitor() -> None:
+    """Test if monitors made after a run are filled in with the recorded signals."""
+    file_path = path("test_parse_correct_text.txt")
+    reference = parse_simulator(file_path, 0)
+    simulator = parse_simulator(file_path, 0)
+    names = simulator.names
+    devices = simulator.devices
+    [D2_ID, CLK1_ID] = names.lookup(["D2", "CLK1"])
+
+    reference.monitors.make_monitor(CLK1_ID, None, "clk")
+    reference.monitors.make_monitor(D2_ID, devices.CLK_ID, "d2")
+    simulator.start_run()
+    assert reference.run_cycles(400)
+    assert simulator.run_cycles(400)
+    assert simulator.skipped
+
+    for device_id, port_id, identifier in [(CLK1_ID, None, "clk"),
+                                           (D2_ID, devices.CLK_ID, "d2")]:
+        assert simulator.monitors.make_monitor(device_id, port_id, identifier,
+                                               400) == simulator.monitors.NO_ERROR
+        assert simulator.monitors.signals_dictionary[(device_id, port_id)] == array(
+            "b", [devices.BLANK] * 400)
+        assert simulator.backfill_monitor(device_id, port_id)
+        assert (simulator.monitors.signals_dictionary[(device_id, port_id)]
+                == reference.monitors.signals_dictionary[(device_id, port_id)])
+
+
+def test_replay_oscillation() -> None:
+    """Test if cycles which oscillate when simulated again are not returned."""
+    random.seed(0)
+    simulator = make_counter(3, 2)
+    simulator.keyframe_interval = 64
+    assert simulator.run_cycles(200)
+    [D1_ID] = simulator.names.lookup(["D1"])
+    devices = simulator.devices
+    assert simulator.monitors.remove_monitor_by_port(D1_ID, devices.Q_ID)
+    assert simulator.monitors.make_monitor(D1_ID, devices.Q_ID, "D1",
+                                           200) == simulator.monitors.NO_ERROR
+    state = simulator.get_state()
+
+    simulator.network.execute_network = lambda: False
+    assert simulator.get_snapshot(150) is None
+    assert not simulator.backfill_monitor(D1_ID, devices.Q_ID)
+    assert simulator.get_state() == state
+
+
+@pytest.mark.parametrize("history_budget", [2 ** 24, 3, 0])
+def test_backfill_after_skips(history_budget: int) -> None:
+    """Test if skipped cycles, and cycles beyond the history budget, are backfilled."""
+    random.seed(0)
+    reference = make_counter(3, 2)
+    reference.fast_forward = False
+    assert reference.run_cycles(20000)
+
+    random.seed(0)
+    simulator = make_counter(3, 2)
+    simulator.history_budget = history_budget
+    [D0_ID, D2_ID] = simulator.names.lookup(["D0", "D2"])
+    devices = simulator.devices
+    for device_id in [D0_ID, D2_ID]:
+        assert simulator.monitors.remove_monitor_by_port(device_id, devices.Q_ID)
+    assert simulator.run_cycles(20000)
+    assert simulator.skipped
+
+    # Skipped cycles have no rows, and the budget bounds the rows kept
+    assert len(simulator.history) <= max(history_budget, 3 * 16)
+    for device_id, identifier in [(D0_ID, "D0"), (D2_ID, "D2")]:
+        port = (device_id, devices.Q_ID)
+        assert simulator.monitors.make_monitor(
+            *port, identifier, 20000) == simulator.monitors.NO_ERROR
+        assert simulator.backfill_monitor(*port)
+        assert (simulator.monitors.signals_dictionary[port]
+                == reference.monitors.signals_dictionary[port])
+
+
+def test_history_window() -> None:
+    """Test if a history window keeps the last cycles of an endless run."""
+    random.seed(0)
+    reference = make_counter(3, 2)
+    reference.fast_forward = False
+    assert reference.run_cycles(1000)
+
+    random.seed(0)
+    simulator = make_counter(3, 2)
+    simulator.history_budget = 2 ** 24
+    simulator.monitors.set_history_window(100)
+    [D0_ID] = simulator.names.lookup(["D0"])
+    simulator.monitors.set_history_window(300, D0_ID, simulator.devices.Q_ID)
+    assert simulator.run_cycles(1000)
+
+    for port, trace in simulator.monitors.signals_dictionary.items():
+        window = 300 if port == (D0_ID, simulator.devices.Q_ID) else 100
+        assert len(trace) == 1000
+        assert trace.get_first_cycle() == 1000 - window
+        assert trace.get_signals() == reference.monitors.signals_dictionary[
+            port].get_signals(1000 - window)
+    assert simulator.monitors.get_first_cycle() == 700
+
+    # Memory stays constant, however long the simulation runs
+    assert simulator.run_cycles(10 ** 7)
+    assert all(len(trace) == 1000 + 10 ** 7 and len(trace.get_signals()) <= 300
+               for trace in simulator.monitors.signals_dictionary.values())
+    assert len(simulator.history) <= 2 * 300 * simulator.history_row_size
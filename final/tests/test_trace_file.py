@@ -0,0 +1,110 @@
+"""Test the trace_file module."""
+from array import array
+
+import pytest
+
+from logsim.trace_file import TraceFile, FileTrace
+from tests.test_compiled_network import path
+from tests.test_simulator import parse_simulator
+
+
+def get_expected(monitors, start=0, stop=None):
+    """Return {identifier: signals} of the monitors' traces."""
+    return {identifier: monitors.signals_dictionary[port].get_signals(start, stop)
+            for identifier, port in monitors.identifier_to_port.items()}
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_write_and_read(tmp_path, compression):
+    """Test if a trace file holds the monitored signals."""
+    simulator = parse_simulator(path("test_parse_correct_text.txt"), 0)
+    monitors = simulator.monitors
+    assert simulator.run_cycles(250)
+    file_path = str(tmp_path / "run.ltr")
+    TraceFile.write(monitors, file_path, compression, chunk_cycles=64)
+
+    trace_file = TraceFile(file_path)
+    assert set(trace_file.identifiers) == set(monitors.identifier_to_port)
+    assert trace_file.cycles == 250
+    for start, stop in [(0, None), (10, 20), (60, 70), (63, 129), (200, 1000), (30, 10)]:
+        assert {identifier: trace_file.get_signals(identifier, start, stop)
+                for identifier in trace_file.identifiers} == get_expected(
+                    monitors, start, stop)
+    with pytest.raises(KeyError):
+        trace_file.get_signals("missing")
+    trace_file.close()
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_load_monitors(tmp_path, compression):
+    """Test if the traces of a file replace those of the same identifiers."""
+    simulator = parse_simulator(path("test_parse_correct_text.txt"), 0)
+    monitors = simulator.monitors
+    [CLK1_ID] = simulator.names.lookup(["CLK1"])
+    monitors.set_history_window(40)
+    assert simulator.run_cycles(100)
+    monitors.make_monitor(CLK1_ID, None, "clock", 100)
+    assert simulator.run_cycles(30)
+    expected = get_expected(monitors, 90)
+    file_path = str(tmp_path / "run.ltr")
+    TraceFile.write(monitors, file_path, compression, chunk_cycles=16)
+
+    trace_file = TraceFile(file_path)
+    assert trace_file.first_cycle == 90
+    assert trace_file.get_signals("clock", 0, 95) == array("b", [monitors.devices.BLANK] * 5)
+
+    simulator = parse_simulator(path("test_parse_correct_text.txt"), 1)
+    monitors = simulator.monitors
+    assert simulator.run_cycles(5)
+    assert sorted(trace_file.load_monitors(monitors)) == sorted(
+        monitors.identifier_to_port)
+    trace_file.close()  # the loaded traces still read the file
+
+    # The traces are views of the file, and uncompressed signals are not copied
+    for trace in monitors.signals_dictionary.values():
+        assert isinstance(trace, FileTrace)
+        assert trace.get_first_cycle() == 90
+        assert isinstance(trace.get_signals(), memoryview) == (compression is None)
+    assert get_expected(monitors, 90) == {identifier: expected[identifier]
+                                          for identifier in monitors.identifier_to_port}
+    port = monitors.identifier_to_port["S1"]
+    assert monitors.signals_dictionary[port].get_signal(100) == expected["S1"][10]
+    assert set(monitors.get_trace_signals(port, 0, 90)) == {monitors.devices.BLANK}
+
+    # Recording copies the signals to the monitors' trace store
+    assert simulator.run_cycles(3)
+    assert all(len(trace) == 133 for trace in monitors.signals_dictionary.values())
+    assert get_expected(monitors, 90, 130) == {identifier: expected[identifier]
+                                               for identifier in monitors.identifier_to_port}
+
+
+@pytest.mark.parametrize("compression", [None, "lzma"])
+def test_get_column(tmp_path, compression):
+    """Test if a monitor's signals are read as a NumPy array."""
+    np = pytest.importorskip("numpy")
+    simulator = parse_simulator(path("test_parse_correct_text_2.txt"), 0)
+    monitors = simulator.monitors
+    assert simulator.run_cycles(300)
+    file_path = str(tmp_path / "run.ltr")
+    TraceFile.write(monitors, file_path, compression, chunk_cycles=128)
+
+    trace_file = TraceFile(file_path)
+    for identifier, signals in get_expected(monitors).items():
+        column = trace_file.get_column(identifier)
+        assert column.dtype == np.int8
+        assert isinstance(column, np.memmap) == (compression is None)
+        assert column.tolist() == signals.tolist()
+    del column
+    trace_file.close()
+
+
+def test_not_a_trace_file(tmp_path):
+    """Test that unknown files and compressions are rejected."""
+    file_path = str(tmp_path / "run.ltr")
+    with open(file_path, "wb") as file:
+        file.write(b"not a trace file at all, but long enough")
+    with pytest.raises(ValueError):
+        TraceFile(file_path)
+    simulator = parse_simulator(path("test_parse_correct_text.txt"), 0)
+    with pytest.raises(ValueError):
+        TraceFile.write(simulator.monitors, file_path, "bz2")
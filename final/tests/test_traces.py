@@ -0,0 +1,196 @@
+"""Test the traces module."""
+import itertools
+import random
+from array import array
+
+import pytest
+
+from logsim.traces import ArrayTrace, ChangeTrace, RingTrace, MappedTrace
+
+# Signal levels, as in devices.Devices
+LOW, HIGH, BLANK = 0, 1, 4
+
+
+@pytest.fixture(params=["array", "changes", "ring", "mapped"])
+def trace_class(request, tmp_path):
+    """Return a function making a trace of every trace store in turn.
+
+    The ring has a window keeping every cycle of the tests.
+    """
+    if request.param == "array":
+        return ArrayTrace
+    elif request.param == "changes":
+        return ChangeTrace
+    elif request.param == "ring":
+        return lambda signals=(): RingTrace(signals, window=1000)
+    paths = (str(tmp_path / f"trace{index}") for index in itertools.count())
+    return lambda signals=(): MappedTrace(next(paths), signals)
+
+
+def test_append_and_read(trace_class):
+    """Test that every trace store reads back the appended signals."""
+    random.seed(0)
+    signals = [BLANK] * 5 + [random.choice([LOW, HIGH]) for _ in range(200)]
+    trace = trace_class(signals[:10])
+    for signal in signals[10:]:
+        trace.append(signal)
+
+    assert len(trace) == len(signals)
+    assert trace == array("b", signals)
+    assert list(trace) == signals
+    for cycle in range(len(signals)):
+        assert trace.get_signal(cycle) == signals[cycle]
+        assert trace[cycle] == signals[cycle]
+    assert trace.get_signal(-1) == signals[-1]
+    for start, stop in [(0, None), (3, 7), (7, 3), (-20, None), (50, 1000),
+                        (0, 0), (204, 205)]:
+        assert trace.get_signals(start, stop) == array("b", signals[start:stop])
+        assert trace[start:stop] == array("b", signals[start:stop])
+    with pytest.raises(IndexError):
+        trace.get_signal(len(signals))
+
+
+@pytest.mark.parametrize("signals, period, repeats", [
+    ([LOW, HIGH, HIGH, LOW], 2, 3),
+    ([LOW, HIGH, HIGH, LOW], 4, 2),
+    ([BLANK, HIGH, HIGH, HIGH], 2, 5),
+    ([LOW, HIGH, LOW, HIGH], 1, 4),
+    ([HIGH, LOW, HIGH, LOW, HIGH, LOW], 2, 1),
+    ([LOW, HIGH], 5, 2),
+    ([], 1, 3),
+])
+def test_repeat_and_truncate(trace_class, signals, period, repeats):
+    """Test that every trace store repeats and truncates its signals."""
+    trace = trace_class(signals)
+    trace.repeat(period, repeats)
+    expected = signals + signals[-period:] * repeats
+    assert trace == array("b", expected)
+
+    for cycle in [len(expected), len(expected) - 1, 5, 1, 0]:
+        trace.truncate(cycle)
+        assert trace == array("b", expected[:cycle])
+    trace.extend(signals)
+    assert trace == array("b", signals)
+
+
+def test_traces_compare_equal():
+    """Test that traces holding the same signals are equal in any store."""
+    signals = [BLANK, LOW, HIGH, HIGH, LOW]
+    assert ArrayTrace(signals) == ChangeTrace(signals)
+    assert ChangeTrace(signals) != ChangeTrace(signals[:-1])
+    assert {"A": ChangeTrace(signals)} == {"A": array("b", signals)}
+
+
+def test_change_trace_stores_only_changes():
+    """Test that the change trace memory grows with the number of changes."""
+    trace = ChangeTrace([BLANK, BLANK, LOW, LOW, LOW, HIGH])
+    assert list(trace.change_cycles) == [0, 2, 5]
+    assert list(trace.change_signals) == [BLANK, LOW, HIGH]
+
+    # A constant signal, repeated for a million cycles, adds no changes
+    trace.repeat(1, 1000000)
+    assert len(trace) == 1000006
+    assert len(trace.change_cycles) == 3
+    assert trace.get_signal(999999) == HIGH
+
+    # A clock adds one change per edge
+    trace.extend([LOW, HIGH])
+    trace.repeat(2, 10)
+    assert len(trace.change_cycles) == 3 + 22
+    assert trace.get_signals(len(trace) - 4) == array("b", [LOW, HIGH] * 2)
+
+
+@pytest.mark.parametrize("window", [1, 3, 8, 50])
+def test_ring_trace_keeps_window(window):
+    """Test that the ring trace keeps the signals of the last window cycles."""
+    random.seed(window)
+    trace = RingTrace(window=window)
+    reference = ArrayTrace()
+    for _ in range(300):
+        operation = random.choice(["append", "extend", "repeat", "truncate"])
+        if operation == "append":
+            signal = random.choice([LOW, HIGH])
+            trace.append(signal)
+            reference.append(signal)
+        elif operation == "extend":
+            signals = [random.choice([LOW, HIGH])
+                       for _ in range(random.randrange(2 * window))]
+            trace.extend(signals)
+            reference.extend(signals)
+        elif operation == "repeat" and len(reference) - trace.get_first_cycle() >= 4:
+            period = random.randrange(1, 5)
+            repeats = random.randrange(10)
+            trace.repeat(period, repeats)
+            reference.repeat(period, repeats)
+        elif operation == "truncate":
+            cycle = max(len(reference) - random.randrange(window + 2), 0)
+            trace.truncate(cycle)
+            reference.truncate(cycle)
+
+        first_cycle = trace.get_first_cycle()
+        assert len(trace) == len(reference)
+        assert len(trace) - window <= first_cycle <= len(trace)
+        assert trace.get_signals() == reference.get_signals(first_cycle)
+        assert trace.get_signals(len(trace) - 2) == reference.get_signals(
+            max(len(trace) - 2, first_cycle))
+        if len(trace) > first_cycle:
+            assert trace.get_signal(-1) == reference.get_signal(-1)
+
+    # Cycles keep their absolute numbers
+    trace = RingTrace(range(10), window=4)
+    assert len(trace) == 10
+    assert trace.get_first_cycle() == 6
+    assert trace[7] == 7
+    with pytest.raises(IndexError):
+        trace.get_signal(5)
+
+    # Repeating a million cycles only writes the window
+    trace.repeat(2, 500000)
+    assert len(trace) == 1000010
+    assert trace.get_signals() == array("b", [8, 9, 8, 9])
+
+
+def test_mapped_trace_file(tmp_path, monkeypatch):
+    """Test that a mapped trace can be loaded again from its file."""
+    path = str(tmp_path / "trace")
+    monkeypatch.setattr(MappedTrace, "INITIAL_CAPACITY", 4)
+    monkeypatch.setattr(MappedTrace, "BLOCK_SIZE", 5)
+    trace = MappedTrace(path, [BLANK, LOW])
+    trace.extend([HIGH, LOW, HIGH])
+    trace.repeat(2, 6)  # written in blocks of two periods
+    expected = [BLANK, LOW, HIGH, LOW, HIGH] + [LOW, HIGH] * 6
+    assert trace == array("b", expected)
+    assert trace.get_size() == 0
+
+    # The file can be loaded while the trace is still being recorded
+    assert MappedTrace.load(path) == array("b", expected)
+
+    trace.truncate(10)
+    trace.close()
+    trace = MappedTrace.load(path)
+    assert trace == array("b", expected[:10])
+    trace.append(HIGH)
+    assert trace.get_signal(-1) == HIGH
+    assert len(trace) == 11
+
+    with open(path, "wb") as file:
+        file.write(b"not a trace")
+    with pytest.raises(ValueError):
+        MappedTrace.load(path)
+
+
+def test_mapped_trace_views(tmp_path, monkeypatch):
+    """Test that a mapped trace reads its signals as views of the map."""
+    monkeypatch.setattr(MappedTrace, "INITIAL_CAPACITY", 4)
+    trace = MappedTrace(str(tmp_path / "trace"), [BLANK, LOW, HIGH])
+    signals = trace.get_signals(1)
+    assert isinstance(signals, memoryview) and signals.readonly
+    assert signals == array("b", [LOW, HIGH])
+    assert signals[0] == LOW and list(signals) == [LOW, HIGH]
+
+    # The view stays readable while the trace grows and is closed
+    trace.extend([LOW] * 10)
+    trace.close()
+    assert signals == array("b", [LOW, HIGH])
+    signals.release()
+    assert len(MappedTrace.load(str(tmp_path / "trace")).get_signals()) == 13
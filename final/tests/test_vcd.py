@@ -0,0 +1,120 @@
+"""Test the vcd module."""
+from typing import Dict
+
+import pytest
+
+from logsim.vcd import VcdWriter
+from tests.test_compiled_network import path
+from tests.test_simulator import parse_simulator, make_counter
+
+
+def read_vcd(file_path: str) -> Dict[str, str]:
+    """Return {identifier: values} of a VCD file, one value per cycle."""
+    codes = {}  # {code: [identifier]}
+    values = {}  # {code: value}
+    traces = {}  # {code: [value]}
+    time = None
+    with open(file_path) as file:
+        for line in file.read().split("\n"):
+            if line.startswith("$var"):
+                _, _, _, code, identifier, _ = line.split()
+                codes.setdefault(code, []).append(identifier)
+            elif line.startswith("#"):
+                if time is not None:
+                    for code, value in values.items():
+                        traces.setdefault(code, []).append(value * (int(line[1:]) - time))
+                time = int(line[1:])
+            elif line and not line.startswith("$"):
+                values[line[1:]] = line[0]
+    return {identifier: "".join(traces.get(code, []))
+            for code, identifiers in codes.items() for identifier in identifiers}
+
+
+def get_expected(monitors) -> Dict[str, str]:
+    """Return {identifier: values} of the monitors' traces, as VCD values."""
+    return {identifier: "".join("01xxz"[signal] for signal
+                                in monitors.signals_dictionary[port])
+            for identifier, port in monitors.identifier_to_port.items()}
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+])
+def test_stream_and_export(tmp_path, file_path):
+    """Test if streamed and exported dumps hold the monitored signals."""
+    for seed in range(3):
+        simulator = parse_simulator(file_path, seed)
+        monitors = simulator.monitors
+        writer = VcdWriter(monitors, str(tmp_path / "stream.vcd"))
+        writer.write_header()
+        monitors.writers.append(writer)
+        monitors.record_limit = 7
+        assert simulator.run_cycles(300)
+        assert simulator.run_cycles(45)
+        monitors.flush_signals()
+        writer.close()
+        assert read_vcd(str(tmp_path / "stream.vcd")) == get_expected(monitors)
+
+        writer = VcdWriter(monitors, str(tmp_path / "export.vcd"))
+        writer.write_traces()
+        writer.close()
+        assert read_vcd(str(tmp_path / "export.vcd")) == get_expected(monitors)
+
+
+def test_values_and_aliases(tmp_path):
+    """Test if BLANK signals are undriven, and aliases share their code."""
+    simulator = parse_simulator(path("test_parse_correct_text.txt"), 0)
+    monitors = simulator.monitors
+    [CLK1_ID] = simulator.names.lookup(["CLK1"])
+    assert simulator.run_cycles(10)
+    monitors.make_monitor(CLK1_ID, None, "clock", 10)
+    monitors.make_monitor(CLK1_ID, None, "alias")
+    assert simulator.run_cycles(30)
+
+    writer = VcdWriter(monitors, str(tmp_path / "export.vcd"))
+    writer.write_traces()
+    writer.close()
+    dump = read_vcd(str(tmp_path / "export.vcd"))
+    assert dump["clock"] == dump["alias"]
+    assert dump["clock"][:10] == "z" * 10
+    assert set(dump["clock"][10:]) == {"0", "1"}
+    with open(tmp_path / "export.vcd") as file:
+        assert sum(line.startswith("$var") for line in file) == 7
+
+
+def test_long_stream(tmp_path):
+    """Test if a million cycles are streamed with the traces kept bounded."""
+    simulator = make_counter(2, 1)
+    monitors = simulator.monitors
+    monitors.set_history_window(100)
+    writer = VcdWriter(monitors, str(tmp_path / "stream.vcd"))
+    writer.write_header()
+    monitors.writers.append(writer)
+    assert simulator.run_cycles(10 ** 6)
+    monitors.flush_signals()
+    writer.close()
+
+    dump = read_vcd(str(tmp_path / "stream.vcd"))
+    assert len(dump["D0"]) == 10 ** 6
+    assert dump["D1"][-100:] == get_expected(monitors)["D1"]
+
+
+def test_stream_rerun(tmp_path):
+    """Test if resetting the monitors for a new run restarts the streamed dump."""
+    simulator = make_counter(2, 1)
+    monitors = simulator.monitors
+    writer = VcdWriter(monitors, str(tmp_path / "stream.vcd"))
+    writer.write_header()
+    monitors.writers.append(writer)
+    assert simulator.run_cycles(500)
+
+    monitors.reset_monitors()
+    simulator.devices.cold_startup()
+    simulator.start_run()
+    assert simulator.run_cycles(30)
+    monitors.flush_signals()
+    writer.close()
+    dump = read_vcd(str(tmp_path / "stream.vcd"))
+    assert dump == get_expected(monitors)
+    assert len(dump["D0"]) == 30
@@ -0,0 +1,106 @@
+"""Test the vectorized_network module."""
+import random
+
+import pytest
+
+from logsim.names import Names
+from logsim.devices import Devices
+from logsim.network import Network
+from tests.test_compiled_network import path, build_network, run_traces
+
+pytest.importorskip("numpy")
+from logsim.vectorized_network import VectorizedNetwork  # noqa: E402
+
+
+@pytest.mark.parametrize("file_path", [
+    path("test_parse_correct_text.txt"),
+    path("test_parse_correct_text_2.txt"),
+    path("test_parse_correct_text_3.txt"),
+    path("test_parse_correct_text_4.txt"),
+    path("test_parse_oscillating.txt"),
+])
+def test_vectorized_matches_network(file_path: str) -> None:
+    """Test if the vectorized engine gives the same results as execute_network."""
+    for seed in range(3):
+        reference = build_network(file_path, seed)
+        reference_traces = run_traces(reference, 250)
+
+        network = build_network(file_path, seed)
+        network.set_engine(VectorizedNetwork(network.names, network.devices,
+                                             network))
+        assert run_traces(network, 250) == reference_traces
+
+
+def test_vectorized_wide_gates() -> None:
+    """Test if gates with different numbers of inputs share a level."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    network.set_engine(VectorizedNetwork(names, devices, network))
+
+    [SW1_ID, SW2_ID, AND1_ID, NOR1_ID, XOR1_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "And1", "Nor1", "Xor1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(AND1_ID, devices.AND, 1)
+    devices.make_device(NOR1_ID, devices.NOR, 2)
+    devices.make_device(XOR1_ID, devices.XOR)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW1_ID, None, NOR1_ID, I1)
+    network.make_connection(SW2_ID, None, NOR1_ID, I2)
+    network.make_connection(SW1_ID, None, XOR1_ID, I1)
+    network.make_connection(SW2_ID, None, XOR1_ID, I2)
+
+    assert network.execute_network()
+    assert network.get_output_signal(AND1_ID, None) == devices.HIGH
+    assert network.get_output_signal(NOR1_ID, None) == devices.LOW
+    assert network.get_output_signal(XOR1_ID, None) == devices.HIGH
+
+    devices.set_switch(SW1_ID, devices.LOW)
+    assert network.execute_network()
+    assert network.get_output_signal(AND1_ID, None) == devices.LOW
+    assert network.get_output_signal(NOR1_ID, None) == devices.HIGH
+    assert network.get_output_signal(XOR1_ID, None) == devices.LOW
+
+
+def build_chained_dtypes(seed: int) -> Network:
+    """Return a network of D-types setting and clearing each other, cold started with seed."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1_ID, CLK1_ID, D0_ID, D1_ID, D2_ID, G3_ID, I1, I2] = names.lookup(
+        ["Sw1", "Clk1", "D0", "D1", "D2", "G3", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CLK1_ID, devices.CLOCK, 1)
+    for dtype_id in [D0_ID, D1_ID, D2_ID]:
+        devices.make_device(dtype_id, devices.D_TYPE)
+    devices.make_device(G3_ID, devices.NAND, 2)
+    [DATA, CLK, SET, CLEAR] = [devices.DATA_ID, devices.CLK_ID,
+                               devices.SET_ID, devices.CLEAR_ID]
+    Q, QBAR = devices.Q_ID, devices.QBAR_ID
+    for dtype_id in [D0_ID, D1_ID, D2_ID]:
+        network.make_connection(CLK1_ID, None, dtype_id, CLK)
+    network.make_connection(D0_ID, QBAR, D0_ID, DATA)
+    network.make_connection(SW1_ID, None, D0_ID, SET)
+    network.make_connection(SW1_ID, None, D0_ID, CLEAR)
+    network.make_connection(D2_ID, Q, D1_ID, DATA)
+    network.make_connection(D0_ID, Q, D1_ID, SET)
+    network.make_connection(SW1_ID, None, D1_ID, CLEAR)
+    network.make_connection(D1_ID, QBAR, D2_ID, DATA)
+    network.make_connection(G3_ID, None, D2_ID, SET)
+    network.make_connection(D0_ID, QBAR, D2_ID, CLEAR)
+    network.make_connection(D0_ID, Q, G3_ID, I1)
+    network.make_connection(D1_ID, Q, G3_ID, I2)
+    random.seed(seed)
+    devices.cold_startup()
+    return network
+
+
+def test_vectorized_chained_dtypes() -> None:
+    """Test if D-types driving other D-types settle as in execute_network."""
+    for seed in range(5):
+        reference_traces = run_traces(build_chained_dtypes(seed), 40)
+        network = build_chained_dtypes(seed)
+        network.set_engine(VectorizedNetwork(network.names, network.devices,
+                                             network))
+        assert run_traces(network, 40) == reference_traces